@@ -0,0 +1,121 @@
+"""
+Командная строка обслуживания базы данных.
+
+Запуск:
+    python -m app.cli import-tables tables.csv
+    python -m app.cli import-reservations reservations.ndjson \\
+        --chunk-size 50000
+    python -m app.cli archive --older-than-days 90 --batch-size 5000
+"""
+
+import argparse
+import sys
+
+from app.database import SessionLocal
+from app.services.archive_service import (
+    ARCHIVE_AFTER_DAYS,
+    ARCHIVE_BATCH_SIZE,
+    archive_horizon,
+    archive_reservations,
+)
+from app.services.import_service import (
+    IMPORT_CHUNK_SIZE,
+    import_binary,
+    import_reservations,
+    import_tables,
+)
+
+IMPORTERS = {
+    "import-tables": import_tables,
+    "import-reservations": import_reservations,
+}
+
+
+def run_import(command: str, path: str, file_format: str, chunk_size: int):
+    """
+    Импортировать файл и вывести итог.
+    Аргументы:
+        command: import-tables или import-reservations
+        path: Путь к файлу
+        file_format: csv, ndjson или None (по расширению файла)
+        chunk_size: Количество записей в транзакции
+    Возвращает:
+        int: Код завершения (1, если есть отклоненные строки)
+    """
+    with open(path, "rb") as binary, SessionLocal() as db:
+        report = import_binary(
+            db, IMPORTERS[command], binary, path, file_format, chunk_size
+        )
+    for line, detail in sorted(report.errors):
+        print(f"{path}:{line}: {detail}", file=sys.stderr)
+    if report.rejected > len(report.errors):
+        print(
+            f"... и еще {report.rejected - len(report.errors)} строк",
+            file=sys.stderr,
+        )
+    print(
+        f"прочитано {report.received}, сохранено {report.imported}, "
+        f"отклонено {report.rejected}"
+    )
+    return 1 if report.rejected else 0
+
+
+def run_archive(older_than_days: int, batch_size: int):
+    """
+    Перенести прошедшие брони в архив и вывести итог.
+    Аргументы:
+        older_than_days: Через сколько дней после окончания бронь
+            переносится в архив
+        batch_size: Количество броней в транзакции
+    Возвращает:
+        int: Код завершения
+    """
+    before = archive_horizon(older_than_days)
+    with SessionLocal() as db:
+        archived = archive_reservations(db, before, batch_size)
+    print(
+        f"перенесено в архив {archived} "
+        f"(закончились до {before:%Y-%m-%d %H:%M})"
+    )
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in (
+        ("import-tables", "Импорт столиков из CSV/NDJSON"),
+        ("import-reservations", "Импорт броней из CSV/NDJSON"),
+    ):
+        command_parser = commands.add_parser(command, help=help_text)
+        command_parser.add_argument("path")
+        command_parser.add_argument("--format", choices=["csv", "ndjson"])
+        command_parser.add_argument(
+            "--chunk-size", type=int, default=IMPORT_CHUNK_SIZE
+        )
+    archive_parser = commands.add_parser(
+        "archive", help="Перенос прошедших броней в архив"
+    )
+    archive_parser.add_argument(
+        "--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS
+    )
+    archive_parser.add_argument(
+        "--batch-size", type=int, default=ARCHIVE_BATCH_SIZE
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "archive":
+        return run_archive(args.older_than_days, args.batch_size)
+    try:
+        return run_import(
+            args.command, args.path, args.format, args.chunk_size
+        )
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
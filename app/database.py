@@ -2,26 +2,206 @@
 Конфигурация базы данных и управление сессиями.
 
 Этот модуль настраивает подключение к базе данных и предоставляет
-утилиты для управления сессиями базы данных.
+утилиты для управления сессиями базы данных. Помимо синхронного движка
+может быть включен асинхронный (DATABASE_ASYNC=true), который
+используют асинхронные роутеры.
+
+Если задан DATABASE_READ_URL (например, реплика), списки читаются через
+отдельный движок чтения (get_read_db), а изменения идут в основную базу
+(get_write_db). Чтобы клиент сразу видел свои изменения несмотря на
+отставание реплики, после записи он на READ_YOUR_WRITES_SECONDS
+закрепляется за основной базой (cookie READ_YOUR_WRITES_COOKIE). Без
+DATABASE_READ_URL обе зависимости работают с основной базой.
 """
 
+import time
+
+from fastapi import Request, Response
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
+from app.utils.pool_stats import (
+    PoolStats,
+    attach_pool_stats,
+    instrumented_pool_class,
+)
+
 # URL подключения к базе данных из переменных окружения
 SQLALCHEMY_DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "postgresql+psycopg2://user:password@db:5432/restaurant"
 )
 
+# URL базы данных для чтения списков (реплика), по умолчанию не задан
+SQLALCHEMY_READ_DATABASE_URL = os.getenv("DATABASE_READ_URL")
+
+# Сколько секунд после записи клиент читает из основной базы (0 - выключено)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+# Включение асинхронного пути работы с базой данных
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() in (
+    "1", "true", "yes"
+)
+
+# Асинхронные драйверы для поддерживаемых диалектов
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """
+    Получить URL асинхронного драйвера для URL синхронного подключения.
+
+    Аргументы:
+        url: URL подключения синхронного движка
+    Возвращает:
+        str: URL с драйвером asyncpg/aiosqlite
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Настройки пула соединений
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in (
+    "1", "true", "yes"
+)
+# Режим executemany драйвера psycopg2 (values_only, values_plus_batch)
+DB_EXECUTEMANY_MODE = os.getenv("DB_EXECUTEMANY_MODE")
+
+# Статистика пулов синхронного и асинхронного движков
+pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+# Статистика пулов движков чтения (используется при DATABASE_READ_URL)
+read_pool_stats = PoolStats()
+async_read_pool_stats = PoolStats()
+
+
+def get_engine_options(url: str, stats: PoolStats, use_async: bool = False):
+    """
+    Собрать параметры движка из настроек пула.
+
+    Аргументы:
+        url: URL подключения
+        stats: Статистика, в которую пул сообщает время ожидания
+        use_async: Параметры для асинхронного движка
+    Возвращает:
+        dict: Именованные аргументы create_engine/create_async_engine
+    """
+    parsed = make_url(url)
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if DB_EXECUTEMANY_MODE and parsed.get_driver_name() == "psycopg2":
+        options["executemany_mode"] = DB_EXECUTEMANY_MODE
+    # База SQLite в памяти живет в одном соединении, пул-очередь не нужен
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (
+        None, "", ":memory:"
+    ):
+        return options
+    options.update(
+        poolclass=instrumented_pool_class(stats, use_async),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
 # Экземпляр движка базы данных
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    **get_engine_options(SQLALCHEMY_DATABASE_URL, pool_stats)
+)
+attach_pool_stats(engine, pool_stats)
 
 # Фабрика сессий для создания сессий базы данных
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Движок и фабрика сессий для чтения (без реплики - основные)
+read_engine = engine
+ReadSessionLocal = SessionLocal
+if SQLALCHEMY_READ_DATABASE_URL:
+    read_engine = create_engine(
+        SQLALCHEMY_READ_DATABASE_URL,
+        **get_engine_options(SQLALCHEMY_READ_DATABASE_URL, read_pool_stats)
+    )
+    attach_pool_stats(read_engine, read_pool_stats)
+    ReadSessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, bind=read_engine
+    )
+
+# Асинхронный движок и фабрика сессий (создаются только при DATABASE_ASYNC)
+async_engine = None
+AsyncSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+if DATABASE_ASYNC:
+    SQLALCHEMY_ASYNC_DATABASE_URL = os.getenv(
+        "DATABASE_ASYNC_URL",
+        get_async_database_url(SQLALCHEMY_DATABASE_URL)
+    )
+    async_engine = create_async_engine(
+        SQLALCHEMY_ASYNC_DATABASE_URL,
+        **get_engine_options(
+            SQLALCHEMY_ASYNC_DATABASE_URL, async_pool_stats, use_async=True
+        )
+    )
+    attach_pool_stats(async_engine.sync_engine, async_pool_stats)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+    async_read_engine = async_engine
+    AsyncReadSessionLocal = AsyncSessionLocal
+    if SQLALCHEMY_READ_DATABASE_URL:
+        SQLALCHEMY_ASYNC_READ_DATABASE_URL = os.getenv(
+            "DATABASE_ASYNC_READ_URL",
+            get_async_database_url(SQLALCHEMY_READ_DATABASE_URL)
+        )
+        async_read_engine = create_async_engine(
+            SQLALCHEMY_ASYNC_READ_DATABASE_URL,
+            **get_engine_options(
+                SQLALCHEMY_ASYNC_READ_DATABASE_URL,
+                async_read_pool_stats,
+                use_async=True,
+            )
+        )
+        attach_pool_stats(
+            async_read_engine.sync_engine, async_read_pool_stats
+        )
+        AsyncReadSessionLocal = async_sessionmaker(
+            bind=async_read_engine, autoflush=False, expire_on_commit=False
+        )
+
+
+def active_pool_stats():
+    """
+    Статистика пулов всех созданных движков.
+
+    Возвращает:
+        list: Пары (имя пула, PoolStats); основной пул - всегда первый
+    """
+    pools = [("sync", pool_stats)]
+    for name, stats in (
+        ("async", async_pool_stats),
+        ("read", read_pool_stats),
+        ("async_read", async_read_pool_stats),
+    ):
+        if stats.pool is not None:
+            pools.append((name, stats))
+    return pools
+
+
 # Базовый класс для всех моделей базы данных
 Base = declarative_base()
 
@@ -41,3 +221,127 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Функция-зависимость, которая предоставляет асинхронные сессии.
+
+    Возвращает:
+        AsyncSession: Асинхронная сессия базы данных
+
+    Примечание:
+        Доступна только при DATABASE_ASYNC=true
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def pinned_to_primary(request: Request) -> bool:
+    """
+    Закреплен ли клиент за основной базой после недавней записи.
+
+    Аргументы:
+        request: Входящий запрос
+    Возвращает:
+        bool: True если срок закрепления из cookie еще не истек
+    """
+    try:
+        until = float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+def pin_to_primary(response: Response):
+    """
+    Закрепить клиента за основной базой на READ_YOUR_WRITES_SECONDS.
+    Без отдельной базы для чтения ничего не делает.
+
+    Аргументы:
+        response: Ответ, в который записывается cookie
+    """
+    if read_engine is engine or READ_YOUR_WRITES_SECONDS <= 0:
+        return
+    response.set_cookie(
+        READ_YOUR_WRITES_COOKIE,
+        f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}",
+        max_age=max(1, int(READ_YOUR_WRITES_SECONDS)),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def read_session_factory(request: Request):
+    """
+    Фабрика сессий для чтения с учетом закрепления за основной базой.
+
+    Аргументы:
+        request: Входящий запрос
+    Возвращает:
+        sessionmaker: ReadSessionLocal или SessionLocal
+    """
+    if pinned_to_primary(request):
+        return SessionLocal
+    return ReadSessionLocal
+
+
+def get_read_db(request: Request):
+    """
+    Функция-зависимость, которая предоставляет сессию для чтения списков.
+
+    Возвращает:
+        Session: Сессия базы для чтения (основной, если клиент недавно
+        выполнял запись)
+    """
+    db = read_session_factory(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_write_db(response: Response):
+    """
+    Функция-зависимость, которая предоставляет сессию для изменений.
+
+    Возвращает:
+        Session: Сессия основной базы данных
+
+    Примечание:
+        Закрепляет клиента за основной базой для последующих чтений
+    """
+    pin_to_primary(response)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """
+    Функция-зависимость, которая предоставляет асинхронную сессию для
+    чтения списков.
+
+    Возвращает:
+        AsyncSession: Асинхронная сессия базы для чтения
+    """
+    factory = AsyncReadSessionLocal
+    if pinned_to_primary(request):
+        factory = AsyncSessionLocal
+    async with factory() as db:
+        yield db
+
+
+async def get_async_write_db(response: Response):
+    """
+    Функция-зависимость, которая предоставляет асинхронную сессию для
+    изменений.
+
+    Возвращает:
+        AsyncSession: Асинхронная сессия основной базы данных
+    """
+    pin_to_primary(response)
+    async with AsyncSessionLocal() as db:
+        yield db
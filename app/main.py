@@ -7,10 +7,24 @@
 
 import logging
 
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
 
-from app.routers import tables, reservations
-from app.utils.logger import setup_logging
+from app.database import (
+    DATABASE_ASYNC,
+    async_engine,
+    async_read_engine,
+    engine,
+    read_engine,
+)
+from app.middleware.admission import AdmissionMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.metrics import MetricsMiddleware, instrument_engine
+from app.middleware.profiling import capture_slow_plans, profile_routes
+from app.routers import tables, reservations, availability, diagnostics
+from app.services.partition_service import ensure_reservation_partitions
+from app.utils.logger import setup_logging, stop_logging
 
 # Инициализация логирования
 setup_logging()
@@ -26,18 +40,92 @@ app = FastAPI(
     },
 )
 
+
+def include_routers(routers):
+    """
+    Подключить роутеры к приложению.
+    Если путь и метод уже объявлены в роутере выше по списку, маршрут
+    пропускается: так асинхронные обработчики заменяют синхронные, а
+    эндпоинты без асинхронного варианта остаются доступны.
+    Аргументы:
+        routers: Список пар (роутер, теги)
+    """
+    registered = set()
+    for router, router_tags in routers:
+        selected = APIRouter()
+        for route in router.routes:
+            keys = {(route.path, method) for method in route.methods}
+            if keys & registered:
+                continue
+            registered |= keys
+            selected.routes.append(route)
+        app.include_router(selected, tags=router_tags)
+
+
 # Подключение роутеров API
-app.include_router(tables.router, tags=["Столики"])
-app.include_router(reservations.router, tags=["Брони"])
+api_routers = [
+    (tables.router, ["Столики"]),
+    (reservations.router, ["Брони"]),
+    (availability.router, ["Доступность"]),
+    (diagnostics.router, ["Диагностика"]),
+    (diagnostics.metrics_router, ["Диагностика"]),
+]
+if DATABASE_ASYNC:
+    from app.routers import async_tables, async_reservations
+
+    api_routers = [
+        (async_tables.router, ["Столики"]),
+        (async_reservations.router, ["Брони"]),
+    ] + api_routers
+include_routers(api_routers)
+
+# Контроль допуска перед пулом соединений; метрики подключаются снаружи,
+# чтобы учитывать и отклоненные запросы
+app.add_middleware(AdmissionMiddleware)
+
+# Повтор ответов по Idempotency-Key снаружи контроля допуска: повторы и
+# ожидающие дубликаты не занимают мест лимита
+app.add_middleware(IdempotencyMiddleware)
+
+# Метрики запросов и SQL-запросов; планы медленных запросов и
+# профилирование обработчиков подключаются, только если включены
+app.add_middleware(MetricsMiddleware)
+engines = [engine]
+if read_engine is not engine:
+    engines.append(read_engine)
+if async_engine is not None:
+    engines.append(async_engine.sync_engine)
+if async_read_engine is not async_engine:
+    engines.append(async_read_engine.sync_engine)
+for instrumented_engine in engines:
+    instrument_engine(instrumented_engine)
+    capture_slow_plans(instrumented_engine)
+profile_routes(app)
 
 
 @app.on_event("startup")
 async def startup_event():
     """Инициализация сервисов при запуске приложения."""
     logger.info("Запуск приложения...")
+    if engine.dialect.name == "postgresql":
+        await run_in_threadpool(create_partitions)
+
+
+def create_partitions():
+    """Досоздать месячные партиции броней (только PostgreSQL)."""
+    try:
+        with engine.begin() as connection:
+            ensure_reservation_partitions(connection)
+    except SQLAlchemyError:
+        logger.exception("Не удалось проверить партиции броней")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Очистка ресурсов при завершении работы."""
     logger.info("Завершение работы приложения...")
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+    stop_logging()
@@ -0,0 +1,318 @@
+"""
+Контроль допуска запросов перед пулом соединений базы данных.
+
+AdmissionMiddleware - чистое ASGI-middleware. Одновременно обрабатывается
+не больше ADMISSION_MAX_IN_FLIGHT запросов (по умолчанию pool_size +
+max_overflow пула): больше соединений база все равно не выдаст, и лишние
+запросы только ждали бы в SessionLocal() до pool_timeout. Сверх лимита
+запрос ждет в короткой очереди с приоритетами не дольше
+ADMISSION_QUEUE_TIMEOUT_MS; если очередь полна или срок истек, сразу
+возвращается 503 с Retry-After.
+
+Приоритеты: бронирования (POST /reservations/, /reservations/batch и
+/reservations/auto), затем остальные изменения, затем чтение. Очередь
+отдает места по приоритету, а при заполненной очереди запрос вытесняет
+из нее самый поздний запрос с меньшим приоритетом. Последние
+ADMISSION_BOOKING_RESERVE мест лимита доступны только бронированиям,
+поэтому поток чтений не вытесняет их полностью.
+
+Дополнительно каждый клиент (по IP) ограничен корзиной токенов:
+RATE_LIMIT_PER_SECOND запросов в секунду с запасом RATE_LIMIT_BURST;
+сверх нее возвращается 429 с Retry-After.
+
+Состояние хранится в цикле событий процесса и не требует блокировок:
+все методы вызываются только из него.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import OrderedDict
+
+from starlette.responses import JSONResponse
+
+from app.database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+from app.utils.metrics import Counter, Gauge, registry
+
+# Максимальное количество одновременно обрабатываемых запросов
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv(
+    "ADMISSION_MAX_IN_FLIGHT", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)
+))
+
+# Длина очереди ожидания и срок ожидания в ней (в миллисекундах)
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "50"))
+ADMISSION_QUEUE_TIMEOUT_MS = float(
+    os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "500")
+)
+
+# Мест лимита, доступных только бронированиям
+ADMISSION_BOOKING_RESERVE = int(os.getenv(
+    "ADMISSION_BOOKING_RESERVE", str(max(1, ADMISSION_MAX_IN_FLIGHT // 5))
+))
+
+# Значение заголовка Retry-After при перегрузке (в секундах)
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+# Ограничение запросов одного клиента (0 - выключено)
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))
+RATE_LIMIT_BURST = float(os.getenv(
+    "RATE_LIMIT_BURST", str(max(1.0, 2 * RATE_LIMIT_PER_SECOND))
+))
+
+# Сколько клиентов помнить для ограничения частоты
+RATE_LIMIT_MAX_CLIENTS = 10000
+
+# Классы запросов в порядке приоритета
+BOOKING = "booking"
+WRITE = "write"
+READ = "read"
+PRIORITIES = {BOOKING: 0, WRITE: 1, READ: 2}
+
+# Пути бронирований (без завершающего /)
+BOOKING_PATHS = frozenset({
+    "/reservations",
+    "/reservations/batch",
+    "/reservations/auto",
+    "/reservations/auto/batch",
+})
+
+# Пути, которые не обращаются к базе и не ограничиваются
+EXEMPT_PREFIXES = ("/metrics", "/diagnostics", "/docs", "/redoc", "/openapi")
+
+OVERLOADED = "Сервис перегружен, повторите запрос позже"
+RATE_LIMITED = "Слишком много запросов, повторите запрос позже"
+
+admission_queued = registry.register(Counter(
+    "admission_requests_queued_total",
+    "Запросы, ожидавшие места в очереди допуска",
+    ("class",),
+))
+admission_shed = registry.register(Counter(
+    "admission_requests_shed_total",
+    "Запросы, отклоненные контролем допуска",
+    ("class", "reason"),
+))
+admission_queue_length = registry.register(Gauge(
+    "admission_queue_length",
+    "Запросы в очереди допуска",
+))
+admission_in_flight = registry.register(Gauge(
+    "admission_in_flight",
+    "Запросы, допущенные к обработке",
+))
+
+
+def request_class(method: str, path: str) -> str:
+    """Класс запроса для приоритета допуска."""
+    if method in ("GET", "HEAD"):
+        return READ
+    if method == "POST" and path.rstrip("/") in BOOKING_PATHS:
+        return BOOKING
+    return WRITE
+
+
+class AdmissionController:
+    """
+    Лимит одновременных запросов с очередью по приоритетам.
+
+    Аргументы:
+        limit: Максимальное количество одновременных запросов
+        queue_size: Максимальная длина очереди
+        queue_timeout: Срок ожидания в очереди в секундах
+        booking_reserve: Мест лимита, доступных только бронированиям
+    """
+
+    def __init__(
+        self,
+        limit: int = ADMISSION_MAX_IN_FLIGHT,
+        queue_size: int = ADMISSION_QUEUE_SIZE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+        booking_reserve: int = ADMISSION_BOOKING_RESERVE,
+    ):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.booking_reserve = min(booking_reserve, max(limit - 1, 0))
+        self.in_flight = 0
+        self._waiters = []
+        self._waiting = 0
+        self._sequence = itertools.count()
+
+    def _has_room(self, priority: int) -> bool:
+        limit = self.limit
+        if priority != PRIORITIES[BOOKING]:
+            limit -= self.booking_reserve
+        return self.in_flight < limit
+
+    def _start(self):
+        self.in_flight += 1
+        admission_in_flight.set(value=self.in_flight)
+
+    def _prune(self):
+        """Убрать из головы очереди запросы с истекшим сроком."""
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+
+    async def acquire(self, kind: str):
+        """
+        Получить место для запроса.
+        Аргументы:
+            kind: Класс запроса (BOOKING, WRITE или READ)
+        Возвращает:
+            None если место получено, иначе причина отказа
+            ("queue_full", "displaced" или "deadline")
+        """
+        priority = PRIORITIES[kind]
+        self._prune()
+        # Без очереди проходит только запрос, которого никто не опережает
+        if self._has_room(priority) and not (
+            self._waiters and self._waiters[0][0] <= priority
+        ):
+            self._start()
+            return None
+        if self._waiting >= self.queue_size and not self._displace(priority):
+            return "queue_full"
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters, (priority, next(self._sequence), future)
+        )
+        self._waiting += 1
+        admission_queue_length.set(value=self._waiting)
+        admission_queued.inc(kind)
+        try:
+            return await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            return "deadline"
+        except asyncio.CancelledError:
+            # Клиент ушел, когда место уже было выделено
+            if (
+                future.done() and not future.cancelled()
+                and future.result() is None
+            ):
+                self.release()
+            raise
+        finally:
+            future.cancel()
+            self._waiting -= 1
+            admission_queue_length.set(value=self._waiting)
+
+    def _displace(self, priority: int) -> bool:
+        """
+        Отказать самому позднему из ожидающих с меньшим приоритетом.
+        Возвращает:
+            bool: True если место в очереди освобождено
+        """
+        worst = None
+        for entry in self._waiters:
+            if entry[2].done() or entry[0] <= priority:
+                continue
+            if worst is None or entry[:2] > worst[:2]:
+                worst = entry
+        if worst is None:
+            return False
+        worst[2].set_result("displaced")
+        return True
+
+    def release(self):
+        """Освободить место и допустить ожидающих по приоритету."""
+        self.in_flight -= 1
+        self._prune()
+        while self._waiters and self._has_room(self._waiters[0][0]):
+            _, _, future = heapq.heappop(self._waiters)
+            self._start()
+            future.set_result(None)
+            self._prune()
+        admission_in_flight.set(value=self.in_flight)
+
+
+class TokenBuckets:
+    """
+    Корзины токенов по клиентам.
+
+    Аргументы:
+        rate: Пополнение корзины, токенов в секунду
+        burst: Емкость корзины
+        max_clients: Сколько корзин хранить (давно не активные вытесняются)
+    """
+
+    def __init__(
+        self,
+        rate: float = RATE_LIMIT_PER_SECOND,
+        burst: float = RATE_LIMIT_BURST,
+        max_clients: int = RATE_LIMIT_MAX_CLIENTS,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+
+    def take(self, client: str, now: float = None) -> float:
+        """
+        Взять токен из корзины клиента.
+        Возвращает:
+            float: 0 если токен взят, иначе секунды до появления токена
+        """
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class AdmissionMiddleware:
+    """
+    ASGI-middleware контроля допуска и ограничения частоты запросов.
+
+    Аргументы:
+        app: Оборачиваемое ASGI-приложение
+        controller: Лимит одновременных запросов (по умолчанию из настроек)
+        buckets: Корзины токенов клиентов (None - по RATE_LIMIT_PER_SECOND)
+    """
+
+    def __init__(self, app, controller=None, buckets=None):
+        self.app = app
+        self.controller = controller or AdmissionController()
+        if buckets is None and RATE_LIMIT_PER_SECOND > 0:
+            buckets = TokenBuckets()
+        self.buckets = buckets
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path.startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        kind = request_class(scope["method"], path)
+        if self.buckets is not None:
+            client = scope.get("client")
+            wait = self.buckets.take(client[0] if client else "-")
+            if wait:
+                admission_shed.inc(kind, "rate_limited")
+                await JSONResponse(
+                    {"detail": RATE_LIMITED},
+                    status_code=429,
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )(scope, receive, send)
+                return
+        reason = await self.controller.acquire(kind)
+        if reason is not None:
+            admission_shed.inc(kind, reason)
+            await JSONResponse(
+                {"detail": OVERLOADED},
+                status_code=503,
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+            )(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
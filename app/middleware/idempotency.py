@@ -0,0 +1,504 @@
+"""
+Повтор ответов на изменяющие запросы с заголовком Idempotency-Key.
+
+IdempotencyMiddleware - чистое ASGI-middleware для POST/PUT/PATCH/DELETE
+броней (/reservations). Ответ на первый запрос с ключом сохраняется, а
+повтор с тем же ключом получает его копию (с заголовком
+Idempotent-Replayed: true) без проверки конфликта, вставки и удаления.
+Повтор с тем же ключом, но другим запросом (метод, путь, параметры или
+тело) отклоняется с 422. Ключ действует только для своего клиента
+(заголовок Authorization, а без него - адрес клиента): другой клиент с тем
+же ключом не получит чужой ответ.
+
+Ответы хранятся в LRU-кэше процесса (IDEMPOTENCY_CACHE_SIZE записей,
+IDEMPOTENCY_TTL секунд). При IDEMPOTENCY_DATABASE=true они дополнительно
+сохраняются в таблице idempotency_keys и видны всем воркерам.
+
+Дубликат, пришедший, пока первый запрос еще выполняется, ждет его ответа
+(не дольше IDEMPOTENCY_WAIT_TIMEOUT секунд, затем 409 с Retry-After), а
+не выполняется параллельно. В базе захват ключа действует
+IDEMPOTENCY_LEASE секунд и продлевается, пока запрос выполняется: если
+воркер-владелец упал, следующий запрос с ключом выполнится заново.
+Ответы 5xx и 429 не сохраняются: повтор выполнится заново. Не
+сохраняются и ответы длиннее IDEMPOTENCY_MAX_BODY_BYTES. Запросы с телом
+длиннее IDEMPOTENCY_MAX_REQUEST_BYTES (загрузка файлов импорта) не
+буферизуются и выполняются без ключа.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from app.database import SessionLocal
+from app.services.idempotency_service import (
+    claim_key,
+    complete_key,
+    decode_headers,
+    get_key,
+    lease_expired,
+    purge_expired_keys,
+    release_key,
+    renew_key,
+)
+from app.utils.metrics import Counter, registry
+
+# Количество сохраненных ответов в памяти процесса
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+# Срок хранения ответа (в секундах)
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+
+# Максимальный размер сохраняемого тела ответа (в байтах)
+IDEMPOTENCY_MAX_BODY_BYTES = int(
+    os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", "65536")
+)
+
+# Максимальный размер буферизуемого тела запроса (в байтах): более
+# длинные запросы выполняются без ключа и не держатся в памяти целиком
+IDEMPOTENCY_MAX_REQUEST_BYTES = int(
+    os.getenv("IDEMPOTENCY_MAX_REQUEST_BYTES", "1048576")
+)
+
+# Сколько дубликат ждет ответа на первый запрос (в секундах)
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "10"))
+
+# Хранить ответы в базе данных, общей для всех воркеров
+IDEMPOTENCY_DATABASE = os.getenv("IDEMPOTENCY_DATABASE", "false").lower() in (
+    "1", "true", "yes"
+)
+
+# Срок аренды захваченного в базе ключа (в секундах): владелец продлевает
+# ее, пока выполняет запрос; не продленный захват считается брошенным
+IDEMPOTENCY_LEASE = float(os.getenv("IDEMPOTENCY_LEASE", "30"))
+
+# Период опроса базы, пока запрос выполняет другой воркер (в секундах)
+IDEMPOTENCY_POLL_INTERVAL = 0.05
+
+# Как часто удалять просроченные ключи из базы (в секундах)
+IDEMPOTENCY_PURGE_INTERVAL = 60
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+AUTHORIZATION_HEADER = b"authorization"
+CONTENT_LENGTH_HEADER = b"content-length"
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+MAX_KEY_LENGTH = 255
+
+# Запросы, к которым применяется ключ
+IDEMPOTENT_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+IDEMPOTENT_PREFIXES = ("/reservations",)
+
+# Заголовки, которые не повторяются: cookie относятся к исходному ответу
+SKIPPED_HEADERS = frozenset({b"set-cookie"})
+
+KEY_INVALID = f"Idempotency-Key должен быть от 1 до {MAX_KEY_LENGTH} символов"
+KEY_REUSED = "Idempotency-Key уже использован для другого запроса"
+KEY_IN_PROGRESS = "Запрос с этим Idempotency-Key еще выполняется"
+
+idempotency_requests = registry.register(Counter(
+    "idempotency_requests_total",
+    "Запросы с заголовком Idempotency-Key",
+    ("result",),
+))
+
+
+def storable(status: int) -> bool:
+    """Можно ли сохранить ответ с этим статусом для повтора."""
+    return status < 500 and status != 429
+
+
+class StoredResponse:
+    """
+    Сохраненный ответ на запрос с ключом.
+
+    Атрибуты:
+        fingerprint: Хэш запроса
+        status: Статус ответа
+        headers: Заголовки ответа (список пар bytes)
+        body: Тело ответа
+        stored_at: Момент сохранения (по time.monotonic)
+    """
+
+    __slots__ = ("fingerprint", "status", "headers", "body", "stored_at")
+
+    def __init__(self, fingerprint, status, headers, body):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = time.monotonic()
+
+    @classmethod
+    def from_row(cls, row):
+        """Ответ из строки idempotency_keys."""
+        headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in decode_headers(row.headers)
+        ]
+        return cls(row.fingerprint, row.status_code, headers, row.body or b"")
+
+    def header_pairs(self) -> list:
+        """Заголовки в виде пар строк для сохранения в базе."""
+        return [
+            (name.decode("latin-1"), value.decode("latin-1"))
+            for name, value in self.headers
+        ]
+
+
+class ResponseCache:
+    """
+    LRU-кэш сохраненных ответов со сроком жизни.
+
+    Аргументы:
+        max_entries: Максимальное количество ответов
+        ttl: Срок жизни ответа в секундах
+    """
+
+    def __init__(
+        self,
+        max_entries: int = IDEMPOTENCY_CACHE_SIZE,
+        ttl: float = IDEMPOTENCY_TTL,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, key: str):
+        """Сохраненный ответ или None."""
+        response = self._entries.get(key)
+        if response is None:
+            return None
+        if time.monotonic() - response.stored_at >= self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: StoredResponse):
+        """Сохранить ответ, вытеснив самый давний при переполнении."""
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _digest(*parts: bytes) -> str:
+    return hashlib.sha256(b"\0".join(parts)).hexdigest()
+
+
+def client_scope(scope) -> bytes:
+    """
+    Кому принадлежит ключ: учетные данные запроса, а без них - адрес
+    клиента (как в AdmissionMiddleware).
+    Аргументы:
+        scope: ASGI scope запроса
+    Возвращает:
+        bytes: Метка клиента для хэша ключа
+    """
+    credentials = dict(scope["headers"]).get(AUTHORIZATION_HEADER)
+    if credentials is not None:
+        return b"auth:" + credentials
+    client = scope.get("client")
+    return b"addr:" + (client[0] if client else "-").encode()
+
+
+def request_key(scope, value: bytes) -> str:
+    """Ключ сохраненного ответа: клиент, метод, путь и Idempotency-Key."""
+    return _digest(
+        client_scope(scope), scope["method"].encode(),
+        scope["path"].encode(), value,
+    )
+
+
+def request_fingerprint(scope, body: bytes) -> str:
+    """Хэш запроса для проверки, что ключ повторен с тем же запросом."""
+    return _digest(
+        scope["method"].encode(), scope["path"].encode(),
+        scope["query_string"], body,
+    )
+
+
+def _declared_length(scope):
+    """Content-Length запроса или None."""
+    value = dict(scope["headers"]).get(CONTENT_LENGTH_HEADER)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _with_session(function, *args):
+    """Вызвать функцию сервиса в собственной сессии."""
+    with SessionLocal() as db:
+        return function(db, *args)
+
+
+async def _read_body(receive, limit: int):
+    """
+    Прочитать тело запроса, но не больше limit байт.
+    Возвращает:
+        tuple: (прочитанные части, прочитано ли тело целиком) или None,
+        если клиент отключился
+    """
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunk = message.get("body", b"")
+        chunks.append(chunk)
+        size += len(chunk)
+        if not message.get("more_body", False):
+            return chunks, True
+        if size > limit:
+            return chunks, False
+
+
+def _replay_receive(chunks: list, complete: bool, receive):
+    """receive, отдающий уже прочитанные части тела, затем остальное."""
+    pending = list(chunks)
+
+    async def wrapped():
+        if pending:
+            body = pending.pop(0)
+            return {
+                "type": "http.request",
+                "body": body,
+                "more_body": bool(pending) or not complete,
+            }
+        return await receive()
+
+    return wrapped
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI-middleware повтора ответов по заголовку Idempotency-Key.
+
+    Аргументы:
+        app: Оборачиваемое ASGI-приложение
+        cache: Кэш ответов (по умолчанию из настроек)
+        use_database: Хранить ответы в базе данных
+        wait_timeout: Сколько дубликат ждет первый запрос (в секундах)
+    """
+
+    def __init__(
+        self,
+        app,
+        cache=None,
+        use_database: bool = IDEMPOTENCY_DATABASE,
+        wait_timeout: float = IDEMPOTENCY_WAIT_TIMEOUT,
+    ):
+        self.app = app
+        self.cache = cache or ResponseCache()
+        self.use_database = use_database
+        self.wait_timeout = wait_timeout
+        self._in_flight = {}
+        self._purged_at = time.monotonic()
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in IDEMPOTENT_METHODS
+            or not scope["path"].startswith(IDEMPOTENT_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+        value = dict(scope["headers"]).get(IDEMPOTENCY_HEADER)
+        if value is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(value) <= MAX_KEY_LENGTH:
+            idempotency_requests.inc("invalid")
+            await JSONResponse(
+                {"detail": KEY_INVALID}, status_code=400
+            )(scope, receive, send)
+            return
+        declared = _declared_length(scope)
+        if declared is not None and declared > IDEMPOTENCY_MAX_REQUEST_BYTES:
+            idempotency_requests.inc("too_large")
+            await self.app(scope, receive, send)
+            return
+        read = await _read_body(receive, IDEMPOTENCY_MAX_REQUEST_BYTES)
+        if read is None:
+            return
+        chunks, complete = read
+        receive = _replay_receive(chunks, complete, receive)
+        if not complete:
+            # Тело длиннее лимита: дочитывает уже само приложение
+            idempotency_requests.inc("too_large")
+            await self.app(scope, receive, send)
+            return
+        key = request_key(scope, value)
+        fingerprint = request_fingerprint(scope, b"".join(chunks))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_timeout
+
+        # Дубликаты ждут первый запрос этого процесса и повторяют его
+        # ответ; если ответ не сохранен, выполняется следующий из них
+        while True:
+            stored = self.cache.get(key)
+            if stored is not None:
+                await self._replay(stored, fingerprint, scope, receive, send)
+                return
+            waiting = self._in_flight.get(key)
+            if waiting is None:
+                break
+            idempotency_requests.inc("waited")
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(waiting), deadline - loop.time()
+                )
+            except asyncio.TimeoutError:
+                await self._in_progress(scope, receive, send)
+                return
+
+        future = loop.create_future()
+        self._in_flight[key] = future
+        try:
+            if self.use_database:
+                owner = await self._claim(key, fingerprint, deadline)
+                if owner is None:
+                    await self._in_progress(scope, receive, send)
+                    return
+                if owner is not True:
+                    self.cache.put(key, owner)
+                    await self._replay(
+                        owner, fingerprint, scope, receive, send
+                    )
+                    return
+            await self._execute(key, fingerprint, scope, receive, send)
+        finally:
+            del self._in_flight[key]
+            future.set_result(None)
+
+    async def _claim(self, key: str, fingerprint: str, deadline: float):
+        """
+        Захватить ключ в базе данных.
+        Возвращает:
+            True если ключ захвачен, StoredResponse если ответ уже
+            сохранен, None если запрос до срока выполняет другой воркер
+        """
+        loop = asyncio.get_running_loop()
+        row = await run_in_threadpool(
+            _with_session, claim_key, key, fingerprint, IDEMPOTENCY_TTL,
+            IDEMPOTENCY_LEASE,
+        )
+        while True:
+            if row is None:
+                return True
+            if row.status_code is not None:
+                return StoredResponse.from_row(row)
+            if loop.time() >= deadline:
+                return None
+            await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+            row = await run_in_threadpool(
+                _with_session, get_key, key, IDEMPOTENCY_TTL
+            )
+            if row is None or lease_expired(row, IDEMPOTENCY_LEASE):
+                # Владелец освободил ключ, не сохранив ответ, или упал
+                row = await run_in_threadpool(
+                    _with_session, claim_key, key, fingerprint,
+                    IDEMPOTENCY_TTL, IDEMPOTENCY_LEASE,
+                )
+
+    async def _execute(self, key, fingerprint, scope, receive, send):
+        """Выполнить запрос, передавая ответ клиенту и сохраняя копию."""
+        status = None
+        headers = []
+        chunks = []
+        size = 0
+
+        async def capture(message):
+            nonlocal status, headers, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [
+                    (name, value)
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in SKIPPED_HEADERS
+                ]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if size <= IDEMPOTENCY_MAX_BODY_BYTES:
+                    chunks.append(message.get("body", b""))
+            await send(message)
+
+        stored = None
+        renewal = None
+        if self.use_database:
+            renewal = asyncio.ensure_future(self._renew(key))
+        try:
+            await self.app(scope, receive, capture)
+            if (
+                status is not None and storable(status)
+                and size <= IDEMPOTENCY_MAX_BODY_BYTES
+            ):
+                stored = StoredResponse(
+                    fingerprint, status, headers, b"".join(chunks)
+                )
+                self.cache.put(key, stored)
+        finally:
+            if renewal is not None:
+                renewal.cancel()
+            idempotency_requests.inc(
+                "stored" if stored is not None else "not_stored"
+            )
+            if self.use_database:
+                await self._finish(key, stored)
+
+    async def _renew(self, key: str):
+        """Продлевать аренду ключа в базе, пока выполняется запрос."""
+        while True:
+            await asyncio.sleep(IDEMPOTENCY_LEASE / 3)
+            try:
+                await run_in_threadpool(_with_session, renew_key, key)
+            except Exception:
+                # Продление - best effort: следующая попытка через треть
+                # аренды, а ответ сохранится независимо от него
+                continue
+
+    async def _finish(self, key: str, stored):
+        """Сохранить ответ в базе или освободить ключ."""
+        if stored is None:
+            await run_in_threadpool(_with_session, release_key, key)
+            return
+        await run_in_threadpool(
+            _with_session, complete_key, key, stored.status,
+            stored.header_pairs(), stored.body,
+        )
+        if time.monotonic() - self._purged_at >= IDEMPOTENCY_PURGE_INTERVAL:
+            self._purged_at = time.monotonic()
+            await run_in_threadpool(
+                _with_session, purge_expired_keys, IDEMPOTENCY_TTL
+            )
+
+    async def _replay(self, stored, fingerprint, scope, receive, send):
+        """Отправить сохраненный ответ (или 422, если запрос другой)."""
+        if stored.fingerprint != fingerprint:
+            idempotency_requests.inc("mismatch")
+            await JSONResponse(
+                {"detail": KEY_REUSED}, status_code=422
+            )(scope, receive, send)
+            return
+        idempotency_requests.inc("replayed")
+        await send({
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": stored.headers + [REPLAYED_HEADER],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
+
+    async def _in_progress(self, scope, receive, send):
+        """Ответить 409: первый запрос с ключом еще не завершен."""
+        idempotency_requests.inc("in_progress")
+        await JSONResponse(
+            {"detail": KEY_IN_PROGRESS},
+            status_code=409,
+            headers={"Retry-After": "1"},
+        )(scope, receive, send)
@@ -0,0 +1,226 @@
+"""
+Сбор метрик запросов и запросов к базе данных.
+
+MetricsMiddleware - чистое ASGI-middleware: оно считает длительность,
+статусы и количество одновременно обрабатываемых запросов по шаблону
+маршрута. Обработчики before/after_cursor_execute движка складывают
+количество и время SQL-запросов в статистику текущего HTTP-запроса
+(через contextvar, который наследуют и потоки пула) и пишут в журнал
+app.slow_query запросы дольше SLOW_QUERY_THRESHOLD_MS. Параметры запросов
+содержат персональные данные (имена клиентов), поэтому пишутся в журнал
+только при SLOW_QUERY_LOG_PARAMETERS=true.
+"""
+
+import logging
+import os
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.database import active_pool_stats
+from app.utils.metrics import (
+    COUNT_BUCKETS,
+    Counter,
+    Gauge,
+    Histogram,
+    registry,
+)
+
+# Порог медленного SQL-запроса (в миллисекундах)
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+
+# Писать ли параметры медленных запросов в журнал (по умолчанию - нет)
+SLOW_QUERY_LOG_PARAMETERS = os.getenv(
+    "SLOW_QUERY_LOG_PARAMETERS", "false"
+).lower() in ("1", "true", "yes")
+
+# Максимальная длина параметров запроса в журнале медленных запросов
+SLOW_QUERY_MAX_PARAMS = 1000
+
+# Метка для запросов, не совпавших ни с одним маршрутом
+UNMATCHED_ROUTE = "<unmatched>"
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+http_requests = registry.register(Counter(
+    "http_requests_total",
+    "Количество обработанных HTTP-запросов",
+    ("method", "route", "status"),
+))
+http_duration = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Длительность обработки HTTP-запроса",
+    ("method", "route"),
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight",
+    "Количество HTTP-запросов в обработке",
+))
+request_db_queries = registry.register(Histogram(
+    "http_request_db_queries",
+    "Количество SQL-запросов на один HTTP-запрос",
+    ("method", "route"),
+    buckets=COUNT_BUCKETS,
+))
+request_db_duration = registry.register(Histogram(
+    "http_request_db_duration_seconds",
+    "Суммарное время SQL-запросов на один HTTP-запрос",
+    ("method", "route"),
+))
+db_queries = registry.register(Counter(
+    "db_queries_total",
+    "Количество выполненных SQL-запросов",
+    locked=True,
+))
+db_slow_queries = registry.register(Counter(
+    "db_slow_queries_total",
+    "Количество SQL-запросов дольше порога SLOW_QUERY_THRESHOLD_MS",
+    locked=True,
+))
+
+
+class RequestStats:
+    """
+    Статистика SQL-запросов одного HTTP-запроса.
+
+    Атрибуты:
+        scope: ASGI scope запроса (шаблон маршрута появляется после роутинга)
+        queries: Количество SQL-запросов
+        db_seconds: Суммарное время SQL-запросов
+    """
+
+    __slots__ = ("scope", "queries", "db_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        return route_label(self.scope)
+
+
+# Статистика текущего HTTP-запроса
+current_request = ContextVar("current_request", default=None)
+
+
+def route_label(scope) -> str:
+    """Шаблон пути маршрута, обработавшего запрос."""
+    route = scope.get("route")
+    return route.path if route is not None else UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware метрик HTTP-запросов.
+
+    Аргументы:
+        app: Оборачиваемое ASGI-приложение
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        began = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - began
+            http_in_flight.dec()
+            current_request.reset(token)
+            method = scope["method"]
+            route = route_label(scope)
+            http_requests.inc(method, route, status)
+            http_duration.observe(elapsed, method, route)
+            request_db_queries.observe(stats.queries, method, route)
+            request_db_duration.observe(stats.db_seconds, method, route)
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    elapsed = time.perf_counter() - context._metrics_started
+    db_queries.inc()
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        db_slow_queries.inc()
+        route = stats.route if stats is not None else "-"
+        if SLOW_QUERY_LOG_PARAMETERS:
+            slow_query_logger.warning(
+                "Медленный запрос %.1f мс (маршрут %s): %s; параметры: %.*s",
+                elapsed * 1000,
+                route,
+                statement,
+                SLOW_QUERY_MAX_PARAMS,
+                repr(parameters),
+            )
+        else:
+            slow_query_logger.warning(
+                "Медленный запрос %.1f мс (маршрут %s): %s",
+                elapsed * 1000,
+                route,
+                statement,
+            )
+
+
+def instrument_engine(engine):
+    """
+    Подписать сбор метрик на выполнение SQL-запросов движка.
+    Аргументы:
+        engine: Синхронный движок (для асинхронного - его sync_engine)
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _pool_metrics():
+    """Строки метрик пулов соединений."""
+    lines = []
+    gauges = (
+        ("in_use", "db_pool_connections_in_use", "Занятые соединения"),
+        ("idle", "db_pool_connections_idle", "Свободные соединения"),
+        ("overflow", "db_pool_overflow", "Соединения сверх pool_size"),
+    )
+    pools = [(name, stats.snapshot()) for name, stats in active_pool_stats()]
+    for key, name, description in gauges:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} gauge")
+        for pool, snapshot in pools:
+            if key in snapshot:
+                lines.append(f'{name}{{pool="{pool}"}} {snapshot[key]}')
+    lines.append("# HELP db_pool_timeouts_total Превышения pool_timeout")
+    lines.append("# TYPE db_pool_timeouts_total counter")
+    for pool, snapshot in pools:
+        lines.append(
+            f'db_pool_timeouts_total{{pool="{pool}"}} {snapshot["timeouts"]}'
+        )
+    return lines
+
+
+registry.add_collector(_pool_metrics)
@@ -0,0 +1,374 @@
+"""
+Профилирование обработчиков и захват планов медленных SQL-запросов.
+
+Обе возможности включаются переменными окружения; без них обработчики
+маршрутов не оборачиваются и обработчики событий движка не подключаются,
+поэтому в обычном режиме накладных расходов нет.
+
+Профилирование (PROFILE_SAMPLE_RATE > 0 или задан PROFILE_DEBUG_TOKEN):
+обработчик маршрута (route.dependant.call) выполняется под cProfile для
+доли PROFILE_SAMPLE_RATE запросов и для запросов с заголовком
+X-Debug-Profile: <PROFILE_DEBUG_TOKEN>. Профили суммируются по маршруту
+(метод и шаблон пути) и выдаются /diagnostics/profiles в формате pstats
+или текстом. Одновременно профилируется один обработчик; асинхронный
+обработчик профилируется вместе с корутинами, выполнявшимися в цикле
+событий в это же время.
+
+Планы запросов (EXPLAIN_SLOW_QUERIES=true): для SQL-запроса дольше
+EXPLAIN_THRESHOLD_MS тем же DBAPI-соединением выполняется EXPLAIN (на
+SQLite - EXPLAIN QUERY PLAN, на PostgreSQL - в точке сохранения, чтобы
+ошибка не прерывала транзакцию запроса). EXPLAIN ANALYZE выполняет запрос
+повторно, поэтому при EXPLAIN_ANALYZE=true он используется только на
+PostgreSQL и только для SELECT без блокировок. Один и тот же запрос
+маршрута захватывается не чаще раза в EXPLAIN_INTERVAL секунд; последние
+EXPLAIN_HISTORY планов вместе с маршрутом доступны по
+/diagnostics/explains.
+"""
+
+import asyncio
+import cProfile
+import functools
+import hmac
+import io
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+from app.middleware.metrics import SLOW_QUERY_THRESHOLD_MS, current_request
+from app.utils.metrics import Counter, registry
+
+# Доля профилируемых запросов (0 - только по заголовку)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+# Токен заголовка X-Debug-Profile (не задан - заголовок не действует)
+PROFILE_DEBUG_TOKEN = os.getenv("PROFILE_DEBUG_TOKEN")
+PROFILE_HEADER = b"x-debug-profile"
+
+PROFILING_ENABLED = PROFILE_SAMPLE_RATE > 0 or bool(PROFILE_DEBUG_TOKEN)
+
+# Захват планов медленных SQL-запросов
+EXPLAIN_SLOW_QUERIES = os.getenv("EXPLAIN_SLOW_QUERIES", "false").lower() in (
+    "1", "true", "yes"
+)
+EXPLAIN_THRESHOLD_MS = float(
+    os.getenv("EXPLAIN_THRESHOLD_MS", str(SLOW_QUERY_THRESHOLD_MS))
+)
+EXPLAIN_ANALYZE = os.getenv("EXPLAIN_ANALYZE", "false").lower() in (
+    "1", "true", "yes"
+)
+
+# Как часто захватывать план одного и того же запроса (в секундах)
+EXPLAIN_INTERVAL = float(os.getenv("EXPLAIN_INTERVAL", "60"))
+
+# Сколько последних планов хранить
+EXPLAIN_HISTORY = int(os.getenv("EXPLAIN_HISTORY", "100"))
+
+# Инструкции, для которых строится план
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+# Признаки запросов, которые нельзя выполнять повторно через ANALYZE
+UNSAFE_TO_ANALYZE = (
+    "FOR UPDATE", "FOR SHARE", "FOR NO KEY", "PG_ADVISORY", "NEXTVAL",
+)
+
+profiled_requests = registry.register(Counter(
+    "profiled_requests_total",
+    "Запросы, обработчик которых выполнен под профилировщиком",
+    ("method", "route"),
+    locked=True,
+))
+captured_plans = registry.register(Counter(
+    "db_query_plans_captured_total",
+    "Захваченные планы медленных SQL-запросов",
+    locked=True,
+))
+
+
+class ProfileStore:
+    """Суммарные профили обработчиков по маршрутам."""
+
+    def __init__(self):
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def add(self, method: str, route: str, profiler: cProfile.Profile):
+        """Добавить профиль одного запроса к профилю маршрута."""
+        stats = pstats.Stats(profiler)
+        with self._lock:
+            entry = self._profiles.get((method, route))
+            if entry is None:
+                self._profiles[(method, route)] = [1, stats]
+            else:
+                entry[0] += 1
+                entry[1].add(stats)
+
+    def summary(self) -> list:
+        """Маршруты с количеством профилей и суммарным временем."""
+        with self._lock:
+            return [
+                {
+                    "method": method,
+                    "route": route,
+                    "requests": requests,
+                    "total_seconds": round(stats.total_tt, 6),
+                }
+                for (method, route), (requests, stats)
+                in sorted(self._profiles.items())
+            ]
+
+    def dump(self, method: str, route: str):
+        """Профиль маршрута в формате pstats (marshal) или None."""
+        with self._lock:
+            entry = self._profiles.get((method, route))
+            return marshal.dumps(entry[1].stats) if entry else None
+
+    def text(
+        self, method: str, route: str, sort: str = "cumulative",
+        limit: int = 40,
+    ):
+        """Профиль маршрута текстом (самые затратные функции) или None."""
+        output = io.StringIO()
+        with self._lock:
+            entry = self._profiles.get((method, route))
+            if entry is None:
+                return None
+            stats = pstats.Stats(stream=output)
+            stats.add(entry[1])
+        stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+class ExplainLog:
+    """
+    Последние планы медленных SQL-запросов.
+
+    Аргументы:
+        history: Сколько планов хранить
+        interval: Как часто захватывать план одного запроса (в секундах)
+    """
+
+    def __init__(
+        self, history: int = EXPLAIN_HISTORY,
+        interval: float = EXPLAIN_INTERVAL,
+    ):
+        self.interval = interval
+        self._entries = deque(maxlen=history)
+        self._captured_at = {}
+        self._lock = threading.Lock()
+
+    def due(self, key) -> bool:
+        """Пора ли захватить план запроса (и отметить захват)."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._captured_at.get(key, -self.interval) < (
+                self.interval
+            ):
+                return False
+            if len(self._captured_at) >= 10 * self._entries.maxlen:
+                self._captured_at.clear()
+            self._captured_at[key] = now
+            return True
+
+    def add(self, entry: dict):
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self) -> list:
+        """Планы от новых к старым."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._captured_at.clear()
+
+
+profile_store = ProfileStore()
+explain_log = ExplainLog()
+
+# Одновременно профилируется один обработчик
+_profile_lock = threading.Lock()
+
+
+def debug_token_valid(token) -> bool:
+    """
+    Совпадает ли значение заголовка X-Debug-Profile с PROFILE_DEBUG_TOKEN.
+    Аргументы:
+        token: Значение заголовка (str, bytes или None)
+    Возвращает:
+        bool: False, если токен не настроен или не передан
+    """
+    if not PROFILE_DEBUG_TOKEN or token is None:
+        return False
+    if isinstance(token, str):
+        token = token.encode()
+    return hmac.compare_digest(token, PROFILE_DEBUG_TOKEN.encode())
+
+
+def should_profile() -> bool:
+    """Профилировать ли текущий запрос."""
+    stats = current_request.get()
+    if stats is not None and debug_token_valid(
+        dict(stats.scope["headers"]).get(PROFILE_HEADER)
+    ):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _profiled(method: str, path: str, call):
+    """Обернуть обработчик маршрута профилировщиком."""
+    def finish(profiler):
+        profile_store.add(method, path, profiler)
+        profiled_requests.inc(method, path)
+
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def profiled_coroutine(**values):
+            if not should_profile() or not _profile_lock.acquire(False):
+                return await call(**values)
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                return await call(**values)
+            finally:
+                profiler.disable()
+                _profile_lock.release()
+                finish(profiler)
+
+        return profiled_coroutine
+
+    @functools.wraps(call)
+    def profiled(**values):
+        if not should_profile() or not _profile_lock.acquire(False):
+            return call(**values)
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(call, **values)
+        finally:
+            _profile_lock.release()
+            finish(profiler)
+
+    return profiled
+
+
+def profile_routes(app):
+    """
+    Обернуть обработчики маршрутов приложения профилировщиком.
+    Без PROFILE_SAMPLE_RATE и PROFILE_DEBUG_TOKEN ничего не делает.
+    Аргументы:
+        app: Приложение FastAPI (после подключения всех роутеров)
+    """
+    if not PROFILING_ENABLED:
+        return
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            method = ",".join(sorted(route.methods))
+            route.dependant.call = _profiled(
+                method, route.path, route.dependant.call
+            )
+
+
+def _analyzable(statement: str) -> bool:
+    """Можно ли выполнить запрос повторно через EXPLAIN ANALYZE."""
+    upper = statement.lstrip().upper()
+    return upper.startswith("SELECT") and not any(
+        marker in upper for marker in UNSAFE_TO_ANALYZE
+    )
+
+
+def explain(conn, statement: str, parameters):
+    """
+    Получить план запроса через DBAPI-соединение запроса.
+    Аргументы:
+        conn: Соединение SQLAlchemy
+        statement: Текст запроса в формате DBAPI
+        parameters: Параметры запроса
+    Возвращает:
+        tuple: (текст плана, выполнялся ли ANALYZE)
+    """
+    dialect = conn.dialect.name
+    analyze = (
+        EXPLAIN_ANALYZE and dialect == "postgresql" and _analyzable(statement)
+    )
+    if dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif analyze:
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+    else:
+        prefix = "EXPLAIN "
+    savepoint = dialect == "postgresql"
+    cursor = conn.connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT explain_capture")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT explain_capture")
+            raise
+        if savepoint:
+            cursor.execute("RELEASE SAVEPOINT explain_capture")
+    finally:
+        cursor.close()
+    return "\n".join(str(row[-1]) for row in rows), analyze
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    context._explain_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    elapsed_ms = (time.perf_counter() - context._explain_started) * 1000
+    if elapsed_ms < EXPLAIN_THRESHOLD_MS or executemany:
+        return
+    if not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return
+    stats = current_request.get()
+    method = stats.scope["method"] if stats is not None else "-"
+    route = stats.route if stats is not None else "-"
+    if not explain_log.due((method, route, statement)):
+        return
+    entry = {
+        "captured_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "method": method,
+        "route": route,
+        "duration_ms": round(elapsed_ms, 3),
+        "statement": statement,
+    }
+    try:
+        entry["plan"], entry["analyze"] = explain(conn, statement, parameters)
+    except Exception as error:
+        entry["error"] = repr(error)
+    captured_plans.inc()
+    explain_log.add(entry)
+
+
+def capture_slow_plans(engine):
+    """
+    Подписать захват планов медленных запросов на движок.
+    Без EXPLAIN_SLOW_QUERIES ничего не делает.
+    Аргументы:
+        engine: Синхронный движок (для асинхронного - его sync_engine)
+    """
+    if not EXPLAIN_SLOW_QUERIES:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
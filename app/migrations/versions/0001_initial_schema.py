@@ -0,0 +1,52 @@
+"""initial schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'tables',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('seats', sa.Integer(), nullable=False),
+        sa.Column('location', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_tables_id', 'tables', ['id'])
+    op.create_index('ix_tables_name', 'tables', ['name'], unique=True)
+    op.create_table(
+        'reservations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('customer_name', sa.String(), nullable=False),
+        sa.Column('table_id', sa.Integer(), nullable=False),
+        sa.Column('reservation_time', sa.DateTime(), nullable=False),
+        sa.Column('duration_minutes', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['table_id'], ['tables.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_reservations_id', 'reservations', ['id'])
+    op.create_index(
+        'ix_reservations_customer_name', 'reservations', ['customer_name']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reservations_customer_name', table_name='reservations')
+    op.drop_index('ix_reservations_id', table_name='reservations')
+    op.drop_table('reservations')
+    op.drop_index('ix_tables_name', table_name='tables')
+    op.drop_index('ix_tables_id', table_name='tables')
+    op.drop_table('tables')
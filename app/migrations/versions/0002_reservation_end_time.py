@@ -0,0 +1,98 @@
+"""reservation end_time and composite index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:30:00
+
+"""
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# Размер пачки при заполнении end_time на диалектах без SQL-выражения
+BACKFILL_BATCH_SIZE = 10000
+
+
+def _backfill_end_time(connection):
+    """Заполнить end_time для уже существующих броней."""
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        connection.execute(sa.text(
+            "UPDATE reservations "
+            "SET end_time = reservation_time"
+            " + duration_minutes * INTERVAL '1 minute' "
+            "WHERE end_time IS NULL"
+        ))
+    elif dialect == 'sqlite':
+        # Дробная часть секунд при сдвиге на целые минуты не меняется,
+        # поэтому переносим ее из исходного значения как есть.
+        connection.execute(sa.text(
+            "UPDATE reservations "
+            "SET end_time = strftime('%Y-%m-%d %H:%M:%S', reservation_time,"
+            " '+' || duration_minutes || ' minutes')"
+            " || substr(reservation_time, 20) "
+            "WHERE end_time IS NULL"
+        ))
+    else:
+        reservations = sa.table(
+            'reservations',
+            sa.column('id', sa.Integer),
+            sa.column('reservation_time', sa.DateTime),
+            sa.column('duration_minutes', sa.Integer),
+            sa.column('end_time', sa.DateTime),
+        )
+        while True:
+            rows = connection.execute(
+                sa.select(
+                    reservations.c.id,
+                    reservations.c.reservation_time,
+                    reservations.c.duration_minutes,
+                )
+                .where(reservations.c.end_time.is_(None))
+                .limit(BACKFILL_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            connection.execute(
+                reservations.update()
+                .where(reservations.c.id == sa.bindparam('row_id'))
+                .values(end_time=sa.bindparam('row_end_time')),
+                [
+                    {
+                        'row_id': row.id,
+                        'row_end_time': row.reservation_time
+                        + timedelta(minutes=row.duration_minutes),
+                    }
+                    for row in rows
+                ],
+            )
+
+
+def upgrade() -> None:
+    op.add_column(
+        'reservations', sa.Column('end_time', sa.DateTime(), nullable=True)
+    )
+    _backfill_end_time(op.get_bind())
+    with op.batch_alter_table('reservations') as batch_op:
+        batch_op.alter_column(
+            'end_time', existing_type=sa.DateTime(), nullable=False
+        )
+    op.create_index(
+        'ix_reservations_table_time',
+        'reservations',
+        ['table_id', 'reservation_time', 'end_time'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reservations_table_time', table_name='reservations')
+    with op.batch_alter_table('reservations') as batch_op:
+        batch_op.drop_column('end_time')
@@ -0,0 +1,48 @@
+"""reservation list ordering and filter indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_reservations_time_id',
+        'reservations',
+        ['reservation_time', 'id'],
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        # Индекс с varchar_pattern_ops обслуживает LIKE по префиксу
+        # независимо от правил сортировки базы.
+        op.drop_index(
+            'ix_reservations_customer_name', table_name='reservations'
+        )
+        op.create_index(
+            'ix_reservations_customer_name',
+            'reservations',
+            ['customer_name'],
+            postgresql_ops={'customer_name': 'varchar_pattern_ops'},
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index(
+            'ix_reservations_customer_name', table_name='reservations'
+        )
+        op.create_index(
+            'ix_reservations_customer_name',
+            'reservations',
+            ['customer_name'],
+        )
+    op.drop_index('ix_reservations_time_id', table_name='reservations')
@@ -0,0 +1,30 @@
+"""catalog versions
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 11:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    catalog_versions = op.create_table(
+        'catalog_versions',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.bulk_insert(catalog_versions, [{'name': 'tables', 'version': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('catalog_versions')
@@ -0,0 +1,51 @@
+"""reservations archive
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reservations_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('customer_name', sa.String(), nullable=False),
+        sa.Column('table_id', sa.Integer(), nullable=False),
+        sa.Column('reservation_time', sa.DateTime(), nullable=False),
+        sa.Column('duration_minutes', sa.Integer(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_reservations_archive_table_time',
+        'reservations_archive',
+        ['table_id', 'reservation_time'],
+    )
+    op.create_index(
+        'ix_reservations_archive_time_id',
+        'reservations_archive',
+        ['reservation_time', 'id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_reservations_archive_time_id', table_name='reservations_archive'
+    )
+    op.drop_index(
+        'ix_reservations_archive_table_time',
+        table_name='reservations_archive',
+    )
+    op.drop_table('reservations_archive')
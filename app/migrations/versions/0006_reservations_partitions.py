@@ -0,0 +1,131 @@
+"""range-partition reservations by reservation_time (PostgreSQL)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 12:30:00
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# Сколько месяцев вперед от текущего создать партиций сразу
+# (дальше их создает приложение при запуске)
+PARTITION_MONTHS_AHEAD = 3
+
+# Индексы таблицы броней (кроме первичного ключа)
+INDEXES = (
+    ('ix_reservations_id', 'id'),
+    ('ix_reservations_customer_name', 'customer_name varchar_pattern_ops'),
+    (
+        'ix_reservations_table_time',
+        'table_id, reservation_time, end_time',
+    ),
+    ('ix_reservations_time_id', 'reservation_time, id'),
+)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_table(name: str, partitioned: bool):
+    """Создать таблицу броней со столбцами модели Reservation."""
+    # Первичный ключ партиционированной таблицы обязан включать ключ
+    # партиционирования
+    primary_key = 'id, reservation_time' if partitioned else 'id'
+    suffix = ' PARTITION BY RANGE (reservation_time)' if partitioned else ''
+    op.execute(
+        f"CREATE TABLE {name} ("
+        "id INTEGER NOT NULL DEFAULT nextval('reservations_id_seq'), "
+        "customer_name VARCHAR NOT NULL, "
+        "table_id INTEGER NOT NULL REFERENCES tables (id), "
+        "reservation_time TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        "duration_minutes INTEGER NOT NULL, "
+        "end_time TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        f"CONSTRAINT reservations_pkey PRIMARY KEY ({primary_key})"
+        f"){suffix}"
+    )
+
+
+def _replace_table(partitioned: bool):
+    """
+    Переложить брони в новую таблицу того же имени.
+    Последовательность ID сохраняется, поэтому новые брони продолжают
+    нумерацию старых.
+    """
+    old_name = (
+        'reservations_unpartitioned' if partitioned
+        else 'reservations_partitioned'
+    )
+    op.execute(f"ALTER TABLE reservations RENAME TO {old_name}")
+    op.execute(
+        f"ALTER TABLE {old_name} "
+        f"RENAME CONSTRAINT reservations_pkey TO {old_name}_pkey"
+    )
+    for index_name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
+    op.execute("ALTER SEQUENCE reservations_id_seq OWNED BY NONE")
+    _create_table('reservations', partitioned)
+    op.execute("ALTER SEQUENCE reservations_id_seq OWNED BY reservations.id")
+    if partitioned:
+        _create_partitions()
+    op.execute(
+        "INSERT INTO reservations "
+        "(id, customer_name, table_id, reservation_time, duration_minutes, "
+        "end_time) "
+        "SELECT id, customer_name, table_id, reservation_time, "
+        f"duration_minutes, end_time FROM {old_name}"
+    )
+    op.execute(f"DROP TABLE {old_name} CASCADE")
+    # На партиционированной таблице индексы создаются на каждой партиции
+    for index_name, columns in INDEXES:
+        op.execute(f"CREATE INDEX {index_name} ON reservations ({columns})")
+
+
+def _create_partitions():
+    """Создать месячные партиции под имеющиеся и ближайшие брони."""
+    first, last = op.get_bind().execute(sa.text(
+        "SELECT MIN(reservation_time), MAX(reservation_time) "
+        "FROM reservations_unpartitioned"
+    )).one()
+    current = date.today().replace(day=1)
+    month = min(first.date().replace(day=1), current) if first else current
+    until = _add_months(current, PARTITION_MONTHS_AHEAD)
+    if last is not None:
+        until = max(until, last.date().replace(day=1))
+    while month <= until:
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE reservations_p{month:%Y%m} "
+            "PARTITION OF reservations "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') "
+            f"TO ('{following:%Y-%m-%d}')"
+        )
+        month = following
+    # Брони за пределами созданных партиций (если приложение не успело
+    # создать очередную) попадают сюда, а не в ошибку вставки
+    op.execute(
+        "CREATE TABLE reservations_default PARTITION OF reservations DEFAULT"
+    )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _replace_table(partitioned=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _replace_table(partitioned=False)
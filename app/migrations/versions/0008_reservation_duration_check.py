@@ -0,0 +1,100 @@
+"""limit reservation duration to 24 hours
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 18:00:00
+
+"""
+import logging
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# Совпадает с MAX_DURATION_MINUTES из app.schemas.reservation: проверка
+# конфликтов ищет пересекающие брони в окне [начало - 24 ч, конец)
+MAX_DURATION_MINUTES = 24 * 60
+
+CONSTRAINT = 'ck_reservations_duration'
+CONDITION = (
+    f'duration_minutes > 0 AND duration_minutes <= {MAX_DURATION_MINUTES}'
+)
+# На PostgreSQL ограничивается и end_time, по которому ищутся пересечения
+END_CONDITION = (
+    f"end_time <= reservation_time + interval '{MAX_DURATION_MINUTES} minutes'"
+)
+
+
+def _clamp_long_reservations():
+    """
+    Сократить до 24 часов брони, записанные до ограничения (импорт или
+    прямые вставки): иначе они не попадают в окно проверки конфликтов.
+    """
+    bind = op.get_bind()
+    reservations = sa.table(
+        'reservations',
+        sa.column('id', sa.Integer),
+        sa.column('reservation_time', sa.DateTime),
+        sa.column('duration_minutes', sa.Integer),
+        sa.column('end_time', sa.DateTime),
+    )
+    too_long = reservations.c.duration_minutes > MAX_DURATION_MINUTES
+    if bind.dialect.name == 'postgresql':
+        too_long = sa.or_(too_long, sa.not_(sa.text(END_CONDITION)))
+    rows = bind.execute(
+        sa.select(reservations.c.id, reservations.c.reservation_time)
+        .where(too_long)
+    ).all()
+    if not rows:
+        return
+    logger.warning(
+        "Брони длиннее %s минут сокращены до этой длительности: %s",
+        MAX_DURATION_MINUTES, ", ".join(str(row.id) for row in rows),
+    )
+    bind.execute(
+        reservations.update()
+        .where(reservations.c.id == sa.bindparam('row_id'))
+        .values(
+            duration_minutes=MAX_DURATION_MINUTES,
+            end_time=sa.bindparam('row_end'),
+        ),
+        [
+            dict(
+                row_id=row.id,
+                row_end=row.reservation_time
+                + timedelta(minutes=MAX_DURATION_MINUTES),
+            )
+            for row in rows
+        ],
+    )
+
+
+def upgrade() -> None:
+    _clamp_long_reservations()
+    if op.get_bind().dialect.name == 'postgresql':
+        # На партиционированной таблице ограничение наследуют все партиции
+        op.execute(
+            f"ALTER TABLE reservations ADD CONSTRAINT {CONSTRAINT} "
+            f"CHECK ({CONDITION} AND {END_CONDITION})"
+        )
+        return
+    # SQLite не добавляет ограничения к существующей таблице
+    with op.batch_alter_table('reservations') as batch:
+        batch.create_check_constraint(CONSTRAINT, CONDITION)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(f"ALTER TABLE reservations DROP CONSTRAINT {CONSTRAINT}")
+        return
+    with op.batch_alter_table('reservations') as batch:
+        batch.drop_constraint(CONSTRAINT, type_='check')
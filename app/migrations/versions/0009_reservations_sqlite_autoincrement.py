@@ -0,0 +1,58 @@
+"""never reuse reservation ids on SQLite
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 19:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def _rebuild(autoincrement: bool):
+    """Пересоздать таблицу броней SQLite с AUTOINCREMENT или без него."""
+    with op.batch_alter_table(
+        'reservations',
+        recreate='always',
+        table_kwargs={'sqlite_autoincrement': autoincrement},
+    ):
+        pass
+
+
+def upgrade() -> None:
+    # На PostgreSQL ID выдает последовательность, которая не повторяется
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(autoincrement=True)
+    # Новые ID должны быть больше ID, уже перенесенных в архив
+    bind = op.get_bind()
+    last_id = bind.execute(sa.text(
+        "SELECT MAX(id) FROM ("
+        "SELECT MAX(id) AS id FROM reservations "
+        "UNION ALL SELECT MAX(id) FROM reservations_archive)"
+    )).scalar()
+    if last_id is None:
+        return
+    bind.execute(sa.text(
+        "DELETE FROM sqlite_sequence WHERE name = 'reservations'"
+    ))
+    bind.execute(
+        sa.text(
+            "INSERT INTO sqlite_sequence (name, seq) "
+            "VALUES ('reservations', :last_id)"
+        ),
+        {'last_id': last_id},
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(autoincrement=False)
@@ -0,0 +1,29 @@
+"""idempotency key claim lease
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 20:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Незавершенные захваты без claimed_at считаются брошенными
+    op.add_column(
+        'idempotency_keys',
+        sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('idempotency_keys') as batch:
+        batch.drop_column('claimed_at')
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String
+
+from app.database import Base
+
+
+class CatalogVersion(Base):
+    """
+    Версия справочника, общая для всех воркеров.
+
+    Атрибуты:
+        name (str): Название справочника (например, "tables")
+        version (int): Номер версии, увеличивается при каждом изменении
+    """
+    __tablename__ = "catalog_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
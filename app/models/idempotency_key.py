@@ -0,0 +1,28 @@
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, Text
+
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Ответ на запрос с заголовком Idempotency-Key, общий для всех воркеров.
+
+    Атрибуты:
+        key (str): SHA-256 метода, пути и значения заголовка
+        fingerprint (str): SHA-256 запроса (метод, путь, параметры, тело)
+        status_code (int): Статус ответа (None - запрос еще выполняется)
+        headers (str): Заголовки ответа в JSON
+        body (bytes): Тело ответа
+        created_at (datetime): Момент первого запроса (UTC)
+        claimed_at (datetime): Момент захвата или последнего продления
+            аренды ключа выполняющим запрос воркером (UTC)
+    """
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    headers = Column(Text, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+    claimed_at = Column(DateTime, nullable=True)
@@ -1,6 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from datetime import timedelta
+
+from sqlalchemy import (
+    CheckConstraint, Column, Integer, String, DateTime, ForeignKey, Index,
+)
 
 from app.database import Base
+from app.schemas.reservation import MAX_DURATION_MINUTES
+
+
+def _default_end_time(context):
+    """Вычислить время окончания брони при вставке строки."""
+    params = context.get_current_parameters()
+    return params["reservation_time"] + timedelta(
+        minutes=params["duration_minutes"]
+    )
 
 
 class Reservation(Base):
@@ -13,11 +26,43 @@ class Reservation(Base):
         table_id (int): ID забронированного столика
         reservation_time (DateTime): Время бронирования
         duration_minutes (int): Длительность брони в минутах
+        end_time (DateTime): Время окончания брони (заполняется при вставке)
+
+    На PostgreSQL таблица партиционирована по месяцам reservation_time
+    (миграция 0006), и первичный ключ в базе - (id, reservation_time);
+    для ORM идентификатором остается id. Прошедшие брони переносятся
+    в reservations_archive (см. ReservationArchive). Длительность брони
+    ограничена MAX_DURATION_MINUTES (миграция 0008): на этом пределе
+    построено окно поиска пересекающих броней.
     """
     __tablename__ = "reservations"
+    __table_args__ = (
+        Index(
+            "ix_reservations_table_time",
+            "table_id", "reservation_time", "end_time",
+        ),
+        # Порядок выдачи списка броней и курсор страниц
+        Index("ix_reservations_time_id", "reservation_time", "id"),
+        # Поиск по префиксу имени (LIKE 'abc%') на PostgreSQL
+        Index(
+            "ix_reservations_customer_name",
+            "customer_name",
+            postgresql_ops={"customer_name": "varchar_pattern_ops"},
+        ),
+        CheckConstraint(
+            "duration_minutes > 0 AND "
+            f"duration_minutes <= {MAX_DURATION_MINUTES}",
+            name="ck_reservations_duration",
+        ),
+        # SQLite без AUTOINCREMENT повторно выдает ID удаленных последними
+        # строк, а ID перенесенных в архив броней должны оставаться
+        # уникальными (миграция 0009)
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    customer_name = Column(String, index=True, nullable=False)
+    customer_name = Column(String, nullable=False)
     table_id = Column(Integer, ForeignKey("tables.id"), nullable=False)
     reservation_time = Column(DateTime, nullable=False)
     duration_minutes = Column(Integer, nullable=False)
+    end_time = Column(DateTime, nullable=False, default=_default_end_time)
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String
+
+from app.database import Base
+
+
+class ReservationArchive(Base):
+    """
+    Архивная бронь: прошедшая бронь, перенесенная из reservations.
+
+    Атрибуты:
+        id (int): ID брони в таблице reservations
+        customer_name (str): Имя клиента
+        table_id (int): ID столика (без внешнего ключа: столик мог быть
+            удален после переноса брони в архив)
+        reservation_time (DateTime): Время бронирования
+        duration_minutes (int): Длительность брони в минутах
+        end_time (DateTime): Время окончания брони
+        archived_at (DateTime): Время переноса в архив
+    """
+    __tablename__ = "reservations_archive"
+    __table_args__ = (
+        Index(
+            "ix_reservations_archive_table_time",
+            "table_id", "reservation_time",
+        ),
+        Index("ix_reservations_archive_time_id", "reservation_time", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    customer_name = Column(String, nullable=False)
+    table_id = Column(Integer, nullable=False)
+    reservation_time = Column(DateTime, nullable=False)
+    duration_minutes = Column(Integer, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, nullable=False)
@@ -0,0 +1,142 @@
+"""
+Асинхронные обработчики броней.
+
+Подключаются вместо синхронных из app.routers.reservations при
+DATABASE_ASYNC=true и работают через AsyncSession.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_read_db, get_async_write_db
+from app.routers.reservations import (
+    BULK_DELETE_FILTER_DETAIL,
+    CONFLICT_DETAIL,
+    page_response,
+)
+from app.schemas.reservation import (
+    Reservation,
+    ReservationBulkDeleteResult,
+    ReservationCreate,
+)
+from app.services.reservation_service import (
+    get_reservations_page_async,
+    create_reservation_async,
+    delete_reservation_async,
+    delete_reservations,
+)
+
+router = APIRouter(
+    prefix="/reservations",
+    tags=["Брони"],
+    responses={404: {"description": "Не найдено"}},
+)
+
+
+@router.get(
+    "/",
+    response_model=list[Reservation],
+    summary="Список всех броней",
+    description=(
+        "Получить список броней в порядке времени начала. Курсор следующей "
+        "страницы возвращается в заголовке X-Next-Cursor."
+    )
+)
+async def read_reservations(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = Query(None, alias="from"),
+    time_to: Optional[datetime] = Query(None, alias="to"),
+    customer_name: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Асинхронный вариант reservations.read_reservations."""
+    try:
+        body, next_cursor = await get_reservations_page_async(
+            db,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            table_id=table_id,
+            time_from=time_from,
+            time_to=time_to,
+            customer_name=customer_name,
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return page_response(body, next_cursor)
+
+
+@router.post(
+    "/",
+    response_model=Reservation,
+    status_code=201,
+    summary="Создать новую бронь",
+    description="Забронировать столик на указанное время.",
+    responses={
+        400: {"description": "Конфликт времени или ошибка валидации"}
+    }
+)
+async def create_new_reservation(
+    reservation: ReservationCreate,
+    db: AsyncSession = Depends(get_async_write_db)
+):
+    """Асинхронный вариант reservations.create_new_reservation."""
+    db_reservation = await create_reservation_async(
+        db=db, reservation=reservation
+    )
+    if db_reservation is None:
+        raise HTTPException(status_code=400, detail=CONFLICT_DETAIL)
+    return db_reservation
+
+
+@router.delete(
+    "/",
+    response_model=ReservationBulkDeleteResult,
+    summary="Отменить брони по фильтрам",
+    description=(
+        "Отменить все брони столика и/или с началом в интервале "
+        "[from, to). Брони удаляются пачками, ответ содержит их количество."
+    ),
+    responses={400: {"description": "Не задан ни один фильтр"}},
+)
+async def remove_reservations(
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = Query(None, alias="from"),
+    time_to: Optional[datetime] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_write_db)
+):
+    """Асинхронный вариант reservations.remove_reservations."""
+    if table_id is None and time_from is None and time_to is None:
+        raise HTTPException(status_code=400, detail=BULK_DELETE_FILTER_DETAIL)
+    deleted = await db.run_sync(
+        delete_reservations, table_id, time_from, time_to
+    )
+    return {"deleted": deleted}
+
+
+@router.delete(
+    "/{reservation_id}",
+    summary="Удалить бронь",
+    description="Отменить существующую бронь.",
+    responses={
+        200: {"description": "Бронь успешно отменена"},
+        404: {"description": "Бронь не найдена"}
+    }
+)
+async def remove_reservation(
+    reservation_id: int,
+    db: AsyncSession = Depends(get_async_write_db)
+):
+    """Асинхронный вариант reservations.remove_reservation."""
+    reservation = await delete_reservation_async(
+        db=db, reservation_id=reservation_id
+    )
+    if reservation is None:
+        raise HTTPException(status_code=404, detail="Бронь не найдена")
+    return {"message": "Бронь успешно отменена"}
@@ -0,0 +1,116 @@
+"""
+Асинхронные обработчики столиков.
+
+Подключаются вместо синхронных из app.routers.tables при DATABASE_ASYNC=true
+и работают через AsyncSession, не занимая поток пула на время запроса.
+"""
+
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db, get_async_read_db, get_async_write_db
+from app.routers.tables import catalog_response, removal_response
+from app.schemas.schedule import TableSchedule
+from app.schemas.table import Table, TableCreate, TableRemovalResult
+from app.services.schedule_service import schedule_cache
+from app.services.table_service import (
+    REMOVAL_REJECT,
+    create_table_async,
+)
+
+
+router = APIRouter(
+    prefix="/tables",
+    tags=["Столики"],
+    responses={404: {"description": "Не найдено"}},
+)
+
+
+@router.get(
+    "/",
+    response_model=list[Table],
+    summary="Список всех столиков",
+    description=(
+        "Получить список всех доступных столиков в ресторане. Ответ несет "
+        "ETag версии справочника; при совпадении If-None-Match "
+        "возвращается 304."
+    ),
+    responses={304: {"description": "Справочник не изменился"}}
+)
+async def read_tables(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Асинхронный вариант tables.read_tables."""
+    return await db.run_sync(
+        catalog_response, if_none_match, skip, limit, cursor
+    )
+
+
+@router.post(
+    "/",
+    response_model=Table,
+    status_code=201,
+    summary="Создать новый столик",
+    description="Добавить новый столик в ресторан."
+)
+async def create_new_table(
+    table: TableCreate,
+    db: AsyncSession = Depends(get_async_write_db)
+):
+    """Асинхронный вариант tables.create_new_table."""
+    return await create_table_async(db=db, table=table)
+
+
+@router.get(
+    "/{table_id}/schedule",
+    response_model=TableSchedule,
+    summary="Расписание столика на день",
+    description=(
+        "Получить брони столика, пересекающие день, и занятость слотов "
+        "дня. Расписание хранится в памяти и обновляется при создании и "
+        "удалении броней, поэтому частый опрос не нагружает базу."
+    ),
+    responses={404: {"description": "Столик не найден"}}
+)
+async def read_table_schedule(
+    table_id: int,
+    day: date = Query(..., alias="date", example="2023-12-31"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Асинхронный вариант tables.read_table_schedule."""
+    schedule = await db.run_sync(schedule_cache.get, table_id, day)
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Столик не найден")
+    return schedule
+
+
+@router.delete(
+    "/{table_id}",
+    response_model=TableRemovalResult,
+    summary="Удалить столик",
+    description=(
+        "Удалить столик из ресторана. Прошедшие брони столика переносятся "
+        "в архив. Будущие брони по умолчанию запрещают удаление; "
+        "mode=cancel отменяет их, mode=reassign пересаживает на другие "
+        "столики не меньшей вместимости."
+    ),
+    responses={
+        200: {"description": "Столик успешно удален"},
+        404: {"description": "Столик не найден"},
+        409: {"description": "У столика остались брони"},
+    }
+)
+async def remove_table(
+    table_id: int,
+    mode: Literal["reject", "cancel", "reassign"] = REMOVAL_REJECT,
+    db: AsyncSession = Depends(get_async_write_db)
+):
+    """Асинхронный вариант tables.remove_table."""
+    return await db.run_sync(removal_response, table_id, mode)
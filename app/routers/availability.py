@@ -0,0 +1,78 @@
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_read_db
+from app.schemas.availability import TableAvailability
+from app.schemas.table import Table
+from app.services.availability_service import (
+    find_available_tables,
+    find_free_slots,
+)
+
+router = APIRouter(
+    prefix="/availability",
+    tags=["Доступность"],
+)
+
+
+@router.get(
+    "",
+    response_model=list[Table],
+    summary="Свободные столики",
+    description=(
+        "Получить столики, которые вмещают компанию и свободны "
+        "на весь указанный интервал."
+    )
+)
+def read_available_tables(
+    party_size: int = Query(..., gt=0, example=4),
+    start: datetime = Query(..., example="2023-12-31T19:00:00"),
+    duration: int = Query(..., gt=0, le=24 * 60, example=90),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Получить свободные столики на интервал.
+    Параметры:
+        party_size: Количество гостей
+        start: Начало брони
+        duration: Длительность брони в минутах
+    Возвращает:
+        Список объектов Table от меньших к большим
+    """
+    return find_available_tables(db, party_size, start, duration)
+
+
+@router.get(
+    "/day",
+    response_model=list[TableAvailability],
+    summary="Свободные слоты на день",
+    description=(
+        "Получить для каждого подходящего столика время начала слотов, "
+        "с которых он свободен на указанную длительность."
+    )
+)
+def read_free_slots(
+    day: date = Query(..., alias="date", example="2023-12-31"),
+    party_size: int = Query(..., gt=0, example=4),
+    duration: int = Query(..., gt=0, le=24 * 60, example=90),
+    slot_minutes: int = Query(15, gt=0, le=24 * 60),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Получить свободные слоты столиков на день.
+    Параметры:
+        date: День
+        party_size: Количество гостей
+        duration: Длительность брони в минутах
+        slot_minutes: Шаг сетки слотов в минутах
+    Возвращает:
+        Список объектов TableAvailability
+    """
+    return [
+        TableAvailability(table=table, free_slots=slots)
+        for table, slots in find_free_slots(
+            db, day, party_size, duration, slot_minutes
+        )
+    ]
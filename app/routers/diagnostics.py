@@ -0,0 +1,205 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse
+
+from app.database import active_pool_stats
+from app.middleware.profiling import (
+    PROFILE_DEBUG_TOKEN,
+    debug_token_valid,
+    explain_log,
+    profile_store,
+)
+from app.utils.metrics import registry
+
+# Тип содержимого текстового формата Prometheus
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+router = APIRouter(
+    prefix="/diagnostics",
+    tags=["Диагностика"],
+)
+
+# Роутер метрик: Prometheus по умолчанию читает /metrics
+metrics_router = APIRouter(tags=["Диагностика"])
+
+# Ответы эндпоинтов, закрытых токеном отладки
+DEBUG_TOKEN_RESPONSES = {
+    403: {"description": "Неверный токен X-Debug-Profile"},
+    404: {"description": "PROFILE_DEBUG_TOKEN не настроен"},
+}
+
+
+def require_debug_token(
+    x_debug_profile: Optional[str] = Header(None),
+):
+    """
+    Пропустить запрос только с заголовком X-Debug-Profile, равным
+    PROFILE_DEBUG_TOKEN: профили и планы раскрывают SQL и пути кода,
+    статистика пула - нагрузку на базу.
+    Исключения:
+        HTTPException: 404 если токен не настроен, 403 если не совпал
+    """
+    if not PROFILE_DEBUG_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not debug_token_valid(x_debug_profile):
+        raise HTTPException(
+            status_code=403, detail="Неверный токен X-Debug-Profile"
+        )
+
+
+@metrics_router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Метрики Prometheus",
+    description=(
+        "Длительность, статусы и количество запросов по маршрутам, "
+        "количество и время SQL-запросов, состояние пула соединений."
+    )
+)
+async def read_metrics():
+    """
+    Получить метрики в текстовом формате Prometheus.
+    Возвращает:
+        Текст метрик
+    """
+    return PlainTextResponse(
+        registry.render(), media_type=PROMETHEUS_CONTENT_TYPE
+    )
+
+
+@router.get(
+    "/pool",
+    summary="Статистика пула соединений",
+    description=(
+        "Получить счетчики выдачи соединений, гистограмму ожидания "
+        "соединения и текущую заполненность пула."
+    ),
+    dependencies=[Depends(require_debug_token)],
+    responses=DEBUG_TOKEN_RESPONSES,
+)
+async def read_pool_stats():
+    """
+    Получить статистику пулов соединений.
+    Возвращает:
+        Словарь со статистикой синхронного пула и (если созданы)
+        асинхронного пула и пулов базы для чтения
+    """
+    return {name: stats.snapshot() for name, stats in active_pool_stats()}
+
+
+@router.get(
+    "/profiles",
+    summary="Профили обработчиков",
+    description=(
+        "Маршруты, для которых собраны профили (PROFILE_SAMPLE_RATE или "
+        "заголовок X-Debug-Profile), с количеством профилей и суммарным "
+        "временем."
+    ),
+    dependencies=[Depends(require_debug_token)],
+    responses=DEBUG_TOKEN_RESPONSES,
+)
+async def read_profiles():
+    """
+    Получить список собранных профилей.
+    Возвращает:
+        Список маршрутов с количеством профилей
+    """
+    return profile_store.summary()
+
+
+@router.get(
+    "/profiles/download",
+    summary="Скачать профиль маршрута",
+    description=(
+        "Суммарный профиль обработчика маршрута: файл pstats "
+        "(pstats.Stats(путь)) или текст с самыми затратными функциями."
+    ),
+    dependencies=[Depends(require_debug_token)],
+    responses={
+        **DEBUG_TOKEN_RESPONSES,
+        404: {"description": "Профиль не найден или токен не настроен"},
+    },
+)
+async def download_profile(
+    method: str = Query(..., example="POST"),
+    route: str = Query(..., example="/reservations/"),
+    profile_format: Literal["pstats", "text"] = Query(
+        "pstats", alias="format"
+    ),
+    sort: Literal["cumulative", "tottime", "calls"] = "cumulative",
+    limit: int = Query(40, gt=0, le=1000),
+):
+    """
+    Получить профиль маршрута.
+    Параметры:
+        method: Метод маршрута
+        route: Шаблон пути маршрута
+        format: pstats или text
+        sort: Сортировка текстового профиля
+        limit: Количество функций в текстовом профиле
+    Возвращает:
+        Файл pstats или текст профиля
+    Исключения:
+        HTTPException: 404 если профиль маршрута не собран
+    """
+    if profile_format == "text":
+        text = profile_store.text(method, route, sort, limit)
+        if text is None:
+            raise HTTPException(status_code=404, detail="Профиль не найден")
+        return PlainTextResponse(text)
+    dump = profile_store.dump(method, route)
+    if dump is None:
+        raise HTTPException(status_code=404, detail="Профиль не найден")
+    return Response(
+        dump,
+        media_type="application/octet-stream",
+        headers={
+            "Content-Disposition": 'attachment; filename="profile.pstats"'
+        },
+    )
+
+
+@router.delete(
+    "/profiles",
+    status_code=204,
+    summary="Сбросить профили",
+    dependencies=[Depends(require_debug_token)],
+    responses=DEBUG_TOKEN_RESPONSES,
+)
+async def clear_profiles():
+    """Удалить все собранные профили."""
+    profile_store.clear()
+    return Response(status_code=204)
+
+
+@router.get(
+    "/explains",
+    summary="Планы медленных SQL-запросов",
+    description=(
+        "Последние планы SQL-запросов дольше EXPLAIN_THRESHOLD_MS "
+        "(EXPLAIN_SLOW_QUERIES=true) с маршрутом, который их выполнил."
+    ),
+    dependencies=[Depends(require_debug_token)],
+    responses=DEBUG_TOKEN_RESPONSES,
+)
+async def read_explains():
+    """
+    Получить захваченные планы запросов.
+    Возвращает:
+        Список планов от новых к старым
+    """
+    return explain_log.entries()
+
+
+@router.delete(
+    "/explains",
+    status_code=204,
+    summary="Сбросить планы запросов",
+    dependencies=[Depends(require_debug_token)],
+    responses=DEBUG_TOKEN_RESPONSES,
+)
+async def clear_explains():
+    """Удалить захваченные планы запросов."""
+    explain_log.clear()
+    return Response(status_code=204)
@@ -1,15 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import (
+    APIRouter, Depends, File, HTTPException, Query, Request, Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.schemas.reservation import Reservation, ReservationCreate
+from app.database import get_read_db, get_write_db, read_session_factory
+from app.schemas.bulk_import import ImportResult
+from app.schemas.reservation import (
+    Reservation,
+    ReservationAutoBatchCreate,
+    ReservationAutoCreate,
+    ReservationBatchCreate,
+    ReservationBatchItemResult,
+    ReservationBatchResult,
+    ReservationBulkDeleteResult,
+    ReservationCreate,
+)
 from app.services.reservation_service import (
-    get_reservations,
+    get_reservations_page,
     create_reservation,
     delete_reservation,
-    check_reservation_conflict
+    delete_reservations,
+    create_reservations_batch,
+    iter_reservation_rows,
+    EXPORT_COLUMNS,
+)
+from app.services.allocation_service import (
+    NO_TABLE,
+    allocate_reservation,
+    allocate_reservations_batch,
+)
+from app.services.import_service import import_binary, import_reservations
+from app.utils.export import EXPORT_MEDIA_TYPES, csv_chunks, ndjson_chunks
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+CONFLICT_DETAIL = "Этот столик уже забронирован на выбранное время"
+BULK_DELETE_FILTER_DETAIL = (
+    "Укажите хотя бы один из фильтров table_id, from, to"
 )
 
+
+def page_response(body: bytes, next_cursor: Optional[str]) -> Response:
+    """Ответ со страницей списка в JSON и курсором следующей страницы."""
+    headers = {}
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(
+        content=body, media_type="application/json", headers=headers
+    )
+
+
+def batch_result(outcomes: list) -> ReservationBatchResult:
+    """Собрать результат пакета из пар (бронь или None, причина отказа)."""
+    results = [
+        ReservationBatchItemResult(
+            index=index,
+            accepted=db_reservation is not None,
+            reservation=db_reservation,
+            detail=detail,
+        )
+        for index, (db_reservation, detail) in enumerate(outcomes)
+    ]
+    accepted = sum(result.accepted for result in results)
+    return ReservationBatchResult(
+        accepted=accepted,
+        rejected=len(results) - accepted,
+        results=results,
+    )
+
+
 router = APIRouter(
     prefix="/reservations",
     tags=["Брони"],
@@ -21,22 +84,103 @@ router = APIRouter(
     "/",
     response_model=list[Reservation],
     summary="Список всех броней",
-    description="Получить список всех текущих и будущих броней."
+    description=(
+        "Получить список броней в порядке времени начала. Курсор следующей "
+        "страницы возвращается в заголовке X-Next-Cursor."
+    )
 )
 def read_reservations(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = Query(None, alias="from"),
+    time_to: Optional[datetime] = Query(None, alias="to"),
+    customer_name: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """
-    Получить список броней с пагинацией.
+    Получить список броней с пагинацией и фильтрами.
     Параметры:
         skip: Количество записей для пропуска
         limit: Максимальное количество возвращаемых записей
+        cursor: Курсор из заголовка X-Next-Cursor предыдущей страницы
+        table_id: Фильтр по столику
+        from: Начало брони не раньше указанного времени
+        to: Начало брони раньше указанного времени
+        customer_name: Префикс имени клиента
+    Возвращает:
+        JSON-список броней (схема Reservation), сериализованный без
+        промежуточных ORM-объектов
+    Исключения:
+        HTTPException: 400 если курсор некорректен
+    """
+    try:
+        body, next_cursor = get_reservations_page(
+            db,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            table_id=table_id,
+            time_from=time_from,
+            time_to=time_to,
+            customer_name=customer_name,
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return page_response(body, next_cursor)
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Выгрузить брони",
+    description=(
+        "Потоковая выгрузка броней в порядке времени начала в формате "
+        "NDJSON (одна бронь на строку) или CSV."
+    ),
+    responses={
+        200: {
+            "content": {
+                media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()
+            },
+            "description": "Брони в выбранном формате",
+        }
+    }
+)
+def export_reservations(
+    request: Request,
+    export_format: Literal["ndjson", "csv"] = Query(
+        "ndjson", alias="format"
+    ),
+    time_from: Optional[datetime] = Query(None, alias="from"),
+    time_to: Optional[datetime] = Query(None, alias="to"),
+):
+    """
+    Выгрузить брони потоком без загрузки всей выборки в память.
+    Параметры:
+        format: ndjson или csv
+        from: Начало брони не раньше указанного времени
+        to: Начало брони раньше указанного времени
     Возвращает:
-        Список объектов Reservation
+        Потоковый ответ с бронями
     """
-    return get_reservations(db, skip=skip, limit=limit)
+    rows = iter_reservation_rows(
+        time_from, time_to, session_factory=read_session_factory(request)
+    )
+    if export_format == "csv":
+        body = csv_chunks(EXPORT_COLUMNS, rows)
+    else:
+        body = ndjson_chunks(EXPORT_COLUMNS, rows)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="reservations.{export_format}"'
+            )
+        },
+    )
 
 
 @router.post(
@@ -51,10 +195,13 @@ def read_reservations(
 )
 def create_new_reservation(
     reservation: ReservationCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
-    Создать новую бронь после проверки на конфликты.
+    Создать новую бронь.
+    Конфликт сначала ищется в индексе интервалов в памяти, а решение
+    принимает create_reservation по базе: свободный слот проверяется под
+    блокировкой столика, отказ по индексу подтверждается чтением.
     Параметры:
         reservation: Данные бронирования
     Возвращает:
@@ -62,12 +209,172 @@ def create_new_reservation(
     Исключения:
         HTTPException: 400 если время уже занято или ошибка валидации
     """
-    if check_reservation_conflict(db, reservation):
-        raise HTTPException(
-            status_code=400,
-            detail="Этот столик уже забронирован на выбранное время"
+    db_reservation = create_reservation(db=db, reservation=reservation)
+    if db_reservation is None:
+        raise HTTPException(status_code=400, detail=CONFLICT_DETAIL)
+    return db_reservation
+
+
+@router.post(
+    "/batch",
+    response_model=ReservationBatchResult,
+    summary="Создать пакет броней",
+    description=(
+        "Забронировать несколько столиков одним запросом. Для каждой брони "
+        "возвращается, принята она или отклонена."
+    ),
+)
+def create_reservations_in_batch(
+    batch: ReservationBatchCreate,
+    db: Session = Depends(get_write_db)
+):
+    """
+    Создать пакет броней в одной транзакции.
+    Параметры:
+        batch: Брони и режим "все или ничего"
+    Возвращает:
+        Результат по каждой брони в порядке запроса
+    """
+    outcomes = create_reservations_batch(
+        db, batch.items, all_or_nothing=batch.all_or_nothing
+    )
+    return batch_result(outcomes)
+
+
+@router.post(
+    "/auto",
+    response_model=Reservation,
+    status_code=201,
+    summary="Создать бронь с выбором столика",
+    description=(
+        "Забронировать столик для компании: сервис выбирает самый "
+        "маленький подходящий столик, где бронь плотнее всего примыкает "
+        "к соседним."
+    ),
+    responses={
+        400: {"description": "Нет свободного столика для компании"}
+    }
+)
+def create_auto_reservation(
+    reservation: ReservationAutoCreate,
+    db: Session = Depends(get_write_db)
+):
+    """
+    Создать бронь на автоматически выбранный столик.
+    Параметры:
+        reservation: Имя клиента, количество гостей, время и длительность
+    Возвращает:
+        Созданный объект Reservation
+    Исключения:
+        HTTPException: 400 если свободного подходящего столика нет
+    """
+    db_reservation = allocate_reservation(db, reservation)
+    if db_reservation is None:
+        raise HTTPException(status_code=400, detail=NO_TABLE)
+    return db_reservation
+
+
+@router.post(
+    "/auto/batch",
+    response_model=ReservationBatchResult,
+    summary="Распределить пакет броней по столикам",
+    description=(
+        "Распределить заявки (например, на вечер) по столикам вместе: "
+        "сначала большие компании, затем остальные в порядке окончания. "
+        "Для каждой заявки возвращается, принята она или отклонена."
+    ),
+)
+def create_auto_reservations_in_batch(
+    batch: ReservationAutoBatchCreate,
+    db: Session = Depends(get_write_db)
+):
+    """
+    Создать пакет броней на автоматически выбранные столики.
+    Параметры:
+        batch: Заявки и режим "все или ничего"
+    Возвращает:
+        Результат по каждой заявке в порядке запроса
+    """
+    outcomes = allocate_reservations_batch(
+        db, batch.items, all_or_nothing=batch.all_or_nothing
+    )
+    return batch_result(outcomes)
+
+
+@router.post(
+    "/import",
+    response_model=ImportResult,
+    summary="Импортировать брони из файла",
+    description=(
+        "Загрузить брони из CSV (с заголовком) или NDJSON. Строки с "
+        "ошибками валидации, несуществующим столиком или пересечением "
+        "отклоняются и возвращаются с номерами строк, остальные "
+        "сохраняются."
+    ),
+    responses={400: {
+        "description": "Неизвестный формат файла или файл не в UTF-8"
+    }}
+)
+def import_reservations_file(
+    file: UploadFile = File(...),
+    import_format: Optional[Literal["csv", "ndjson"]] = Query(
+        None, alias="format"
+    ),
+    db: Session = Depends(get_write_db)
+):
+    """
+    Импортировать брони из загруженного файла.
+    Параметры:
+        file: Файл CSV или NDJSON
+        format: Формат файла (по умолчанию - по расширению)
+    Возвращает:
+        Количество сохраненных и отклоненных строк, отклоненные строки
+    Исключения:
+        HTTPException: 400 если формат файла не определен или файл
+            не в UTF-8 (ничего не сохраняется)
+    """
+    try:
+        report = import_binary(
+            db, import_reservations, file.file, file.filename, import_format
         )
-    return create_reservation(db=db, reservation=reservation)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return report.as_dict()
+
+
+@router.delete(
+    "/",
+    response_model=ReservationBulkDeleteResult,
+    summary="Отменить брони по фильтрам",
+    description=(
+        "Отменить все брони столика и/или с началом в интервале "
+        "[from, to). Брони удаляются пачками, ответ содержит их количество."
+    ),
+    responses={400: {"description": "Не задан ни один фильтр"}},
+)
+def remove_reservations(
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = Query(None, alias="from"),
+    time_to: Optional[datetime] = Query(None, alias="to"),
+    db: Session = Depends(get_write_db)
+):
+    """
+    Отменить брони, подходящие под фильтры.
+    Параметры:
+        table_id: Фильтр по столику
+        from: Начало брони не раньше указанного времени
+        to: Начало брони раньше указанного времени
+    Возвращает:
+        Количество отмененных броней
+    Исключения:
+        HTTPException: 400 если не задан ни один фильтр
+    """
+    if table_id is None and time_from is None and time_to is None:
+        raise HTTPException(status_code=400, detail=BULK_DELETE_FILTER_DETAIL)
+    deleted = delete_reservations(
+        db, table_id=table_id, time_from=time_from, time_to=time_to
+    )
+    return {"deleted": deleted}
 
 
 @router.delete(
@@ -79,7 +386,9 @@ def create_new_reservation(
         404: {"description": "Бронь не найдена"}
     }
 )
-def remove_reservation(reservation_id: int, db: Session = Depends(get_db)):
+def remove_reservation(
+    reservation_id: int, db: Session = Depends(get_write_db)
+):
     """
     Удалить бронь по ID.
     Параметры:
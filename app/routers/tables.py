@@ -1,9 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import (
+    APIRouter, Depends, File, Header, HTTPException, Query, Response,
+    UploadFile,
+)
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.schemas.table import Table, TableCreate
-from app.services.table_service import get_tables, create_table, delete_table
+from app.database import get_db, get_read_db, get_write_db
+from app.schemas.bulk_import import ImportResult
+from app.schemas.schedule import TableSchedule
+from app.schemas.table import Table, TableCreate, TableRemovalResult
+from app.services.import_service import import_binary, import_tables
+from app.services.schedule_service import schedule_cache
+from app.services.table_service import (
+    REMOVAL_CANCEL,
+    REMOVAL_REASSIGN,
+    REMOVAL_REJECT,
+    create_table,
+    delete_table_with_reservations,
+    get_tables_catalog_version,
+    get_tables_page,
+    tables_etag,
+)
+from app.utils.catalog_cache import parse_if_none_match
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 
 router = APIRouter(
@@ -13,23 +34,69 @@ router = APIRouter(
 )
 
 
+def catalog_response(
+    db: Session,
+    if_none_match: Optional[str],
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Response:
+    """
+    Собрать ответ со страницей справочника столиков.
+    Если клиент прислал актуальный ETag, возвращается 304 без обращения
+    к списку столиков и без сериализации.
+    Исключения:
+        HTTPException: 400 если курсор некорректен
+    """
+    etag = tables_etag(get_tables_catalog_version(db))
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in parse_if_none_match(if_none_match):
+        return Response(status_code=304, headers=headers)
+    try:
+        version, body, next_cursor = get_tables_page(
+            db, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    headers["ETag"] = tables_etag(version)
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(
+        content=body, media_type="application/json", headers=headers
+    )
+
+
 @router.get(
     "/",
     response_model=list[Table],
     summary="Список всех столиков",
-    description="Получить список всех доступных столиков в ресторане."
+    description=(
+        "Получить список всех доступных столиков в ресторане. Ответ несет "
+        "ETag версии справочника; при совпадении If-None-Match "
+        "возвращается 304."
+    ),
+    responses={304: {"description": "Справочник не изменился"}}
 )
-def read_tables(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_tables(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
+):
     """
     Получить список столиков с пагинацией.
     Параметры:
         skip: Количество записей для пропуска (для пагинации)
         limit: Максимальное количество возвращаемых записей
+        cursor: Курсор из заголовка X-Next-Cursor предыдущей страницы
+        If-None-Match: ETag ранее полученного ответа
     Возвращает:
         Список объектов Table
+    Исключения:
+        HTTPException: 400 если курсор некорректен
     """
-    tables = get_tables(db, skip=skip, limit=limit)
-    return tables
+    return catalog_response(db, if_none_match, skip, limit, cursor)
 
 
 @router.post(
@@ -39,7 +106,7 @@ def read_tables(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     summary="Создать новый столик",
     description="Добавить новый столик в ресторан."
 )
-def create_new_table(table: TableCreate, db: Session = Depends(get_db)):
+def create_new_table(table: TableCreate, db: Session = Depends(get_write_db)):
     """
     Создать новый столик.
     Параметры:
@@ -52,26 +119,145 @@ def create_new_table(table: TableCreate, db: Session = Depends(get_db)):
     return create_table(db=db, table=table)
 
 
+@router.post(
+    "/import",
+    response_model=ImportResult,
+    summary="Импортировать столики из файла",
+    description=(
+        "Загрузить столики из CSV (с заголовком) или NDJSON. Необязательная "
+        "колонка id сохраняет ID из прежней системы. Строки с ошибками и "
+        "повторяющимися названиями отклоняются с номерами строк."
+    ),
+    responses={400: {
+        "description": "Неизвестный формат файла или файл не в UTF-8"
+    }}
+)
+def import_tables_file(
+    file: UploadFile = File(...),
+    import_format: Optional[Literal["csv", "ndjson"]] = Query(
+        None, alias="format"
+    ),
+    db: Session = Depends(get_write_db)
+):
+    """
+    Импортировать столики из загруженного файла.
+    Параметры:
+        file: Файл CSV или NDJSON
+        format: Формат файла (по умолчанию - по расширению)
+    Возвращает:
+        Количество сохраненных и отклоненных строк, отклоненные строки
+    Исключения:
+        HTTPException: 400 если формат файла не определен или файл
+            не в UTF-8 (ничего не сохраняется)
+    """
+    try:
+        report = import_binary(
+            db, import_tables, file.file, file.filename, import_format
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return report.as_dict()
+
+
+@router.get(
+    "/{table_id}/schedule",
+    response_model=TableSchedule,
+    summary="Расписание столика на день",
+    description=(
+        "Получить брони столика, пересекающие день, и занятость слотов "
+        "дня. Расписание хранится в памяти и обновляется при создании и "
+        "удалении броней, поэтому частый опрос не нагружает базу."
+    ),
+    responses={404: {"description": "Столик не найден"}}
+)
+def read_table_schedule(
+    table_id: int,
+    day: date = Query(..., alias="date", example="2023-12-31"),
+    db: Session = Depends(get_db)
+):
+    """
+    Получить расписание столика на день.
+    Параметры:
+        table_id: ID столика
+        date: День
+    Возвращает:
+        Объект TableSchedule
+    Исключения:
+        HTTPException: 404 если столик не найден
+    """
+    schedule = schedule_cache.get(db, table_id, day)
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Столик не найден")
+    return schedule
+
+
+def removal_response(db: Session, table_id: int, mode: str) -> dict:
+    """
+    Удалить столик в заданном режиме и сформировать ответ.
+    Исключения:
+        HTTPException: 404 если столик не найден, 409 если у столика
+        остались брони
+    """
+    result = delete_table_with_reservations(db, table_id, mode)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Столик не найден")
+    if not result["deleted"]:
+        remaining = result["remaining"]
+        if mode == REMOVAL_REJECT:
+            detail = (
+                f"У столика есть будущие брони ({remaining}): укажите "
+                f"mode={REMOVAL_CANCEL} или mode={REMOVAL_REASSIGN}"
+            )
+        elif mode == REMOVAL_REASSIGN and not result["reassigned"]:
+            detail = (
+                f"Не удалось пересадить будущие брони ({remaining}) "
+                "на другие столики"
+            )
+        else:
+            detail = (
+                f"Во время удаления на столик появились брони "
+                f"({remaining}), повторите запрос"
+            )
+        raise HTTPException(status_code=409, detail=detail)
+    return dict(
+        message="Столик успешно удален",
+        cancelled=result["cancelled"],
+        reassigned=result["reassigned"],
+        archived=result["archived"],
+    )
+
+
 @router.delete(
     "/{table_id}",
+    response_model=TableRemovalResult,
     summary="Удалить столик",
-    description="Удалить столик из ресторана.",
+    description=(
+        "Удалить столик из ресторана. Прошедшие брони столика переносятся "
+        "в архив. Будущие брони по умолчанию запрещают удаление; "
+        "mode=cancel отменяет их, mode=reassign пересаживает на другие "
+        "столики не меньшей вместимости."
+    ),
     responses={
         200: {"description": "Столик успешно удален"},
-        404: {"description": "Столик не найден"}
+        404: {"description": "Столик не найден"},
+        409: {"description": "У столика остались брони"},
     }
 )
-def remove_table(table_id: int, db: Session = Depends(get_db)):
+def remove_table(
+    table_id: int,
+    mode: Literal["reject", "cancel", "reassign"] = REMOVAL_REJECT,
+    db: Session = Depends(get_write_db)
+):
     """
     Удалить столик по ID.
     Параметры:
         table_id: ID удаляемого столика
+        mode: Что делать с будущими бронями: reject, cancel или reassign
     Возвращает:
-        Сообщение об успешном удалении
+        Сообщение об удалении и количество отмененных, пересаженных и
+        архивированных броней
     Исключения:
-        HTTPException: 404 если столик не найден
+        HTTPException: 404 если столик не найден, 409 если у столика
+        остались брони
     """
-    table = delete_table(db=db, table_id=table_id)
-    if table is None:
-        raise HTTPException(status_code=404, detail="Столик не найден")
-    return {"message": "Столик успешно удален"}
+    return removal_response(db, table_id, mode)
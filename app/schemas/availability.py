@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from app.schemas.table import Table
+
+
+class TableAvailability(BaseModel):
+    """
+    Свободные слоты столика на день.
+    Поля:
+        table: Столик
+        free_slots: Время начала слотов, с которых столик свободен
+    """
+    table: Table
+    free_slots: list[datetime]
+
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "table": {
+                    "id": 1,
+                    "name": "Столик 1",
+                    "seats": 4,
+                    "location": "У окна"
+                },
+                "free_slots": ["2023-12-31T18:00:00", "2023-12-31T18:15:00"]
+            }
+        }
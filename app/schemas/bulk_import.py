@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+
+
+class ImportRejectedRow(BaseModel):
+    """
+    Отклоненная строка файла импорта.
+    Поля:
+        line: Номер строки в файле (с 1, заголовок CSV - строка 1)
+        detail: Причина отказа
+    """
+    line: int = Field(..., example=3)
+    detail: str = Field(
+        ..., example="Столик уже забронирован на выбранное время"
+    )
+
+
+class ImportResult(BaseModel):
+    """
+    Результат импорта файла.
+    Поля:
+        received: Количество прочитанных записей
+        imported: Количество сохраненных записей
+        rejected: Количество отклоненных записей
+        errors: Отклоненные строки (не больше IMPORT_MAX_REPORTED первых)
+    """
+    received: int
+    imported: int
+    rejected: int
+    errors: list[ImportRejectedRow]
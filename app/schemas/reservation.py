@@ -1,7 +1,17 @@
 from datetime import datetime
+from typing import Optional
 
 from pydantic import BaseModel, Field, validator
 
+from app.utils.timestamps import naive_utc
+
+# Максимальное количество броней в одном пакетном запросе
+MAX_BATCH_SIZE = 1000
+
+# Максимальная длительность брони (в минутах); ограничивает снизу
+# начало броней, которые могут пересекать интервал
+MAX_DURATION_MINUTES = 24 * 60
+
 
 class ReservationBase(BaseModel):
     """
@@ -9,7 +19,7 @@ class ReservationBase(BaseModel):
     Поля:
         customer_name: Имя клиента
         table_id: ID столика
-        reservation_time: Время бронирования
+        reservation_time: Время бронирования (приводится к наивному UTC)
         duration_minutes: Длительность брони (должна быть положительной)
     """
     customer_name: str = Field(..., example="Иван Иванов", min_length=2)
@@ -17,6 +27,11 @@ class ReservationBase(BaseModel):
     reservation_time: datetime = Field(..., example="2023-12-31T19:00:00")
     duration_minutes: int = Field(..., example=90, gt=0)
 
+    @validator('reservation_time')
+    def normalize_time(cls, moment):
+        """Приводит время с часовым поясом к наивному UTC."""
+        return naive_utc(moment)
+
     @validator('duration_minutes')
     def validate_duration(cls, duration):
         """Проверяет, что длительность положительная."""
@@ -26,8 +41,14 @@ class ReservationBase(BaseModel):
 
 
 class ReservationCreate(ReservationBase):
-    """Схема для создания новых броней (наследует ReservationBase)."""
-    pass
+    """
+    Схема для создания новых броней (наследует ReservationBase).
+    Поля:
+        duration_minutes: Длительность брони (от 1 до MAX_DURATION_MINUTES)
+    """
+    duration_minutes: int = Field(
+        ..., example=90, gt=0, le=MAX_DURATION_MINUTES
+    )
 
 
 class Reservation(ReservationBase):
@@ -49,3 +70,102 @@ class Reservation(ReservationBase):
                 "duration_minutes": 90
             }
         }
+
+
+class ReservationBatchCreate(BaseModel):
+    """
+    Схема пакетного создания броней.
+    Поля:
+        items: Брони для создания (от 1 до MAX_BATCH_SIZE)
+        all_or_nothing: Отклонить весь пакет, если отклонена хотя бы одна бронь
+    """
+    items: list[ReservationCreate]
+    all_or_nothing: bool = Field(False, example=False)
+
+    @validator('items')
+    def validate_items(cls, items):
+        """Проверяет размер пакета."""
+        if not 1 <= len(items) <= MAX_BATCH_SIZE:
+            raise ValueError(
+                f"Пакет должен содержать от 1 до {MAX_BATCH_SIZE} броней"
+            )
+        return items
+
+
+class ReservationAutoCreate(BaseModel):
+    """
+    Схема брони с автоматическим выбором столика.
+    Поля:
+        customer_name: Имя клиента
+        party_size: Количество гостей
+        reservation_time: Время бронирования (приводится к наивному UTC)
+        duration_minutes: Длительность брони (от 1 до MAX_DURATION_MINUTES)
+    """
+    customer_name: str = Field(..., example="Иван Иванов", min_length=2)
+    party_size: int = Field(..., example=2, gt=0)
+    reservation_time: datetime = Field(..., example="2023-12-31T19:00:00")
+    duration_minutes: int = Field(
+        ..., example=90, gt=0, le=MAX_DURATION_MINUTES
+    )
+
+    @validator('reservation_time')
+    def normalize_time(cls, moment):
+        """Приводит время с часовым поясом к наивному UTC."""
+        return naive_utc(moment)
+
+
+class ReservationAutoBatchCreate(BaseModel):
+    """
+    Схема пакетного создания броней с автоматическим выбором столиков.
+    Поля:
+        items: Заявки (от 1 до MAX_BATCH_SIZE)
+        all_or_nothing: Отклонить весь пакет, если отклонена хотя бы одна бронь
+    """
+    items: list[ReservationAutoCreate]
+    all_or_nothing: bool = Field(False, example=False)
+
+    @validator('items')
+    def validate_items(cls, items):
+        """Проверяет размер пакета."""
+        if not 1 <= len(items) <= MAX_BATCH_SIZE:
+            raise ValueError(
+                f"Пакет должен содержать от 1 до {MAX_BATCH_SIZE} броней"
+            )
+        return items
+
+
+class ReservationBatchItemResult(BaseModel):
+    """
+    Результат обработки одной брони пакета.
+    Поля:
+        index: Позиция брони в запросе
+        accepted: Принята ли бронь
+        reservation: Созданная бронь (если принята)
+        detail: Причина отказа (если отклонена)
+    """
+    index: int
+    accepted: bool
+    reservation: Optional[Reservation] = None
+    detail: Optional[str] = None
+
+
+class ReservationBatchResult(BaseModel):
+    """
+    Результат пакетного создания броней.
+    Поля:
+        accepted: Количество принятых броней
+        rejected: Количество отклоненных броней
+        results: Результаты по каждой брони в порядке запроса
+    """
+    accepted: int
+    rejected: int
+    results: list[ReservationBatchItemResult]
+
+
+class ReservationBulkDeleteResult(BaseModel):
+    """
+    Результат массовой отмены броней.
+    Поля:
+        deleted: Количество отмененных броней
+    """
+    deleted: int
@@ -0,0 +1,51 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel, Field
+
+
+class ScheduleEntry(BaseModel):
+    """
+    Бронь в расписании столика.
+    Поля:
+        reservation_id: ID брони
+        start: Начало брони
+        end: Окончание брони
+    """
+    reservation_id: int = Field(..., example=1)
+    start: datetime = Field(..., example="2023-12-31T19:00:00")
+    end: datetime = Field(..., example="2023-12-31T20:30:00")
+
+
+class TableSchedule(BaseModel):
+    """
+    Расписание столика на день.
+    Поля:
+        table_id: ID столика
+        date: День
+        slot_minutes: Шаг слотов в минутах
+        slots: Занятость слотов дня с полуночи, по символу на слот
+            ("1" - слот занят хотя бы частично, "0" - свободен)
+        reservations: Брони, пересекающие день, по времени начала
+    """
+    table_id: int
+    date: date
+    slot_minutes: int
+    slots: str
+    reservations: list[ScheduleEntry]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "table_id": 1,
+                "date": "2023-12-31",
+                "slot_minutes": 15,
+                "slots": "0" * 76 + "1" * 6 + "0" * 14,
+                "reservations": [
+                    {
+                        "reservation_id": 1,
+                        "start": "2023-12-31T19:00:00",
+                        "end": "2023-12-31T20:30:00"
+                    }
+                ]
+            }
+        }
@@ -37,3 +37,18 @@ class Table(TableBase):
                 "location": "У окна"
             }
         }
+
+
+class TableRemovalResult(BaseModel):
+    """
+    Результат удаления столика.
+    Поля:
+        message: Сообщение об удалении
+        cancelled: Количество отмененных будущих броней
+        reassigned: Количество броней, пересаженных на другие столики
+        archived: Количество прошедших броней, перенесенных в архив
+    """
+    message: str
+    cancelled: int = 0
+    reassigned: int = 0
+    archived: int = 0
@@ -0,0 +1,407 @@
+"""
+Автоматический выбор столика для компании.
+
+Столик подбирается по принципу best-fit: из столиков, вмещающих компанию
+и свободных на весь интервал, выбирается самый маленький, а среди
+одинаковых - тот, где бронь плотнее всего примыкает к соседним (остается
+меньше незанятых минут в пределах ALLOCATION_GAP_WINDOW_MINUTES с каждой
+стороны). Так пары не занимают большие столики, а вечер не дробится на
+окна, в которые уже не поместить следующую бронь.
+
+Брони подходящих столиков читаются одним запросом в окне вокруг интервала
+и раскладываются в IntervalSet; выбор - бинарный поиск по каждому
+столику. Бронь сохраняется через create_reservation или
+create_reservations_batch: под блокировкой столика конфликт проверяется
+повторно, а при гонке берется следующий по качеству столик.
+
+Пакетный режим распределяет заявки на вечер вместе: сначала заявки,
+которым подходит меньше столиков (большие компании), а внутри одного
+класса - в порядке окончания. Для столиков одной вместимости такой
+порядок с выбором самого плотного примыкания принимает максимально
+возможное число заявок; между классами это жадная эвристика.
+"""
+
+import os
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.schemas.reservation import ReservationCreate
+from app.services.reservation_index import (
+    IntervalSet,
+    naive_utc,
+    overlap_condition,
+)
+from app.services.reservation_service import (
+    BATCH_REJECTED,
+    BULK_DELETE_CHUNK_SIZE,
+    create_reservation,
+    create_reservations_batch,
+    lock_table_for_booking,
+)
+
+# Сколько минут до и после брони учитывается при оценке примыкания
+ALLOCATION_GAP_WINDOW_MINUTES = int(
+    os.getenv("ALLOCATION_GAP_WINDOW_MINUTES", "120")
+)
+
+# Сколько столиков пробовать, если выбранный заняли параллельно
+ALLOCATION_ATTEMPTS = int(os.getenv("ALLOCATION_ATTEMPTS", "3"))
+
+# Причина отказа, когда подходящего свободного столика нет
+NO_TABLE = "Нет свободного столика для компании на выбранное время"
+
+
+class TableTimeline:
+    """
+    Брони одного столика для выбора по best-fit.
+
+    Атрибуты:
+        table_id: ID столика
+        seats: Количество мест
+        intervals: Брони столика (IntervalSet)
+    """
+
+    __slots__ = ("table_id", "seats", "intervals")
+
+    def __init__(self, table_id: int, seats: int, items=()):
+        self.table_id = table_id
+        self.seats = seats
+        self.intervals = IntervalSet(items)
+
+    def waste(
+        self, start: datetime, end: datetime, window: float
+    ) -> Optional[float]:
+        """
+        Незанятые секунды до и после интервала.
+        Аргументы:
+            start: Начало интервала
+            end: Конец интервала
+            window: Предел учитываемого промежутка с каждой стороны (сек)
+        Возвращает:
+            float: Сумма промежутков до соседних броней или None, если
+            интервал пересекается с бронью
+        """
+        intervals = self.intervals
+        items = intervals.items
+        position = bisect_left(items, (end,))
+        before = after = window
+        if position:
+            latest_end = intervals.max_ends[position - 1]
+            if latest_end > start:
+                return None
+            before = min(window, (start - latest_end).total_seconds())
+        if position < len(items):
+            after = min(window, (items[position][0] - end).total_seconds())
+        return before + after
+
+
+def load_timelines(
+    db: Session, party_size: int, window_start: datetime,
+    window_end: datetime,
+) -> list:
+    """
+    Загрузить столики, вмещающие компанию, и их брони в окне.
+    Аргументы:
+        db: Сессия базы данных
+        party_size: Количество гостей
+        window_start: Начало окна
+        window_end: Конец окна
+    Возвращает:
+        list: TableTimeline от меньших столиков к большим
+    """
+    tables = db.execute(
+        select(Table.id, Table.seats)
+        .where(Table.seats >= party_size)
+        .order_by(Table.seats, Table.id)
+    ).all()
+    if not tables:
+        return []
+    rows = db.execute(
+        select(
+            Reservation.table_id,
+            Reservation.reservation_time,
+            Reservation.end_time,
+            Reservation.id,
+        )
+        .join(Table, Table.id == Reservation.table_id)
+        .where(
+            Table.seats >= party_size,
+            overlap_condition(window_start, window_end),
+        )
+    ).all()
+    booked = {}
+    for table_id, start, end, reservation_id in rows:
+        booked.setdefault(table_id, []).append(
+            (naive_utc(start), naive_utc(end), reservation_id)
+        )
+    return [
+        TableTimeline(table_id, seats, booked.get(table_id, ()))
+        for table_id, seats in tables
+    ]
+
+
+def rank_tables(
+    timelines: list, party_size: int, start: datetime, end: datetime,
+    window_minutes: int = ALLOCATION_GAP_WINDOW_MINUTES,
+) -> list:
+    """
+    Упорядочить свободные подходящие столики по best-fit.
+    Аргументы:
+        timelines: TableTimeline от меньших столиков к большим
+        party_size: Количество гостей
+        start: Начало интервала
+        end: Конец интервала
+        window_minutes: Окно оценки примыкания в минутах
+    Возвращает:
+        list: TableTimeline от лучшего к худшему
+    """
+    window = window_minutes * 60.0
+    ranked = []
+    for timeline in timelines:
+        if timeline.seats < party_size:
+            continue
+        waste = timeline.waste(start, end, window)
+        if waste is not None:
+            ranked.append((timeline.seats, waste, timeline.table_id, timeline))
+    ranked.sort(key=lambda item: item[:3])
+    return [item[3] for item in ranked]
+
+
+def best_table(
+    timelines: list, party_size: int, start: datetime, end: datetime,
+    window_minutes: int = ALLOCATION_GAP_WINDOW_MINUTES,
+) -> Optional[TableTimeline]:
+    """
+    Лучший по best-fit свободный столик (первый элемент rank_tables).
+    Столики большей вместимости не просматриваются, если подходящий
+    найден среди меньших.
+    """
+    window = window_minutes * 60.0
+    best = None
+    for timeline in timelines:
+        if timeline.seats < party_size:
+            continue
+        if best is not None and timeline.seats > best[0]:
+            break
+        waste = timeline.waste(start, end, window)
+        if waste is not None and (
+            best is None or (waste, timeline.table_id) < best[1:3]
+        ):
+            best = (timeline.seats, waste, timeline.table_id, timeline)
+    return best[3] if best is not None else None
+
+
+def plan_batch(
+    timelines: list, requests: list,
+    window_minutes: int = ALLOCATION_GAP_WINDOW_MINUTES,
+) -> list:
+    """
+    Распределить заявки по столикам без обращения к базе.
+    Назначенные заявки добавляются в timelines.
+    Аргументы:
+        timelines: TableTimeline от меньших столиков к большим
+        requests: Список кортежей (количество гостей, начало, конец)
+        window_minutes: Окно оценки примыкания в минутах
+    Возвращает:
+        list: ID столика или None для каждой заявки в порядке requests
+    """
+    capacities = sorted({timeline.seats for timeline in timelines})
+    assigned = [None] * len(requests)
+    order = []
+    for index, (party_size, start, end) in enumerate(requests):
+        position = bisect_left(capacities, party_size)
+        if position < len(capacities):
+            # Класс заявки - самая маленькая подходящая вместимость
+            order.append((-capacities[position], end, start, index))
+    for _, end, start, index in sorted(order):
+        timeline = best_table(
+            timelines, requests[index][0], start, end, window_minutes
+        )
+        if timeline is not None:
+            timeline.intervals.add((start, end, -index - 1))
+            assigned[index] = timeline.table_id
+    return assigned
+
+
+def _booking_window(start: datetime, end: datetime):
+    """Окно загрузки броней для оценки примыкания."""
+    window = timedelta(minutes=ALLOCATION_GAP_WINDOW_MINUTES)
+    return start - window, end + window
+
+
+def allocate_reservation(db: Session, request):
+    """
+    Выбрать столик для компании и создать бронь.
+    Аргументы:
+        db: Сессия базы данных
+        request: Данные заявки (ReservationAutoCreate)
+    Возвращает:
+        Строка созданной брони или None, если свободного столика нет
+    """
+    start = naive_utc(request.reservation_time)
+    end = start + timedelta(minutes=request.duration_minutes)
+    timelines = load_timelines(
+        db, request.party_size, *_booking_window(start, end)
+    )
+    # Чтение не должно держать транзакцию до блокировки столика
+    db.rollback()
+    ranked = rank_tables(timelines, request.party_size, start, end)
+    for timeline in ranked[:ALLOCATION_ATTEMPTS]:
+        db_reservation = create_reservation(db, ReservationCreate(
+            customer_name=request.customer_name,
+            table_id=timeline.table_id,
+            reservation_time=start,
+            duration_minutes=request.duration_minutes,
+        ))
+        if db_reservation is not None:
+            return db_reservation
+    return None
+
+
+def allocate_reservations_batch(
+    db: Session, items: list, all_or_nothing: bool = False
+):
+    """
+    Распределить заявки пакета по столикам и создать брони.
+    Аргументы:
+        db: Сессия базы данных
+        items: Список ReservationAutoCreate
+        all_or_nothing: Отклонить весь пакет при любом отказе
+    Возвращает:
+        Список пар (Reservation или None, причина отказа или None)
+        в порядке items
+    """
+    requests = []
+    for item in items:
+        start = naive_utc(item.reservation_time)
+        requests.append((
+            item.party_size,
+            start,
+            start + timedelta(minutes=item.duration_minutes),
+        ))
+    timelines = load_timelines(
+        db,
+        min(party_size for party_size, _, _ in requests),
+        *_booking_window(
+            min(start for _, start, _ in requests),
+            max(end for _, _, end in requests),
+        ),
+    )
+    db.rollback()
+    assigned = plan_batch(timelines, requests)
+    placed = [
+        index for index, table_id in enumerate(assigned)
+        if table_id is not None
+    ]
+    outcomes = [(None, NO_TABLE)] * len(items)
+    if all_or_nothing and len(placed) < len(items):
+        return [
+            (None, NO_TABLE if table_id is None else BATCH_REJECTED)
+            for table_id in assigned
+        ]
+    if placed:
+        created = create_reservations_batch(
+            db,
+            [
+                ReservationCreate(
+                    customer_name=items[index].customer_name,
+                    table_id=assigned[index],
+                    reservation_time=requests[index][1],
+                    duration_minutes=items[index].duration_minutes,
+                )
+                for index in placed
+            ],
+            all_or_nothing=all_or_nothing,
+        )
+        for index, outcome in zip(placed, created):
+            outcomes[index] = outcome
+    return outcomes
+
+
+def reassign_reservations(
+    db: Session, table_id: int, ends_after: datetime,
+    chunk_size: int = BULK_DELETE_CHUNK_SIZE,
+) -> Optional[dict]:
+    """
+    Пересадить брони столика, не закончившиеся к ends_after, на другие
+    столики не меньшей вместимости.
+    Выполняется в транзакции вызывающего кода и не фиксирует ее: столик и
+    все столики-кандидаты блокируются (в порядке ID, как при пакетном
+    бронировании) до фиксации или отката вызывающим. Брони распределяются
+    plan_batch; строки обновляются запросом UPDATE ... SET table_id =
+    CASE id ... на каждые chunk_size броней, без загрузки в ORM.
+    Аргументы:
+        db: Сессия базы данных
+        table_id: ID столика, с которого пересаживаются брони
+        ends_after: Пересаживаются брони с окончанием не раньше этого
+        chunk_size: Количество броней в одном UPDATE
+    Возвращает:
+        dict: ID брони -> ID нового столика или None, если столик не
+        найден или не для всех броней нашлось место (ничего не изменено)
+    """
+    seats = db.execute(
+        select(Table.seats).where(Table.id == table_id)
+    ).scalar()
+    if seats is None:
+        return None
+    candidates = db.execute(
+        select(Table.id).where(Table.seats >= seats).order_by(Table.id)
+    ).scalars().all()
+    for candidate in candidates:
+        lock_table_for_booking(db, candidate)
+    rows = db.execute(
+        select(
+            Reservation.id,
+            Reservation.reservation_time,
+            Reservation.end_time,
+        )
+        .where(
+            Reservation.table_id == table_id,
+            Reservation.end_time >= ends_after,
+        )
+        .order_by(Reservation.reservation_time, Reservation.id)
+    ).all()
+    if not rows:
+        return {}
+    requests = [
+        (seats, naive_utc(start), naive_utc(end)) for _, start, end in rows
+    ]
+    timelines = [
+        timeline for timeline in load_timelines(
+            db, seats, *_booking_window(
+                min(start for _, start, _ in requests),
+                max(end for _, _, end in requests),
+            ),
+        )
+        if timeline.table_id != table_id
+    ]
+    assigned = plan_batch(timelines, requests)
+    if None in assigned:
+        return None
+    moves = {
+        reservation_id: target
+        for (reservation_id, _, _), target in zip(rows, assigned)
+    }
+    ids = list(moves)
+    for offset in range(0, len(ids), chunk_size):
+        chunk = ids[offset:offset + chunk_size]
+        db.execute(
+            update(Reservation)
+            .where(
+                Reservation.id.in_(chunk),
+                Reservation.table_id == table_id,
+            )
+            .values(table_id=case(
+                {reservation_id: moves[reservation_id]
+                 for reservation_id in chunk},
+                value=Reservation.id,
+            ))
+            .execution_options(synchronize_session=False)
+        )
+    return moves
@@ -0,0 +1,142 @@
+"""
+Перенос прошедших броней в архив.
+
+Брони, закончившиеся раньше горизонта архивации, переносятся из
+reservations в reservations_archive пачками по ARCHIVE_BATCH_SIZE. Каждая
+пачка - отдельная короткая транзакция (INSERT ... SELECT и DELETE по
+списку ID), поэтому блокируются только строки пачки и работа с текущими
+бронями не останавливается. Работает на любом диалекте; на
+партиционированной таблице условие по reservation_time ограничивает
+запросы старыми партициями.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.models.reservation import Reservation
+from app.models.reservation_archive import ReservationArchive
+from app.services.reservation_service import forget_table
+from app.utils.timestamps import utc_now
+
+# Через сколько дней после окончания бронь переносится в архив
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+
+# Количество броней, переносимых одной транзакцией
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "5000"))
+
+# Колонки, общие для reservations и reservations_archive
+ARCHIVE_COLUMNS = (
+    "id", "customer_name", "table_id", "reservation_time",
+    "duration_minutes", "end_time",
+)
+
+
+def archive_horizon(days: int = ARCHIVE_AFTER_DAYS) -> datetime:
+    """Брони, закончившиеся раньше этого момента, подлежат архивации."""
+    return utc_now() - timedelta(days=days)
+
+
+def move_to_archive(
+    db: Session, before: datetime, batch_size: int,
+    table_id: Optional[int] = None,
+) -> tuple:
+    """
+    Перенести пачку броней, закончившихся раньше before, в архив в текущей
+    транзакции (без фиксации).
+    Аргументы:
+        db: Сессия базы данных
+        before: Горизонт архивации
+        batch_size: Максимальное количество броней в пачке
+        table_id: Архивировать брони только этого столика
+    Возвращает:
+        tuple: (количество перенесенных броней, множество ID их столиков)
+    """
+    # Бронь, закончившаяся до before, и началась до него: условие по
+    # reservation_time отсекает партиции и обслуживается индексом
+    # (reservation_time, id)
+    old = (
+        Reservation.reservation_time < before,
+        Reservation.end_time < before,
+    )
+    if table_id is not None:
+        old += (Reservation.table_id == table_id,)
+    rows = db.execute(
+        select(Reservation.id, Reservation.table_id)
+        .where(*old)
+        .order_by(Reservation.reservation_time, Reservation.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return 0, set()
+    ids = [reservation_id for reservation_id, _ in rows]
+    db.execute(
+        insert(ReservationArchive).from_select(
+            ARCHIVE_COLUMNS + ("archived_at",),
+            select(
+                *(getattr(Reservation, name) for name in ARCHIVE_COLUMNS),
+                literal(utc_now(), ReservationArchive.archived_at.type),
+            ).where(Reservation.id.in_(ids), *old),
+        )
+    )
+    db.execute(delete(Reservation).where(Reservation.id.in_(ids), *old))
+    return len(ids), {affected for _, affected in rows}
+
+
+def archive_batch(
+    db: Session, before: datetime, batch_size: int,
+    table_id: Optional[int] = None,
+) -> int:
+    """
+    Перенести в архив одну пачку броней, закончившихся раньше before,
+    отдельной транзакцией.
+    Аргументы:
+        db: Сессия базы данных
+        before: Горизонт архивации
+        batch_size: Максимальное количество броней в пачке
+        table_id: Архивировать брони только этого столика
+    Возвращает:
+        int: Количество перенесенных броней (0 - переносить больше нечего)
+    """
+    try:
+        moved, tables = move_to_archive(db, before, batch_size, table_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    for affected in tables:
+        forget_table(affected)
+    return moved
+
+
+def archive_reservations(
+    db: Session,
+    before: Optional[datetime] = None,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+    table_id: Optional[int] = None,
+) -> int:
+    """
+    Перенести в архив все брони, закончившиеся раньше горизонта.
+    Аргументы:
+        db: Сессия базы данных
+        before: Горизонт архивации (по умолчанию ARCHIVE_AFTER_DAYS назад)
+        batch_size: Количество броней в транзакции
+        max_batches: Остановиться после стольких пачек (None - без предела)
+        table_id: Архивировать брони только этого столика
+    Возвращает:
+        int: Количество перенесенных броней
+    """
+    before = before or archive_horizon()
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(db, before, batch_size, table_id)
+        if not moved:
+            break
+        archived += moved
+        batches += 1
+    return archived
@@ -0,0 +1,151 @@
+"""
+Поиск свободных столиков.
+
+Брони интересующего интервала загружаются одним запросом и раскладываются
+в матрицу занятости "столик x минута": для каждого столика строится битовая
+маска, где бит i означает, что минута origin + i занята. Проверка окна и
+поиск свободных слотов сводятся к побитовым операциям над этими масками.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.services.reservation_index import overlap_condition
+from app.utils.timestamps import naive_utc
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _minute_offset(moment: datetime, origin: datetime, ceil: bool) -> int:
+    """Смещение момента от начала матрицы в минутах с округлением."""
+    seconds = (moment - origin).total_seconds()
+    minutes = int(seconds // 60)
+    if ceil and seconds % 60:
+        minutes += 1
+    return minutes
+
+
+def _spread(mask: int, width: int) -> int:
+    """
+    Расширить занятость на ширину окна.
+    В результате бит i установлен, если в маске установлен хотя бы один
+    бит из [i, i + width); число сдвигов растет как log2(width).
+    """
+    covered = 1
+    while covered < width:
+        step = min(covered, width - covered)
+        mask |= mask >> step
+        covered += step
+    return mask
+
+
+def _suitable_tables(db: Session, party_size: int):
+    """Столики, вмещающие компанию, от меньших к большим."""
+    return db.execute(
+        select(Table)
+        .where(Table.seats >= party_size)
+        .order_by(Table.seats, Table.id)
+    ).scalars().all()
+
+
+def build_occupancy(
+    db: Session, table_ids: list, origin: datetime, span_minutes: int
+) -> dict:
+    """
+    Построить матрицу занятости столиков.
+    Аргументы:
+        db: Сессия базы данных
+        table_ids: ID столиков
+        origin: Начало матрицы
+        span_minutes: Ширина матрицы в минутах
+    Возвращает:
+        dict: ID столика -> битовая маска занятых минут
+    """
+    occupancy = dict.fromkeys(table_ids, 0)
+    if not table_ids:
+        return occupancy
+    horizon = origin + timedelta(minutes=span_minutes)
+    rows = db.execute(
+        select(
+            Reservation.table_id,
+            Reservation.reservation_time,
+            Reservation.end_time,
+        ).where(
+            Reservation.table_id.in_(table_ids),
+            overlap_condition(origin, horizon),
+        )
+    ).all()
+    for table_id, start, end in rows:
+        first = max(_minute_offset(start, origin, ceil=False), 0)
+        last = min(_minute_offset(end, origin, ceil=True), span_minutes)
+        if last > first:
+            occupancy[table_id] |= ((1 << (last - first)) - 1) << first
+    return occupancy
+
+
+def find_available_tables(
+    db: Session, party_size: int, start: datetime, duration_minutes: int
+):
+    """
+    Найти столики, свободные на весь интервал.
+    Аргументы:
+        db: Сессия базы данных
+        party_size: Количество гостей
+        start: Начало интервала
+        duration_minutes: Длительность в минутах
+    Возвращает:
+        Список объектов Table от меньших к большим
+    """
+    start = naive_utc(start)
+    tables = _suitable_tables(db, party_size)
+    occupancy = build_occupancy(
+        db, [table.id for table in tables], start, duration_minutes
+    )
+    return [table for table in tables if not occupancy[table.id]]
+
+
+def find_free_slots(
+    db: Session,
+    day: date,
+    party_size: int,
+    duration_minutes: int,
+    slot_minutes: int = 15,
+):
+    """
+    Найти свободные слоты на день для каждого подходящего столика.
+    Слот - время начала, кратное slot_minutes от полуночи, с которого
+    столик свободен в течение duration_minutes (в том числе после полуночи).
+    Аргументы:
+        db: Сессия базы данных
+        day: День
+        party_size: Количество гостей
+        duration_minutes: Длительность брони в минутах
+        slot_minutes: Шаг сетки слотов в минутах
+    Возвращает:
+        Список пар (Table, список datetime начала свободных слотов)
+    """
+    origin = datetime.combine(day, time.min)
+    tables = _suitable_tables(db, party_size)
+    occupancy = build_occupancy(
+        db,
+        [table.id for table in tables],
+        origin,
+        MINUTES_PER_DAY + duration_minutes,
+    )
+    grid = 0
+    for minute in range(0, MINUTES_PER_DAY, slot_minutes):
+        grid |= 1 << minute
+    result = []
+    for table in tables:
+        free = grid & ~_spread(occupancy[table.id], duration_minutes)
+        slots = []
+        while free:
+            lowest = free & -free
+            slots.append(origin + timedelta(minutes=lowest.bit_length() - 1))
+            free ^= lowest
+        result.append((table, slots))
+    return result
@@ -0,0 +1,185 @@
+"""
+Хранение ответов на запросы с Idempotency-Key в базе данных.
+
+Таблица idempotency_keys общая для всех воркеров. Первый запрос с ключом
+вставляет строку без статуса (захват ключа): вставка второго такого же
+запроса упирается в первичный ключ, и он узнает, что запрос уже
+выполняется. После ответа строка дополняется статусом, заголовками и
+телом; если ответ сохранять нельзя, строка удаляется и повтор
+выполнится заново. Строки старше срока хранения удаляются.
+
+Захват ключа - аренда: выполняющий запрос воркер продлевает claimed_at
+(renew_key), а захват, не продленный дольше срока аренды, считается
+брошенным (воркер упал) и переходит к следующему запросу с этим ключом.
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.timestamps import utc_now
+
+# Колонки сохраненного ответа
+RECORD_COLUMNS = (
+    IdempotencyKey.fingerprint,
+    IdempotencyKey.status_code,
+    IdempotencyKey.headers,
+    IdempotencyKey.body,
+    IdempotencyKey.claimed_at,
+)
+
+
+def _record_statement(key: str, since: datetime):
+    return select(*RECORD_COLUMNS).where(
+        IdempotencyKey.key == key, IdempotencyKey.created_at > since
+    )
+
+
+def _abandoned(lease: float):
+    """Условие незавершенного захвата, аренда которого истекла."""
+    return and_(
+        IdempotencyKey.status_code.is_(None),
+        or_(
+            IdempotencyKey.claimed_at.is_(None),
+            IdempotencyKey.claimed_at <= utc_now() - timedelta(seconds=lease),
+        ),
+    )
+
+
+def lease_expired(row, lease: float) -> bool:
+    """
+    Брошен ли захват ключа: ответ не сохранен, а аренда не продлевалась
+    дольше lease секунд.
+    Аргументы:
+        row: Строка get_key или claim_key
+        lease: Срок аренды в секундах
+    """
+    return row.status_code is None and (
+        row.claimed_at is None
+        or row.claimed_at <= utc_now() - timedelta(seconds=lease)
+    )
+
+
+def get_key(db: Session, key: str, ttl: float):
+    """
+    Прочитать ключ, если срок его хранения не истек.
+    Аргументы:
+        db: Сессия базы данных
+        key: Хэш ключа
+        ttl: Срок хранения в секундах
+    Возвращает:
+        Строка (fingerprint, status_code, headers, body, claimed_at) или None
+    """
+    row = db.execute(
+        _record_statement(key, utc_now() - timedelta(seconds=ttl))
+    ).first()
+    db.rollback()
+    return row
+
+
+def claim_key(
+    db: Session, key: str, fingerprint: str, ttl: float, lease: float
+):
+    """
+    Захватить ключ для выполнения запроса.
+    Просроченная строка с тем же ключом и брошенный захват (аренда
+    истекла) удаляются.
+    Аргументы:
+        db: Сессия базы данных
+        key: Хэш ключа
+        fingerprint: Хэш запроса
+        ttl: Срок хранения в секундах
+        lease: Срок аренды захвата в секундах
+    Возвращает:
+        None если ключ захвачен этим запросом, иначе строка
+        (fingerprint, status_code, headers, body, claimed_at) владельца
+    """
+    now = utc_now()
+    expired = now - timedelta(seconds=ttl)
+    try:
+        db.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.key == key,
+            or_(IdempotencyKey.created_at <= expired, _abandoned(lease)),
+        ))
+        db.execute(insert(IdempotencyKey).values(
+            key=key, fingerprint=fingerprint, created_at=now, claimed_at=now
+        ))
+        db.commit()
+        return None
+    except IntegrityError:
+        db.rollback()
+    row = db.execute(_record_statement(key, expired)).first()
+    db.rollback()
+    return row
+
+
+def renew_key(db: Session, key: str):
+    """Продлить аренду захваченного ключа, пока запрос выполняется."""
+    db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+        )
+        .values(claimed_at=utc_now())
+    )
+    db.commit()
+
+
+def complete_key(
+    db: Session, key: str, status_code: int, headers: list, body: bytes
+):
+    """
+    Сохранить ответ для захваченного ключа.
+    Аргументы:
+        db: Сессия базы данных
+        key: Хэш ключа
+        status_code: Статус ответа
+        headers: Заголовки ответа (список пар строк)
+        body: Тело ответа
+    """
+    db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+        )
+        .values(
+            status_code=status_code,
+            headers=json.dumps(headers),
+            body=body,
+        )
+    )
+    db.commit()
+
+
+def release_key(db: Session, key: str):
+    """Освободить захваченный ключ без сохранения ответа."""
+    db.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+    ))
+    db.commit()
+
+
+def purge_expired_keys(db: Session, ttl: float) -> int:
+    """
+    Удалить ключи старше срока хранения.
+    Аргументы:
+        db: Сессия базы данных
+        ttl: Срок хранения в секундах
+    Возвращает:
+        int: Количество удаленных ключей
+    """
+    result = db.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.created_at <= utc_now() - timedelta(seconds=ttl)
+    ))
+    db.commit()
+    return result.rowcount
+
+
+def decode_headers(headers: Optional[str]) -> list:
+    """Заголовки сохраненного ответа из JSON."""
+    return [tuple(pair) for pair in json.loads(headers or "[]")]
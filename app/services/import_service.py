@@ -0,0 +1,382 @@
+"""
+Массовый импорт столиков и броней из CSV и NDJSON.
+
+Файл читается потоком и обрабатывается пачками по IMPORT_CHUNK_SIZE
+записей. Каждая пачка проверяется схемами TableCreate/ReservationCreate,
+пересечения броней ищутся сортировкой заявок каждого столика
+(sweep_requests) вместо запроса на каждую строку, принятые строки
+записываются командой COPY на PostgreSQL (psycopg2) или пакетным INSERT
+на остальных базах. Каждая пачка фиксируется отдельной транзакцией,
+поэтому кодировка всего файла проверяется до первой из них: иначе
+ошибка в конце файла отменила бы импорт, уже сохранив начало.
+"""
+
+import codecs
+import csv
+import io
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import Session
+
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.schemas.reservation import ReservationCreate
+from app.schemas.table import TableCreate
+from app.services.reservation_service import forget_table, sweep_requests
+from app.services.table_service import bump_catalog_version, table_catalog
+from app.utils.timestamps import naive_utc
+
+# Количество записей, проверяемых и сохраняемых за одну транзакцию
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "10000"))
+
+# Сколько отклоненных строк возвращать в отчете (учитываются все)
+IMPORT_MAX_REPORTED = 1000
+
+# Размер блока при проверке кодировки файла (в байтах)
+IMPORT_DECODE_BLOCK = 1 << 20
+
+# Поддерживаемые форматы и расширения файлов
+IMPORT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+TABLE_NOT_FOUND = "Столик не найден"
+DUPLICATE_TABLE_NAME = "Столик с таким названием уже существует"
+DUPLICATE_TABLE_ID = "Столик с таким ID уже существует"
+NOT_UTF8 = "Файл не в кодировке UTF-8"
+
+
+class ImportReport:
+    """
+    Итог импорта.
+
+    Атрибуты:
+        received: Количество прочитанных записей
+        imported: Количество сохраненных записей
+        rejected: Количество отклоненных записей
+        errors: Первые IMPORT_MAX_REPORTED пар (номер строки, причина)
+    """
+
+    def __init__(self):
+        self.received = 0
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line: int, detail: str):
+        self.rejected += 1
+        if len(self.errors) < IMPORT_MAX_REPORTED:
+            self.errors.append((line, detail))
+
+    def as_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "errors": [
+                {"line": line, "detail": detail}
+                for line, detail in sorted(self.errors)
+            ],
+        }
+
+
+def detect_format(filename: str) -> str:
+    """
+    Определить формат файла по расширению.
+    Исключения:
+        ValueError: Если расширение не поддерживается
+    """
+    suffix = Path(filename or "").suffix.lower()
+    if suffix not in IMPORT_FORMATS:
+        raise ValueError(
+            "Неизвестный формат файла, ожидается .csv, .ndjson или .jsonl"
+        )
+    return IMPORT_FORMATS[suffix]
+
+
+def read_records(stream, file_format: str):
+    """
+    Читать записи файла по одной.
+    Аргументы:
+        stream: Текстовый поток
+        file_format: csv или ndjson
+    Возвращает:
+        Генератор кортежей (номер строки, запись или None, ошибка или None)
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            if None in record:
+                yield reader.line_num, None, "Лишние значения в строке"
+            else:
+                yield reader.line_num, record, None
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None, "Некорректный JSON"
+            continue
+        if isinstance(record, dict):
+            yield line_number, record, None
+        else:
+            yield line_number, None, "Ожидается JSON-объект"
+
+
+def _chunks(records, size: int):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        ".".join(str(part) for part in item["loc"]) + ": " + item["msg"]
+        for item in error.errors()
+    )
+
+
+def _validate(chunk, schema, report: ImportReport):
+    """Проверить записи пачки схемой; вернуть (строка, запись, объект)."""
+    valid = []
+    for line, record, error in chunk:
+        report.received += 1
+        if error is not None:
+            report.reject(line, error)
+            continue
+        try:
+            valid.append((line, record, schema(**record)))
+        except ValidationError as validation_error:
+            report.reject(line, _validation_detail(validation_error))
+    return valid
+
+
+def _write_rows(db: Session, table, columns, rows):
+    """
+    Записать строки в таблицу текущей транзакцией.
+    На psycopg2 используется COPY FROM STDIN, иначе пакетный INSERT.
+    """
+    if db.get_bind().dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        buffer.seek(0)
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        finally:
+            cursor.close()
+        return
+    db.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+
+def import_tables(
+    db: Session, stream, file_format: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+):
+    """
+    Импортировать столики.
+    Необязательная колонка id сохраняет ID из старой системы, чтобы
+    импортируемые следом брони ссылались на те же столики.
+    Аргументы:
+        db: Сессия базы данных
+        stream: Текстовый поток файла
+        file_format: csv или ndjson
+        chunk_size: Количество записей в транзакции
+    Возвращает:
+        ImportReport: Итог импорта
+    """
+    report = ImportReport()
+    explicit_ids = False
+    columns = ("id", "name", "seats", "location")
+    for chunk in _chunks(read_records(stream, file_format), chunk_size):
+        entries = []
+        for line, record, table in _validate(chunk, TableCreate, report):
+            table_id = record.get("id")
+            if table_id in (None, ""):
+                table_id = None
+            else:
+                try:
+                    table_id = int(table_id)
+                except (TypeError, ValueError):
+                    report.reject(line, "id: Ожидается целое число")
+                    continue
+            entries.append((line, table_id, table))
+        taken_names = set(db.execute(select(Table.name).where(
+            Table.name.in_({table.name for _, _, table in entries})
+        )).scalars())
+        taken_ids = set(db.execute(select(Table.id).where(
+            Table.id.in_({
+                table_id for _, table_id, _ in entries if table_id is not None
+            })
+        )).scalars())
+        rows = []
+        for line, table_id, table in entries:
+            if table_id is not None and table_id in taken_ids:
+                report.reject(line, DUPLICATE_TABLE_ID)
+                continue
+            if table.name in taken_names:
+                report.reject(line, DUPLICATE_TABLE_NAME)
+                continue
+            if table_id is not None:
+                taken_ids.add(table_id)
+                explicit_ids = True
+            taken_names.add(table.name)
+            rows.append((table_id, table.name, table.seats, table.location))
+        if not rows:
+            continue
+        try:
+            with_ids = [row for row in rows if row[0] is not None]
+            without_ids = [row[1:] for row in rows if row[0] is None]
+            if with_ids:
+                _write_rows(db, Table.__table__, columns, with_ids)
+            if without_ids:
+                _write_rows(db, Table.__table__, columns[1:], without_ids)
+            bump_catalog_version(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            table_catalog.invalidate()
+        report.imported += len(rows)
+    if explicit_ids and db.get_bind().dialect.name == "postgresql":
+        # Последовательность не знает о явно заданных ID
+        db.execute(text(
+            "SELECT setval(pg_get_serial_sequence('tables', 'id'), "
+            "(SELECT MAX(id) FROM tables))"
+        ))
+        db.commit()
+    return report
+
+
+def import_reservations(
+    db: Session, stream, file_format: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+):
+    """
+    Импортировать брони.
+    Бронь отклоняется, если столик не существует или бронь пересекается
+    с бронями столика в базе или с принятыми ранее строками файла.
+    Аргументы:
+        db: Сессия базы данных
+        stream: Текстовый поток файла
+        file_format: csv или ndjson
+        chunk_size: Количество записей в транзакции
+    Возвращает:
+        ImportReport: Итог импорта
+    """
+    report = ImportReport()
+    table_ids = set(db.execute(select(Table.id)).scalars())
+    columns = (
+        "customer_name", "table_id", "reservation_time",
+        "duration_minutes", "end_time",
+    )
+    for chunk in _chunks(read_records(stream, file_format), chunk_size):
+        by_table = {}
+        requests = {}
+        for line, _, reservation in _validate(
+            chunk, ReservationCreate, report
+        ):
+            if reservation.table_id not in table_ids:
+                report.reject(line, TABLE_NOT_FOUND)
+                continue
+            start_time = naive_utc(reservation.reservation_time)
+            end_time = start_time + timedelta(
+                minutes=reservation.duration_minutes
+            )
+            by_table.setdefault(reservation.table_id, []).append(
+                (start_time, end_time, line)
+            )
+            requests[line] = (
+                reservation.customer_name,
+                reservation.table_id,
+                start_time,
+                reservation.duration_minutes,
+                end_time,
+            )
+        if not by_table:
+            continue
+        try:
+            decisions = sweep_requests(db, by_table)
+            rows = []
+            for line, detail in decisions.items():
+                if detail is None:
+                    rows.append(requests[line])
+                else:
+                    report.reject(line, detail)
+            if rows:
+                _write_rows(db, Reservation.__table__, columns, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            for table_id in by_table:
+                forget_table(table_id)
+        report.imported += len(rows)
+    return report
+
+
+def check_encoding(binary):
+    """
+    Проверить, что файл целиком в UTF-8, и вернуть поток в начало.
+    Аргументы:
+        binary: Двоичный поток файла с произвольным доступом
+    Исключения:
+        ValueError: Если файл не в UTF-8
+    """
+    start = binary.tell()
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        while True:
+            block = binary.read(IMPORT_DECODE_BLOCK)
+            decoder.decode(block, final=not block)
+            if not block:
+                break
+    except UnicodeDecodeError:
+        raise ValueError(NOT_UTF8) from None
+    finally:
+        binary.seek(start)
+
+
+def import_binary(
+    db: Session, importer, binary, filename: str, file_format: str = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+):
+    """
+    Импортировать загруженный файл.
+    Аргументы:
+        db: Сессия базы данных
+        importer: import_tables или import_reservations
+        binary: Двоичный поток файла с произвольным доступом
+        filename: Имя файла (для определения формата)
+        file_format: csv, ndjson или None (по расширению файла)
+        chunk_size: Количество записей в транзакции
+    Возвращает:
+        ImportReport: Итог импорта
+    Исключения:
+        ValueError: Если формат не определен или файл не в UTF-8
+            (в обоих случаях до сохранения первой записи)
+    """
+    file_format = file_format or detect_format(filename)
+    check_encoding(binary)
+    stream = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    try:
+        return importer(db, stream, file_format, chunk_size)
+    finally:
+        # Поток загрузки закрывает его владелец
+        stream.detach()
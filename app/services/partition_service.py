@@ -0,0 +1,93 @@
+"""
+Месячные партиции таблицы броней на PostgreSQL.
+
+Миграция 0006 делает reservations партиционированной по диапазону
+reservation_time и создает партиции на несколько месяцев вперед. При
+каждом запуске приложение досоздает недостающие партиции от текущего
+месяца на RESERVATION_PARTITIONS_AHEAD месяцев вперед, чтобы новые брони
+не попадали в партицию по умолчанию. На других диалектах и на
+непартиционированной таблице ничего не делается.
+"""
+
+import logging
+import os
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.utils.timestamps import utc_now
+
+# На сколько месяцев вперед поддерживать партиции броней
+RESERVATION_PARTITIONS_AHEAD = int(
+    os.getenv("RESERVATION_PARTITIONS_AHEAD", "3")
+)
+
+logger = logging.getLogger(__name__)
+
+
+def add_months(month: date, count: int) -> date:
+    """Первое число месяца, отстоящего от month на count месяцев."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Имя партиции броней за месяц."""
+    return f"reservations_p{month:%Y%m}"
+
+
+def is_partitioned(connection) -> bool:
+    """Является ли таблица reservations партиционированной."""
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = 'reservations'::regclass)"
+    )).scalar()
+
+
+def ensure_reservation_partitions(
+    connection, months_ahead: int = RESERVATION_PARTITIONS_AHEAD
+):
+    """
+    Создать недостающие месячные партиции броней.
+    Аргументы:
+        connection: Соединение SQLAlchemy (изменения фиксирует вызывающий)
+        months_ahead: Количество месяцев после текущего
+    Возвращает:
+        list: Имена созданных партиций
+    """
+    if not is_partitioned(connection):
+        return []
+    existing = set(connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = 'reservations'::regclass"
+    )).scalars())
+    created = []
+    month = utc_now().date().replace(day=1)
+    for _ in range(months_ahead + 1):
+        following = add_months(month, 1)
+        name = partition_name(month)
+        if name not in existing:
+            try:
+                # Точка сохранения: ошибка одной партиции не отменяет
+                # остальные
+                with connection.begin_nested():
+                    connection.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF reservations "
+                        f"FOR VALUES FROM ('{month:%Y-%m-%d}') "
+                        f"TO ('{following:%Y-%m-%d}')"
+                    ))
+                created.append(name)
+            except DBAPIError as error:
+                # Например, партиция по умолчанию уже содержит брони
+                # этого месяца: их нужно перенести вручную
+                logger.warning(
+                    "Не удалось создать партицию %s: %s", name, error.orig
+                )
+        month = following
+    if created:
+        logger.info("Созданы партиции броней: %s", ", ".join(created))
+    return created
@@ -0,0 +1,294 @@
+"""
+Индекс интервалов бронирований в памяти процесса.
+
+Для каждого столика хранится отсортированный по началу список интервалов
+(начало, конец, ID брони). Индекс загружается лениво при первом обращении
+к столику и поддерживается в актуальном состоянии сервисом бронирований,
+поэтому проверка конфликта выполняется за O(log n) без обращения к базе.
+
+Индекс является кэшем: каждый воркер держит свою копию, поэтому записи
+столика перечитываются из базы по истечении RESERVATION_INDEX_TTL секунд.
+Окончательное решение о конфликте принимает база данных при фиксации.
+
+Загружаются только брони, заканчивающиеся после момента загрузки, поэтому
+объем индекса не зависит от накопленной истории. Интервалы, начинающиеся
+раньше этого момента, проверяются запросом к базе.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.reservation import Reservation
+from app.schemas.reservation import MAX_DURATION_MINUTES
+from app.utils.timestamps import naive_utc, utc_now
+
+# Время жизни загруженных интервалов столика (в секундах)
+RESERVATION_INDEX_TTL = float(os.getenv("RESERVATION_INDEX_TTL", "60"))
+
+
+def overlap_condition(start: datetime, end: datetime):
+    """
+    Условие пересечения брони с интервалом [start, end).
+    Брони не длиннее MAX_DURATION_MINUTES, поэтому пересекающая бронь
+    начинается позже start - MAX_DURATION_MINUTES. Эта нижняя граница
+    ограничивает диапазон по reservation_time в составном индексе и
+    отсекает старые партиции таблицы, сколько бы ни накопилось истории.
+    """
+    return and_(
+        Reservation.reservation_time < end,
+        Reservation.reservation_time
+        > start - timedelta(minutes=MAX_DURATION_MINUTES),
+        Reservation.end_time > start,
+    )
+
+
+class IntervalSet:
+    """
+    Отсортированный набор интервалов броней одного столика.
+
+    Атрибуты:
+        items: Отсортированный список кортежей (начало, конец, ID брони)
+        max_ends: Префиксные максимумы концов интервалов
+        loaded_at: Момент загрузки из базы (по time.monotonic)
+        since: Набор содержит все брони, заканчивающиеся позже этого
+            момента (None - все брони)
+    """
+
+    __slots__ = ("items", "max_ends", "loaded_at", "since")
+
+    def __init__(self, items, loaded_at: float = 0.0, since=None):
+        self.items = sorted(items)
+        self.max_ends = []
+        self.loaded_at = loaded_at
+        self.since = since
+        self._rebuild_max_ends(0)
+
+    def _rebuild_max_ends(self, position):
+        """Пересчитать префиксные максимумы начиная с позиции."""
+        del self.max_ends[position:]
+        current = self.max_ends[-1] if self.max_ends else None
+        for _, end, _ in self.items[position:]:
+            current = end if current is None or end > current else current
+            self.max_ends.append(current)
+
+    def overlaps(self, start, end):
+        """Есть ли интервал, пересекающийся с [start, end)."""
+        # Все интервалы левее позиции начинаются раньше конца нового,
+        # достаточно сравнить максимальный конец среди них с началом.
+        position = bisect_left(self.items, (end,))
+        return position > 0 and self.max_ends[position - 1] > start
+
+    def add(self, item):
+        """
+        Добавить интервал.
+        Префиксные максимумы правее позиции вставки меняются, только пока
+        они меньше конца нового интервала, поэтому пересчет
+        останавливается на первом не меньшем; брони обычно добавляются
+        в конец расписания, и стоимость не зависит от размера набора.
+        """
+        position = bisect_left(self.items, item)
+        end = item[1]
+        self.items.insert(position, item)
+        previous = self.max_ends[position - 1] if position else end
+        self.max_ends.insert(position, max(previous, end))
+        max_ends = self.max_ends
+        position += 1
+        while position < len(max_ends) and max_ends[position] < end:
+            max_ends[position] = end
+            position += 1
+
+    def remove(self, reservation_id, start):
+        """
+        Удалить интервал брони.
+        Максимумы пересчитываются от позиции удаления до первого, который
+        не изменился: дальше они совпадают с сохраненными.
+        """
+        position = bisect_left(self.items, (start,))
+        while position < len(self.items) and self.items[position][0] == start:
+            if self.items[position][2] == reservation_id:
+                del self.items[position]
+                del self.max_ends[position]
+                self._repair_max_ends(position)
+                return
+            position += 1
+
+    def _repair_max_ends(self, position):
+        """Пересчитать максимумы после удаления до первого совпадения."""
+        max_ends = self.max_ends
+        current = max_ends[position - 1] if position else None
+        for index in range(position, len(self.items)):
+            end = self.items[index][1]
+            current = end if current is None or end > current else current
+            if max_ends[index] == current:
+                return
+            max_ends[index] = current
+
+
+class ReservationIntervalIndex:
+    """
+    Потокобезопасный индекс интервалов бронирований по столикам.
+
+    Аргументы:
+        ttl: Время жизни загруженных данных столика в секундах
+    """
+
+    def __init__(self, ttl: float = RESERVATION_INDEX_TTL):
+        self.ttl = ttl
+        self._tables = {}
+        # Номера изменений столиков и всего индекса: загрузка, во время
+        # которой столик менялся, не сохраняется
+        self._versions = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load_statement(table_id: int, since: datetime):
+        """Запрос интервалов столика, заканчивающихся после since."""
+        return select(
+            Reservation.id,
+            Reservation.reservation_time,
+            Reservation.end_time,
+        ).where(
+            Reservation.table_id == table_id,
+            Reservation.reservation_time
+            > since - timedelta(minutes=MAX_DURATION_MINUTES),
+            Reservation.end_time > since,
+        )
+
+    @staticmethod
+    def _conflict_statement(table_id: int, start: datetime, end: datetime):
+        """Запрос пересечения для интервалов вне загруженного окна."""
+        return select(Reservation.id).where(
+            Reservation.table_id == table_id,
+            overlap_condition(start, end),
+        ).limit(1)
+
+    def _version(self, table_id: int):
+        """Номер изменений столика перед загрузкой из базы."""
+        with self._lock:
+            return self._epoch, self._versions.get(table_id, 0)
+
+    def _changed(self, table_id: int):
+        """Отметить изменение столика (вызывается под блокировкой)."""
+        self._versions[table_id] = self._versions.get(table_id, 0) + 1
+
+    def _install(
+        self, table_id: int, rows, since: datetime, version
+    ) -> IntervalSet:
+        """
+        Сохранить загруженные из базы интервалы столика.
+        Если после начала загрузки столик менялся (version устарел),
+        интервалы используются только для текущей проверки: снимок может
+        не содержать добавленных за это время броней.
+        """
+        intervals = IntervalSet(
+            [
+                (naive_utc(start), naive_utc(end), reservation_id)
+                for reservation_id, start, end in rows
+            ],
+            time.monotonic(),
+            since,
+        )
+        with self._lock:
+            if version == (self._epoch, self._versions.get(table_id, 0)):
+                self._tables[table_id] = intervals
+        return intervals
+
+    def _cached(self, table_id: int):
+        """Вернуть неустаревшие интервалы столика или None."""
+        intervals = self._tables.get(table_id)
+        if intervals is not None and (
+            time.monotonic() - intervals.loaded_at < self.ttl
+        ):
+            return intervals
+        return None
+
+    def _overlaps(self, intervals, start, end) -> bool:
+        with self._lock:
+            return intervals.overlaps(naive_utc(start), naive_utc(end))
+
+    def has_conflict(
+        self, db: Session, table_id: int, start: datetime, end: datetime
+    ) -> bool:
+        """
+        Проверить, пересекается ли интервал с бронями столика.
+        Аргументы:
+            db: Сессия базы данных (используется только для загрузки)
+            table_id: ID столика
+            start: Начало интервала
+            end: Конец интервала
+        Возвращает:
+            bool: True если есть пересечение
+        """
+        intervals = self._cached(table_id)
+        if intervals is None:
+            version = self._version(table_id)
+            since = utc_now()
+            rows = db.execute(self._load_statement(table_id, since)).all()
+            intervals = self._install(table_id, rows, since, version)
+        if naive_utc(start) < intervals.since:
+            return db.execute(
+                self._conflict_statement(table_id, start, end)
+            ).first() is not None
+        return self._overlaps(intervals, start, end)
+
+    async def has_conflict_async(
+        self, db: AsyncSession, table_id: int, start: datetime, end: datetime
+    ) -> bool:
+        """Асинхронный вариант has_conflict."""
+        intervals = self._cached(table_id)
+        if intervals is None:
+            version = self._version(table_id)
+            since = utc_now()
+            result = await db.execute(self._load_statement(table_id, since))
+            intervals = self._install(
+                table_id, result.all(), since, version
+            )
+        if naive_utc(start) < intervals.since:
+            result = await db.execute(
+                self._conflict_statement(table_id, start, end)
+            )
+            return result.first() is not None
+        return self._overlaps(intervals, start, end)
+
+    def add(
+        self, table_id: int, reservation_id: int,
+        start: datetime, end: datetime
+    ):
+        """Добавить бронь в индекс, если столик уже загружен."""
+        item = (naive_utc(start), naive_utc(end), reservation_id)
+        with self._lock:
+            self._changed(table_id)
+            intervals = self._tables.get(table_id)
+            if intervals is not None:
+                intervals.add(item)
+
+    def remove(self, table_id: int, reservation_id: int, start: datetime):
+        """Удалить бронь из индекса, если столик уже загружен."""
+        with self._lock:
+            self._changed(table_id)
+            intervals = self._tables.get(table_id)
+            if intervals is not None:
+                intervals.remove(reservation_id, naive_utc(start))
+
+    def invalidate(self, table_id: int = None):
+        """Сбросить данные столика (или всего индекса, если ID не задан)."""
+        with self._lock:
+            if table_id is None:
+                self._tables.clear()
+                self._versions.clear()
+                self._epoch += 1
+            else:
+                self._tables.pop(table_id, None)
+                self._changed(table_id)
+
+
+# Общий индекс процесса
+reservation_index = ReservationIntervalIndex()
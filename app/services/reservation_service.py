@@ -1,43 +1,502 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
+from typing import Optional
 
-from sqlalchemy import func
+from sqlalchemy import (
+    delete, func, insert, literal, select, tuple_, update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.database import SessionLocal
 from app.models.reservation import Reservation
+from app.models.table import Table
 from app.schemas.reservation import ReservationCreate
+from app.services.reservation_index import (
+    IntervalSet,
+    naive_utc,
+    overlap_condition,
+    reservation_index,
+)
+from app.services.schedule_service import schedule_cache
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.returning import (
+    delete_returning,
+    delete_returning_async,
+    insert_returning,
+    insert_returning_async,
+)
+from app.utils.serialization import rows_to_json
 
+# Пространство ключей advisory-блокировок бронирования на PostgreSQL
+BOOKING_LOCK_CLASS = 7301
 
-def get_reservations(db: Session, skip: int = 0, limit: int = 100):
+# Причины отказа в пакетном бронировании
+CONFLICT_EXISTING = "Столик уже забронирован на выбранное время"
+CONFLICT_IN_BATCH = "Пересекается с другой бронью этого пакета"
+BATCH_REJECTED = "Пакет отклонен целиком из-за других броней"
+
+# Поля брони в ответе (в порядке схемы Reservation)
+RESERVATION_FIELDS = (
+    "customer_name", "table_id", "reservation_time", "duration_minutes", "id",
+)
+RESERVATION_COLUMNS = tuple(
+    getattr(Reservation, field) for field in RESERVATION_FIELDS
+)
+
+# Колонки выгрузки броней (в порядке вывода)
+EXPORT_COLUMNS = (
+    "id", "customer_name", "table_id", "reservation_time", "duration_minutes",
+)
+
+# Количество строк, читаемых из базы за один раз при выгрузке
+EXPORT_CHUNK_SIZE = 5000
+
+# Количество броней, удаляемых одним запросом при массовой отмене
+BULK_DELETE_CHUNK_SIZE = 5000
+
+
+def track_created(reservation):
+    """Добавить сохраненную бронь в индекс интервалов и расписания."""
+    reservation_index.add(
+        reservation.table_id,
+        reservation.id,
+        reservation.reservation_time,
+        reservation.end_time,
+    )
+    schedule_cache.add(
+        reservation.table_id,
+        reservation.id,
+        reservation.reservation_time,
+        reservation.end_time,
+    )
+
+
+def track_deleted(reservation):
+    """Убрать удаленную бронь из индекса интервалов и расписаний."""
+    reservation_index.remove(
+        reservation.table_id, reservation.id, reservation.reservation_time
+    )
+    schedule_cache.remove(
+        reservation.table_id,
+        reservation.id,
+        reservation.reservation_time,
+        reservation.end_time,
+    )
+
+
+def forget_table(table_id: int = None):
+    """
+    Сбросить данные столика в индексе интервалов и расписаниях
+    (или данные всех столиков, если ID не задан).
     """
-    Получить список бронирований из базы данных с пагинацией.
+    reservation_index.invalidate(table_id)
+    schedule_cache.invalidate(table_id)
+
+
+def _booking_lock_statement(dialect_name: str, table_id: int):
+    """Построить запрос блокировки столика для диалекта."""
+    if dialect_name == "postgresql":
+        return select(func.pg_advisory_xact_lock(BOOKING_LOCK_CLASS, table_id))
+    tables = Table.__table__
+    return (
+        update(tables)
+        .where(tables.c.id == table_id)
+        .values(id=tables.c.id)
+    )
+
+
+def _conflict_statement(
+    table_id: int, start_time: datetime, end_time: datetime
+):
+    """Построить запрос первой брони столика, пересекающей интервал."""
+    return select(Reservation.id).where(
+        Reservation.table_id == table_id,
+        overlap_condition(start_time, end_time),
+    ).limit(1)
+
+
+def _filter_reservations(
+    query,
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+    customer_name: Optional[str] = None,
+):
+    """Добавить к запросу фильтры списка броней."""
+    if table_id is not None:
+        query = query.where(Reservation.table_id == table_id)
+    if time_from is not None:
+        query = query.where(
+            Reservation.reservation_time >= naive_utc(time_from)
+        )
+    if time_to is not None:
+        query = query.where(Reservation.reservation_time < naive_utc(time_to))
+    if customer_name:
+        query = query.where(Reservation.customer_name.startswith(
+            customer_name, autoescape=True
+        ))
+    return query
+
+
+def _reservations_statement(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+    customer_name: Optional[str] = None,
+    columns=None,
+):
+    """
+    Построить запрос списка броней с фильтрами и курсором.
+    Если заданы columns, выбираются только эти колонки, а не ORM-объекты.
+    """
+    query = select(*columns) if columns is not None else select(Reservation)
+    query = _filter_reservations(
+        query, table_id, time_from, time_to, customer_name
+    )
+    if cursor is not None:
+        cursor_time, cursor_id = decode_cursor(cursor, datetime, int)
+        query = query.where(
+            tuple_(Reservation.reservation_time, Reservation.id)
+            > tuple_(literal(cursor_time), literal(cursor_id))
+        )
+    return (
+        query.order_by(Reservation.reservation_time, Reservation.id)
+        .offset(skip)
+        .limit(limit)
+    )
+
+
+def get_reservations(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+    customer_name: Optional[str] = None,
+):
+    """
+    Получить список бронирований из базы данных.
+    Записи упорядочены по (reservation_time, id). Курсор продолжает выборку
+    после последней записи предыдущей страницы, поэтому стоимость страницы
+    не зависит от ее номера; skip оставлен для обратной совместимости.
     Аргументы:
         db: Сессия базы данных
         skip: Количество пропускаемых записей
         limit: Лимит возвращаемых записей
+        cursor: Курсор следующей страницы (см. next_reservations_cursor)
+        table_id: Фильтр по столику
+        time_from: Начало брони не раньше указанного времени
+        time_to: Начало брони раньше указанного времени
+        customer_name: Префикс имени клиента
     Возвращает:
         Список объектов Reservation
+    Исключения:
+        ValueError: Если курсор некорректен
+    """
+    return db.execute(_reservations_statement(
+        skip, limit, cursor, table_id, time_from, time_to, customer_name
+    )).scalars().all()
+
+
+def get_reservations_page(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+    customer_name: Optional[str] = None,
+):
     """
-    return db.query(Reservation).offset(skip).limit(limit).all()
+    Получить страницу броней, уже сериализованную в JSON.
+    Выбираются только поля ответа кортежами, без ORM-объектов и повторной
+    проверки схемой ответа; результат совпадает с list[Reservation].
+    Аргументы:
+        db: Сессия базы данных
+        skip, limit, cursor, table_id, time_from, time_to, customer_name:
+            Как в get_reservations
+    Возвращает:
+        tuple: (тело ответа, курсор следующей страницы или None)
+    Исключения:
+        ValueError: Если курсор некорректен
+    """
+    rows = db.execute(_reservations_statement(
+        skip, limit, cursor, table_id, time_from, time_to, customer_name,
+        columns=RESERVATION_COLUMNS,
+    )).all()
+    return (
+        rows_to_json(RESERVATION_FIELDS, rows),
+        next_reservations_cursor(rows, limit),
+    )
+
+
+def next_reservations_cursor(reservations, limit: int) -> Optional[str]:
+    """
+    Получить курсор следующей страницы броней.
+    Аргументы:
+        reservations: Брони текущей страницы
+        limit: Лимит записей на странице
+    Возвращает:
+        str: Курсор или None, если страница последняя
+    """
+    if not reservations or len(reservations) < limit:
+        return None
+    last = reservations[-1]
+    return encode_cursor(last.reservation_time, last.id)
+
+
+def _export_statement(
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+):
+    """Построить запрос колонок броней для выгрузки."""
+    query = select(*(
+        getattr(Reservation, column) for column in EXPORT_COLUMNS
+    ))
+    return _filter_reservations(
+        query, time_from=time_from, time_to=time_to
+    ).order_by(Reservation.reservation_time, Reservation.id)
+
+
+def iter_reservation_rows(
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    session_factory=SessionLocal,
+):
+    """
+    Выгрузить брони пачками кортежей колонок EXPORT_COLUMNS.
+    Строки читаются потоково (yield_per: серверный курсор на PostgreSQL),
+    без ORM-объектов, поэтому память не зависит от объема выгрузки.
+    Генератор открывает собственную сессию: он выполняется, пока ответ
+    отправляется клиенту, и не должен зависеть от сессии запроса.
+    Аргументы:
+        time_from: Начало брони не раньше указанного времени
+        time_to: Начало брони раньше указанного времени
+        chunk_size: Количество строк в пачке
+        session_factory: Фабрика сессий (например, базы для чтения)
+    Возвращает:
+        Генератор списков кортежей
+    """
+    with session_factory() as db:
+        result = db.execute(
+            _export_statement(time_from, time_to),
+            execution_options={"yield_per": chunk_size},
+        )
+        for partition in result.partitions():
+            yield partition
+
+
+def lock_table_for_booking(db: Session, table_id: int):
+    """
+    Захватить блокировку столика до конца текущей транзакции.
+    Блокировка берется только на один столик, поэтому бронирования
+    разных столиков выполняются параллельно.
+    На PostgreSQL используется advisory-блокировка транзакции, на остальных
+    диалектах - блокировка строки столика холостым UPDATE (на SQLite он
+    захватывает блокировку записи базы).
+    Аргументы:
+        db: Сессия базы данных
+        table_id: ID столика
+    """
+    db.execute(_booking_lock_statement(db.get_bind().dialect.name, table_id))
 
 
 def create_reservation(db: Session, reservation: ReservationCreate):
     """
     Создать и сохранить новую бронь в базе данных.
+    Сначала конфликт ищется в индексе интервалов в памяти (O(log n)):
+    занятый по индексу слот отклоняется без блокировки столика, если
+    бронь подтверждается чтением из базы. Свободный по индексу слот
+    окончательно проверяется по базе в одной транзакции со вставкой под
+    блокировкой столика, поэтому параллельные запросы (в том числе других
+    воркеров) на один и тот же слот не могут оба пройти проверку. Вставка
+    возвращает строку через RETURNING, без отдельного SELECT после фиксации.
     Аргументы:
         db: Сессия базы данных
         reservation: Данные бронирования
     Возвращает:
-        Созданный объект Reservation
+        Строка созданной брони или None, если время уже занято
     Исключения:
         SQLAlchemyError: При ошибке операции с базой данных
     """
-    db_reservation = Reservation(**reservation.dict())
-    db.add(db_reservation)
-    db.commit()
-    db.refresh(db_reservation)
+    start_time = naive_utc(reservation.reservation_time)
+    end_time = start_time + timedelta(minutes=reservation.duration_minutes)
+    if reservation_index.has_conflict(
+        db, reservation.table_id, start_time, end_time
+    ):
+        # Индекс воркера может помнить бронь, отмененную другим процессом:
+        # отказ подтверждается чтением без блокировки столика
+        if reservation_conflict_exists(
+            db, reservation.table_id, start_time, end_time
+        ):
+            db.rollback()
+            return None
+        reservation_index.invalidate(reservation.table_id)
+    try:
+        lock_table_for_booking(db, reservation.table_id)
+        if reservation_conflict_exists(
+            db, reservation.table_id, start_time, end_time
+        ):
+            db.rollback()
+            forget_table(reservation.table_id)
+            return None
+        db_reservation = insert_returning(
+            db,
+            Reservation.__table__,
+            dict(
+                reservation.dict(),
+                reservation_time=start_time,
+                end_time=end_time,
+            ),
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        forget_table(reservation.table_id)
+        raise
+    track_created(db_reservation)
     return db_reservation
 
 
+def _booked_intervals_statement(
+    table_id: int, start_time: datetime, end_time: datetime
+):
+    """Построить запрос броней столика, пересекающих диапазон."""
+    return select(
+        Reservation.reservation_time,
+        Reservation.end_time,
+        Reservation.id,
+    ).where(
+        Reservation.table_id == table_id,
+        overlap_condition(start_time, end_time),
+    )
+
+
+def sweep_table_requests(candidates, booked: IntervalSet):
+    """
+    Отобрать непересекающиеся заявки одного столика.
+    Заявки просматриваются в порядке начала: заявка принимается, если
+    не пересекает существующие брони и уже принятые заявки пакета.
+    Аргументы:
+        candidates: Список кортежей (начало, конец, ключ заявки)
+        booked: Существующие брони столика
+    Возвращает:
+        dict: Ключ заявки -> None если принята, иначе причина отказа
+    """
+    decisions = {}
+    accepted_end = None
+    for start, end, key in sorted(candidates, key=lambda item: item[:2]):
+        if booked.overlaps(start, end):
+            decisions[key] = CONFLICT_EXISTING
+        elif accepted_end is not None and start < accepted_end:
+            decisions[key] = CONFLICT_IN_BATCH
+        else:
+            decisions[key] = None
+            accepted_end = end
+    return decisions
+
+
+def sweep_requests(db: Session, by_table: dict):
+    """
+    Заблокировать столики и отобрать заявки без пересечений.
+    Для каждого столика существующие брони читаются одним диапазонным
+    запросом, заявки проверяются sweep_table_requests.
+    Аргументы:
+        db: Сессия базы данных (блокировки держатся до конца транзакции)
+        by_table: ID столика -> список кортежей (начало, конец, ключ заявки)
+    Возвращает:
+        dict: Ключ заявки -> None если принята, иначе причина отказа
+    """
+    decisions = {}
+    # Блокировки берутся в порядке ID столиков, чтобы пакеты
+    # с пересекающимися столиками не взаимоблокировались.
+    for table_id in sorted(by_table):
+        candidates = by_table[table_id]
+        lock_table_for_booking(db, table_id)
+        rows = db.execute(_booked_intervals_statement(
+            table_id,
+            min(start for start, _, _ in candidates),
+            max(end for _, end, _ in candidates),
+        )).all()
+        booked = IntervalSet([tuple(row) for row in rows])
+        decisions.update(sweep_table_requests(candidates, booked))
+    return decisions
+
+
+def create_reservations_batch(
+    db: Session, items: list, all_or_nothing: bool = False
+):
+    """
+    Создать пакет броней в одной транзакции.
+    Конфликты внутри пакета находятся сортировкой заявок каждого столика,
+    с существующими бронями - одним диапазонным запросом на столик.
+    Принятые брони вставляются одним многострочным INSERT.
+    Аргументы:
+        db: Сессия базы данных
+        items: Список ReservationCreate
+        all_or_nothing: Отклонить весь пакет при любом отказе
+    Возвращает:
+        Список пар (Reservation или None, причина отказа или None)
+        в порядке items
+    """
+    # Время приводится к наивному UTC один раз: то же значение проверяется
+    # на конфликты и сохраняется
+    intervals = []
+    by_table = {}
+    for index, item in enumerate(items):
+        start_time = naive_utc(item.reservation_time)
+        end_time = start_time + timedelta(minutes=item.duration_minutes)
+        intervals.append((start_time, end_time))
+        by_table.setdefault(item.table_id, []).append(
+            (start_time, end_time, index)
+        )
+    try:
+        decisions = sweep_requests(db, by_table)
+        accepted = [
+            index for index in range(len(items)) if decisions[index] is None
+        ]
+        if all_or_nothing and len(accepted) < len(items):
+            db.rollback()
+            return [
+                (None, decisions[index] or BATCH_REJECTED)
+                for index in range(len(items))
+            ]
+        created = {}
+        if accepted:
+            rows = db.execute(
+                insert(Reservation).returning(
+                    Reservation, sort_by_parameter_order=True
+                ),
+                [
+                    dict(
+                        items[index].dict(),
+                        reservation_time=intervals[index][0],
+                        end_time=intervals[index][1],
+                    )
+                    for index in accepted
+                ],
+            ).scalars().all()
+            created = dict(zip(accepted, rows))
+        db.commit()
+    except Exception:
+        db.rollback()
+        for table_id in by_table:
+            forget_table(table_id)
+        raise
+    for db_reservation in created.values():
+        track_created(db_reservation)
+    return [
+        (created.get(index), decisions[index]) for index in range(len(items))
+    ]
+
+
 def delete_reservation(db: Session, reservation_id: int):
     """
     Удалить бронь из базы данных по ID.
@@ -46,21 +505,105 @@ def delete_reservation(db: Session, reservation_id: int):
         db: Сессия базы данных
         reservation_id: ID удаляемой брони
     Возвращает:
-        Удаленный объект Reservation если найден, иначе None
+        Строка удаленной брони если найдена, иначе None
     """
-    reservation = (
-        db.query(Reservation).filter(Reservation.id == reservation_id).first()
+    reservation = delete_returning(
+        db, Reservation.__table__, Reservation.id == reservation_id
     )
     if reservation:
-        db.delete(reservation)
         db.commit()
+        track_deleted(reservation)
         return reservation
     return None
 
 
+def delete_reservations(
+    db: Session,
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+    ends_after: Optional[datetime] = None,
+    chunk_size: int = BULK_DELETE_CHUNK_SIZE,
+    commit: bool = True,
+) -> int:
+    """
+    Удалить все брони, подходящие под фильтры.
+    Брони удаляются пачками по chunk_size: каждая пачка - один запрос
+    DELETE ... WHERE id IN (SELECT id ... LIMIT chunk_size) RETURNING
+    table_id, поэтому строки не загружаются в ORM. Пачка выбирается по
+    индексу (reservation_time, id) или (table_id, reservation_time,
+    end_time). Если диалект не поддерживает RETURNING, ID и столики пачки
+    читаются отдельным SELECT. Данные индекса и расписаний сбрасываются
+    только для столиков, брони которых удалены.
+    Аргументы:
+        db: Сессия базы данных
+        table_id: Фильтр по столику
+        time_from: Начало брони не раньше указанного времени
+        time_to: Начало брони раньше указанного времени
+        ends_after: Окончание брони не раньше указанного времени
+        chunk_size: Максимальное количество броней в пачке
+        commit: Фиксировать каждую пачку отдельной транзакцией (блокировки
+            держатся только на время пачки); False - выполнить все пачки
+            в транзакции вызывающего кода
+    Возвращает:
+        int: Количество удаленных броней
+    """
+    chunk = _filter_reservations(
+        select(Reservation.id, Reservation.table_id),
+        table_id, time_from, time_to,
+    )
+    if ends_after is not None:
+        chunk = chunk.where(Reservation.end_time >= ends_after)
+    chunk = chunk.order_by(
+        Reservation.reservation_time, Reservation.id
+    ).limit(chunk_size)
+    statement = delete(Reservation).execution_options(
+        synchronize_session=False
+    )
+    returning = db.get_bind().dialect.delete_returning
+    deleted = 0
+    while True:
+        affected = set()
+        try:
+            if returning:
+                removed_tables = db.execute(
+                    statement
+                    .where(Reservation.id.in_(
+                        chunk.with_only_columns(Reservation.id)
+                        .scalar_subquery()
+                    ))
+                    .returning(Reservation.table_id)
+                ).scalars().all()
+                affected.update(removed_tables)
+                removed = len(removed_tables)
+            else:
+                rows = db.execute(chunk).all()
+                affected.update(row_table for _, row_table in rows)
+                removed = db.execute(statement.where(Reservation.id.in_(
+                    [reservation_id for reservation_id, _ in rows]
+                ))).rowcount
+            if commit:
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            for affected_table in affected:
+                forget_table(affected_table)
+        deleted += removed
+        if removed < chunk_size:
+            return deleted
+
+
 def check_reservation_conflict(db: Session, reservation: ReservationCreate):
     """
     Проверить конфликт времени для новой брони.
+    Ответ дается по индексу интервалов в памяти: база данных читается
+    только при первой загрузке броней столика или после истечения TTL.
+    Индекс воркера может помнить брони, удаленные другим процессом, и не
+    знать о бронях других процессов, поэтому ответ - только подсказка;
+    create_reservation использует его как быстрый путь и подтверждает
+    решение по базе.
     Аргументы:
         db: Сессия базы данных
         reservation: Данные новой брони
@@ -69,10 +612,151 @@ def check_reservation_conflict(db: Session, reservation: ReservationCreate):
     """
     start_time = reservation.reservation_time
     end_time = start_time + timedelta(minutes=reservation.duration_minutes)
-    conflicting = db.query(Reservation).filter(
-        Reservation.table_id == reservation.table_id,
-        Reservation.reservation_time < end_time,
-        func.datetime(Reservation.reservation_time) +
-        (Reservation.duration_minutes * func.interval('1 minute')) > start_time
-    ).count()
-    return conflicting > 0
+    return reservation_index.has_conflict(
+        db, reservation.table_id, start_time, end_time
+    )
+
+
+def reservation_conflict_exists(
+    db: Session, table_id: int, start_time: datetime, end_time: datetime
+):
+    """
+    Проверить пересечение интервала с бронями столика по базе данных.
+    Условие записано как диапазон по (table_id, reservation_time, end_time),
+    ограниченный с обеих сторон (overlap_condition), поэтому обслуживается
+    составным индексом на любом диалекте независимо от объема истории.
+    Аргументы:
+        db: Сессия базы данных
+        table_id: ID столика
+        start_time: Начало интервала
+        end_time: Конец интервала
+    Возвращает:
+        bool: True если есть конфликт, False если нет
+    """
+    conflicting = db.execute(
+        _conflict_statement(table_id, start_time, end_time)
+    ).first()
+    return conflicting is not None
+
+
+# Асинхронные варианты функций сервиса (используются при DATABASE_ASYNC)
+
+
+async def get_reservations_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+    customer_name: Optional[str] = None,
+):
+    """Асинхронный вариант get_reservations."""
+    result = await db.execute(_reservations_statement(
+        skip, limit, cursor, table_id, time_from, time_to, customer_name
+    ))
+    return result.scalars().all()
+
+
+async def get_reservations_page_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = None,
+    time_to: Optional[datetime] = None,
+    customer_name: Optional[str] = None,
+):
+    """Асинхронный вариант get_reservations_page."""
+    result = await db.execute(_reservations_statement(
+        skip, limit, cursor, table_id, time_from, time_to, customer_name,
+        columns=RESERVATION_COLUMNS,
+    ))
+    rows = result.all()
+    return (
+        rows_to_json(RESERVATION_FIELDS, rows),
+        next_reservations_cursor(rows, limit),
+    )
+
+
+async def lock_table_for_booking_async(db: AsyncSession, table_id: int):
+    """Асинхронный вариант lock_table_for_booking."""
+    await db.execute(
+        _booking_lock_statement(db.get_bind().dialect.name, table_id)
+    )
+
+
+async def create_reservation_async(
+    db: AsyncSession, reservation: ReservationCreate
+):
+    """Асинхронный вариант create_reservation."""
+    start_time = naive_utc(reservation.reservation_time)
+    end_time = start_time + timedelta(minutes=reservation.duration_minutes)
+    if await reservation_index.has_conflict_async(
+        db, reservation.table_id, start_time, end_time
+    ):
+        if await reservation_conflict_exists_async(
+            db, reservation.table_id, start_time, end_time
+        ):
+            await db.rollback()
+            return None
+        reservation_index.invalidate(reservation.table_id)
+    try:
+        await lock_table_for_booking_async(db, reservation.table_id)
+        if await reservation_conflict_exists_async(
+            db, reservation.table_id, start_time, end_time
+        ):
+            await db.rollback()
+            forget_table(reservation.table_id)
+            return None
+        db_reservation = await insert_returning_async(
+            db,
+            Reservation.__table__,
+            dict(
+                reservation.dict(),
+                reservation_time=start_time,
+                end_time=end_time,
+            ),
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        forget_table(reservation.table_id)
+        raise
+    track_created(db_reservation)
+    return db_reservation
+
+
+async def delete_reservation_async(db: AsyncSession, reservation_id: int):
+    """Асинхронный вариант delete_reservation."""
+    reservation = await delete_returning_async(
+        db, Reservation.__table__, Reservation.id == reservation_id
+    )
+    if reservation:
+        await db.commit()
+        track_deleted(reservation)
+        return reservation
+    return None
+
+
+async def check_reservation_conflict_async(
+    db: AsyncSession, reservation: ReservationCreate
+):
+    """Асинхронный вариант check_reservation_conflict."""
+    start_time = reservation.reservation_time
+    end_time = start_time + timedelta(minutes=reservation.duration_minutes)
+    return await reservation_index.has_conflict_async(
+        db, reservation.table_id, start_time, end_time
+    )
+
+
+async def reservation_conflict_exists_async(
+    db: AsyncSession, table_id: int, start_time: datetime, end_time: datetime
+):
+    """Асинхронный вариант reservation_conflict_exists."""
+    result = await db.execute(
+        _conflict_statement(table_id, start_time, end_time)
+    )
+    return result.first() is not None
@@ -0,0 +1,300 @@
+"""
+Расписание столика на день.
+
+Для пары (столик, день) хранится отсортированный список броней
+(начало, конец, ID брони), пересекающих день, и битовая маска слотов:
+бит i установлен, если слот [полночь + i * SCHEDULE_SLOT_MINUTES, ...)
+занят хотя бы одной бронью. Расписание строится одним запросом при первом
+обращении, а дальше сервис бронирований дополняет его при создании и
+удалении броней, не перечитывая базу.
+
+Кэш ограничен SCHEDULE_CACHE_SIZE расписаниями и вытесняет давно
+не запрашивавшиеся (LRU). Как и индекс интервалов, он является кэшем
+одного процесса, поэтому расписание перечитывается из базы по истечении
+SCHEDULE_CACHE_TTL секунд.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.services.reservation_index import overlap_condition
+from app.utils.metrics import Counter, registry
+from app.utils.timestamps import naive_utc
+
+# Шаг слотов маски занятости (в минутах)
+SCHEDULE_SLOT_MINUTES = int(os.getenv("SCHEDULE_SLOT_MINUTES", "15"))
+
+# Максимальное количество расписаний (столик, день) в кэше
+SCHEDULE_CACHE_SIZE = int(os.getenv("SCHEDULE_CACHE_SIZE", "2048"))
+
+# Время жизни расписания в кэше (в секундах)
+SCHEDULE_CACHE_TTL = float(os.getenv("SCHEDULE_CACHE_TTL", "60"))
+
+ONE_DAY = timedelta(days=1)
+
+schedule_lookups = registry.register(Counter(
+    "schedule_cache_lookups_total",
+    "Обращения к кэшу расписаний столиков",
+    ("result",),
+    locked=True,
+))
+
+
+class DaySchedule:
+    """
+    Брони столика за один день.
+
+    Атрибуты:
+        day: День
+        items: Отсортированный список кортежей (начало, конец, ID брони)
+        slots: Битовая маска занятых слотов дня
+        slot_minutes: Шаг слотов в минутах
+        loaded_at: Момент загрузки из базы (по time.monotonic)
+    """
+
+    __slots__ = ("day", "items", "slots", "slot_minutes", "loaded_at")
+
+    def __init__(
+        self, day: date, items, slot_minutes: int = SCHEDULE_SLOT_MINUTES,
+        loaded_at: float = 0.0,
+    ):
+        self.day = day
+        self.items = sorted(items)
+        self.slot_minutes = slot_minutes
+        self.loaded_at = loaded_at
+        self._rebuild_slots()
+
+    @property
+    def origin(self) -> datetime:
+        return datetime.combine(self.day, datetime.min.time())
+
+    @property
+    def slot_count(self) -> int:
+        return -(-24 * 60 // self.slot_minutes)
+
+    def _mask(self, start: datetime, end: datetime) -> int:
+        """Маска слотов, которые пересекает интервал [start, end)."""
+        step = self.slot_minutes * 60
+        first = int((start - self.origin).total_seconds() // step)
+        last = -int(-(end - self.origin).total_seconds() // step)
+        first = max(first, 0)
+        last = min(last, self.slot_count)
+        if last <= first:
+            return 0
+        return ((1 << (last - first)) - 1) << first
+
+    def _rebuild_slots(self):
+        self.slots = 0
+        for start, end, _ in self.items:
+            self.slots |= self._mask(start, end)
+
+    def add(self, item):
+        insort(self.items, item)
+        self.slots |= self._mask(item[0], item[1])
+
+    def remove(self, reservation_id: int, start: datetime):
+        position = bisect_left(self.items, (start,))
+        while position < len(self.items) and self.items[position][0] == start:
+            if self.items[position][2] == reservation_id:
+                del self.items[position]
+                # Слот могут занимать и соседние брони: маска дня
+                # пересчитывается по оставшимся (их немного)
+                self._rebuild_slots()
+                return
+            position += 1
+
+    def bitmap(self) -> str:
+        """Маска занятости строкой из 0 и 1, по символу на слот."""
+        return "".join(
+            "1" if self.slots >> slot & 1 else "0"
+            for slot in range(self.slot_count)
+        )
+
+    def as_dict(self, table_id: int) -> dict:
+        """Расписание в виде полей схемы TableSchedule."""
+        return {
+            "table_id": table_id,
+            "date": self.day,
+            "slot_minutes": self.slot_minutes,
+            "slots": self.bitmap(),
+            "reservations": [
+                {"reservation_id": reservation_id, "start": start, "end": end}
+                for start, end, reservation_id in self.items
+            ],
+        }
+
+
+def _days(start: datetime, end: datetime):
+    """Дни, которые пересекает интервал [start, end)."""
+    day = start.date()
+    while datetime.combine(day, datetime.min.time()) < end:
+        yield day
+        day += ONE_DAY
+
+
+class ScheduleCache:
+    """
+    Потокобезопасный LRU-кэш расписаний столиков по дням.
+
+    Аргументы:
+        max_size: Максимальное количество расписаний
+        ttl: Время жизни расписания в секундах
+        slot_minutes: Шаг слотов маски занятости
+    """
+
+    def __init__(
+        self,
+        max_size: int = SCHEDULE_CACHE_SIZE,
+        ttl: float = SCHEDULE_CACHE_TTL,
+        slot_minutes: int = SCHEDULE_SLOT_MINUTES,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.slot_minutes = slot_minutes
+        self._schedules = OrderedDict()
+        # Номера изменений столиков и всего кэша: расписание, во время
+        # загрузки которого столик менялся, не сохраняется
+        self._versions = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._schedules)
+
+    def _cached(self, key):
+        """Вернуть неустаревшее расписание и отметить обращение."""
+        with self._lock:
+            schedule = self._schedules.get(key)
+            if schedule is None:
+                return None
+            if time.monotonic() - schedule.loaded_at >= self.ttl:
+                del self._schedules[key]
+                return None
+            self._schedules.move_to_end(key)
+            return schedule
+
+    def _version(self, table_id: int):
+        """Номер изменений столика перед загрузкой из базы."""
+        with self._lock:
+            return self._epoch, self._versions.get(table_id, 0)
+
+    def _changed(self, table_id: int):
+        """Отметить изменение столика (вызывается под блокировкой)."""
+        self._versions[table_id] = self._versions.get(table_id, 0) + 1
+
+    def _install(self, key, schedule: DaySchedule, version):
+        """
+        Сохранить загруженное из базы расписание.
+        Если после начала загрузки столик менялся (version устарел),
+        расписание отдается только текущему запросу: в нем может не быть
+        добавленных или остаться удаленных за это время броней.
+        """
+        with self._lock:
+            if version != (self._epoch, self._versions.get(key[0], 0)):
+                return
+            self._schedules[key] = schedule
+            self._schedules.move_to_end(key)
+            while len(self._schedules) > self.max_size:
+                self._schedules.popitem(last=False)
+
+    def get(self, db: Session, table_id: int, day: date):
+        """
+        Получить расписание столика на день.
+        Аргументы:
+            db: Сессия базы данных (используется только для загрузки)
+            table_id: ID столика
+            day: День
+        Возвращает:
+            dict с полями схемы TableSchedule или None, если столик
+            не найден
+        """
+        key = (table_id, day)
+        schedule = self._cached(key)
+        if schedule is not None:
+            schedule_lookups.inc("hit")
+        else:
+            schedule_lookups.inc("miss")
+            version = self._version(table_id)
+            schedule = self._load(db, table_id, day)
+            if schedule is None:
+                return None
+            self._install(key, schedule, version)
+        with self._lock:
+            return schedule.as_dict(table_id)
+
+    def _load(self, db: Session, table_id: int, day: date):
+        """Загрузить расписание из базы; None, если столика нет."""
+        if db.get(Table, table_id) is None:
+            return None
+        origin = datetime.combine(day, datetime.min.time())
+        rows = db.execute(
+            select(
+                Reservation.reservation_time,
+                Reservation.end_time,
+                Reservation.id,
+            ).where(
+                Reservation.table_id == table_id,
+                overlap_condition(origin, origin + ONE_DAY),
+            )
+        ).all()
+        return DaySchedule(
+            day,
+            [
+                (naive_utc(start), naive_utc(end), reservation_id)
+                for start, end, reservation_id in rows
+            ],
+            self.slot_minutes,
+            time.monotonic(),
+        )
+
+    def add(
+        self, table_id: int, reservation_id: int,
+        start: datetime, end: datetime
+    ):
+        """Добавить бронь в загруженные расписания столика."""
+        start, end = naive_utc(start), naive_utc(end)
+        with self._lock:
+            self._changed(table_id)
+            for day in _days(start, end):
+                schedule = self._schedules.get((table_id, day))
+                if schedule is not None:
+                    schedule.add((start, end, reservation_id))
+
+    def remove(
+        self, table_id: int, reservation_id: int,
+        start: datetime, end: datetime
+    ):
+        """Удалить бронь из загруженных расписаний столика."""
+        start, end = naive_utc(start), naive_utc(end)
+        with self._lock:
+            self._changed(table_id)
+            for day in _days(start, end):
+                schedule = self._schedules.get((table_id, day))
+                if schedule is not None:
+                    schedule.remove(reservation_id, start)
+
+    def invalidate(self, table_id: int = None):
+        """Сбросить расписания столика (или все, если ID не задан)."""
+        with self._lock:
+            if table_id is None:
+                self._schedules.clear()
+                self._versions.clear()
+                self._epoch += 1
+                return
+            self._changed(table_id)
+            for key in [key for key in self._schedules if key[0] == table_id]:
+                del self._schedules[key]
+
+
+# Общий кэш расписаний процесса
+schedule_cache = ScheduleCache()
+
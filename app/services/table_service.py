@@ -1,20 +1,180 @@
+import os
+from typing import Optional
+
+from sqlalchemy import and_, exists, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.models.catalog_version import CatalogVersion
+from app.models.reservation import Reservation
 from app.models.table import Table
 from app.schemas.table import TableCreate
+from app.services.allocation_service import reassign_reservations
+from app.services.archive_service import (
+    archive_reservations,
+    move_to_archive,
+)
+from app.services.reservation_service import (
+    BULK_DELETE_CHUNK_SIZE,
+    delete_reservations,
+    forget_table,
+    lock_table_for_booking,
+    lock_table_for_booking_async,
+)
+from app.services.schedule_service import schedule_cache
+from app.utils.catalog_cache import VersionedCache
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.returning import (
+    delete_returning,
+    delete_returning_async,
+    insert_returning,
+    insert_returning_async,
+)
+from app.utils.serialization import rows_to_json
+from app.utils.timestamps import utc_now
+
+# Как часто сверять версию справочника столиков с базой (в секундах)
+TABLE_CATALOG_CHECK_INTERVAL = float(
+    os.getenv("TABLE_CATALOG_CHECK_INTERVAL", "1")
+)
+
+# Название справочника столиков в catalog_versions
+TABLES_CATALOG = "tables"
+
+# Поля столика в ответе (в порядке схемы Table)
+TABLE_FIELDS = ("name", "seats", "location", "id")
+TABLE_COLUMNS = tuple(getattr(Table, field) for field in TABLE_FIELDS)
+
+# Что делать с будущими бронями удаляемого столика
+REMOVAL_REJECT = "reject"
+REMOVAL_CANCEL = "cancel"
+REMOVAL_REASSIGN = "reassign"
 
+# Кэш страниц справочника столиков
+table_catalog = VersionedCache(TABLE_CATALOG_CHECK_INTERVAL)
 
-def get_tables(db: Session, skip: int = 0, limit: int = 100):
+
+def _tables_statement(
+    skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+    columns=None,
+):
+    """
+    Построить запрос списка столиков с курсором.
+    Если заданы columns, выбираются только эти колонки, а не ORM-объекты.
     """
-    Получить список столиков из базы данных с пагинацией.
+    query = select(*columns) if columns is not None else select(Table)
+    if cursor is not None:
+        (cursor_id,) = decode_cursor(cursor, int)
+        query = query.where(Table.id > cursor_id)
+    return query.order_by(Table.id).offset(skip).limit(limit)
+
+
+def get_tables(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    """
+    Получить список столиков из базы данных.
+    Записи упорядочены по id; курсор продолжает выборку после последнего
+    столика предыдущей страницы.
     Аргументы:
         db: Сессия базы данных
         skip: Количество пропускаемых записей
         limit: Лимит возвращаемых записей
+        cursor: Курсор следующей страницы (см. next_tables_cursor)
     Возвращает:
         Список объектов Table
+    Исключения:
+        ValueError: Если курсор некорректен
+    """
+    return db.execute(_tables_statement(skip, limit, cursor)).scalars().all()
+
+
+def next_tables_cursor(tables, limit: int) -> Optional[str]:
+    """
+    Получить курсор следующей страницы столиков.
+    Аргументы:
+        tables: Столики текущей страницы
+        limit: Лимит записей на странице
+    Возвращает:
+        str: Курсор или None, если страница последняя
     """
-    return db.query(Table).offset(skip).limit(limit).all()
+    if not tables or len(tables) < limit:
+        return None
+    return encode_cursor(tables[-1].id)
+
+
+def bump_catalog_version(db: Session):
+    """
+    Увеличить версию справочника столиков в текущей транзакции.
+    Аргументы:
+        db: Сессия базы данных
+    """
+    result = db.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.name == TABLES_CATALOG)
+        .values(version=CatalogVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.execute(
+            insert(CatalogVersion).values(name=TABLES_CATALOG, version=1)
+        )
+
+
+def tables_etag(version: int) -> str:
+    """Получить ETag справочника столиков для версии."""
+    return f'"tables-{version}"'
+
+
+def get_tables_catalog_version(db: Session) -> int:
+    """
+    Получить версию справочника столиков.
+    База читается не чаще раза в TABLE_CATALOG_CHECK_INTERVAL секунд.
+    Аргументы:
+        db: Сессия базы данных
+    Возвращает:
+        int: Номер версии
+    """
+    return table_catalog.version(lambda: db.execute(
+        select(CatalogVersion.version)
+        .where(CatalogVersion.name == TABLES_CATALOG)
+    ).scalar() or 0)
+
+
+def get_tables_page(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    """
+    Получить страницу справочника столиков, уже сериализованную в JSON.
+    Страницы кэшируются в памяти процесса до смены версии справочника.
+    Аргументы:
+        db: Сессия базы данных
+        skip: Количество пропускаемых записей
+        limit: Лимит возвращаемых записей
+        cursor: Курсор следующей страницы
+    Возвращает:
+        tuple: (версия, тело ответа, курсор следующей страницы или None)
+    Исключения:
+        ValueError: Если курсор некорректен
+    """
+    version = get_tables_catalog_version(db)
+    key = (skip, limit, cursor)
+    cached = table_catalog.get(key)
+    if cached is not None:
+        return (version,) + cached
+    tables = db.execute(_tables_statement(
+        skip, limit, cursor, columns=TABLE_COLUMNS
+    )).all()
+    body = rows_to_json(TABLE_FIELDS, tables)
+    entry = (body, next_tables_cursor(tables, limit))
+    table_catalog.put(version, key, entry)
+    return (version,) + entry
 
 
 def create_table(db: Session, table: TableCreate):
@@ -24,29 +184,206 @@ def create_table(db: Session, table: TableCreate):
         db: Сессия базы данных
         table: Данные для создания столика
     Возвращает:
-        Созданный объект Table
+        Строка созданного столика
     Исключения:
         SQLAlchemyError: При ошибке операции с базой данных
     """
-    db_table = Table(**table.dict())
-    db.add(db_table)
+    db_table = insert_returning(db, Table.__table__, table.dict())
+    bump_catalog_version(db)
     db.commit()
-    db.refresh(db_table)
+    table_catalog.invalidate()
     return db_table
 
 
+def _unreferenced_table(table_id: int):
+    """Условие: столик с этим ID, на который не ссылается ни одна бронь."""
+    return and_(
+        Table.id == table_id,
+        ~exists().where(Reservation.table_id == table_id),
+    )
+
+
 def delete_table(db: Session, table_id: int):
     """
     Удалить столик из базы данных по ID.
+    Столик удаляется под блокировкой бронирования и только если на него не
+    ссылается ни одна бронь (см. delete_table_with_reservations).
     Аргументы:
         db: Сессия базы данных
         table_id: ID удаляемого столика
     Возвращает:
-        Удаленный объект Table если найден, иначе None
+        Строка удаленного столика если найден и свободен от броней,
+        иначе None
     """
-    table = db.query(Table).filter(Table.id == table_id).first()
+    lock_table_for_booking(db, table_id)
+    table = delete_returning(
+        db, Table.__table__, _unreferenced_table(table_id)
+    )
     if table:
-        db.delete(table)
+        bump_catalog_version(db)
         db.commit()
+        table_catalog.invalidate()
+        schedule_cache.invalidate(table_id)
+        return table
+    db.rollback()
+    return None
+
+
+def _count_reservations(db: Session, *conditions) -> int:
+    """Количество броней, подходящих под условия."""
+    return db.execute(
+        select(func.count()).select_from(Reservation).where(*conditions)
+    ).scalar()
+
+
+def delete_table_with_reservations(
+    db: Session,
+    table_id: int,
+    mode: str = REMOVAL_REJECT,
+    chunk_size: int = BULK_DELETE_CHUNK_SIZE,
+):
+    """
+    Удалить столик вместе с его бронями.
+    Прошедшие брони сначала переносятся в архив пачками в коротких
+    транзакциях: это не меняет расписание столика. Остальное выполняется
+    одной транзакцией под блокировкой бронирования столика, поэтому новая
+    бронь не может появиться между проверкой и удалением, а при отказе
+    будущие брони остаются на месте. Будущие брони (не закончившиеся к
+    началу удаления) в режиме REMOVAL_REJECT запрещают удаление, в режиме
+    REMOVAL_CANCEL удаляются (delete_reservations), в режиме
+    REMOVAL_REASSIGN пересаживаются на другие столики
+    (reassign_reservations). Брони в ORM не загружаются.
+    Аргументы:
+        db: Сессия базы данных
+        table_id: ID удаляемого столика
+        mode: REMOVAL_REJECT, REMOVAL_CANCEL или REMOVAL_REASSIGN
+        chunk_size: Количество броней в одном запросе
+    Возвращает:
+        dict: deleted (удален ли столик), cancelled, reassigned, archived
+        и remaining (брони, из-за которых столик не удален) или None,
+        если столик не найден
+    """
+    found = db.execute(select(Table.id).where(Table.id == table_id)).first()
+    cutoff = utc_now()
+    upcoming = (
+        Reservation.table_id == table_id,
+        Reservation.end_time >= cutoff,
+    )
+    result = dict(
+        deleted=False, cancelled=0, reassigned=0, archived=0, remaining=0
+    )
+    # Предварительная проверка без блокировки: отказ без побочных эффектов
+    if found is not None and mode == REMOVAL_REJECT:
+        result["remaining"] = _count_reservations(db, *upcoming)
+    db.rollback()
+    if found is None:
+        return None
+    if result["remaining"]:
+        return result
+    result["archived"] = archive_reservations(
+        db, before=cutoff, batch_size=chunk_size, table_id=table_id
+    )
+    moves = {}
+    try:
+        if mode == REMOVAL_REASSIGN:
+            planned = reassign_reservations(
+                db, table_id, cutoff, chunk_size
+            )
+            if planned is None:
+                result["remaining"] = _count_reservations(db, *upcoming)
+                db.rollback()
+                return result
+            moves = planned
+            result["reassigned"] = len(moves)
+        else:
+            lock_table_for_booking(db, table_id)
+            if mode == REMOVAL_REJECT:
+                result["remaining"] = _count_reservations(db, *upcoming)
+                if result["remaining"]:
+                    db.rollback()
+                    return result
+            else:
+                result["cancelled"] = delete_reservations(
+                    db, table_id=table_id, ends_after=cutoff,
+                    chunk_size=chunk_size, commit=False,
+                )
+        # Брони в прошлом, созданные после архивации
+        stragglers = 0
+        while True:
+            moved, _ = move_to_archive(db, cutoff, chunk_size, table_id)
+            if not moved:
+                break
+            stragglers += moved
+        table = delete_returning(
+            db, Table.__table__, _unreferenced_table(table_id)
+        )
+        if table is None:
+            # Столик удален параллельно или бронь вставлена в обход
+            # блокировки
+            db.rollback()
+            found = db.execute(
+                select(Table.id).where(Table.id == table_id)
+            ).first()
+            remaining = _count_reservations(
+                db, Reservation.table_id == table_id
+            )
+            db.rollback()
+            if found is None:
+                return None
+            return dict(
+                result, cancelled=0, reassigned=0, remaining=remaining
+            )
+        result["archived"] += stragglers
+        bump_catalog_version(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        forget_table(table_id)
+        for target in set(moves.values()):
+            forget_table(target)
+    table_catalog.invalidate()
+    result["deleted"] = True
+    return result
+
+
+# Асинхронные варианты функций сервиса (используются при DATABASE_ASYNC)
+
+
+async def get_tables_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    """Асинхронный вариант get_tables."""
+    result = await db.execute(_tables_statement(skip, limit, cursor))
+    return result.scalars().all()
+
+
+async def create_table_async(db: AsyncSession, table: TableCreate):
+    """Асинхронный вариант create_table."""
+    db_table = await insert_returning_async(
+        db, Table.__table__, table.dict()
+    )
+    await db.run_sync(bump_catalog_version)
+    await db.commit()
+    table_catalog.invalidate()
+    return db_table
+
+
+async def delete_table_async(db: AsyncSession, table_id: int):
+    """Асинхронный вариант delete_table."""
+    await lock_table_for_booking_async(db, table_id)
+    table = await delete_returning_async(
+        db, Table.__table__, _unreferenced_table(table_id)
+    )
+    if table:
+        await db.run_sync(bump_catalog_version)
+        await db.commit()
+        table_catalog.invalidate()
+        schedule_cache.invalidate(table_id)
         return table
+    await db.rollback()
     return None
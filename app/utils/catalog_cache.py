@@ -0,0 +1,90 @@
+"""
+Кэш редко меняющегося справочника с номером версии.
+
+Номер версии хранится в базе и увеличивается при каждом изменении
+справочника, поэтому все воркеры видят изменения, сделанные другими.
+Кэш сверяет версию с базой не чаще раза в check_interval секунд и
+сбрасывает записи при ее смене. Версия используется и как ETag ответа.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+def parse_if_none_match(header: Optional[str]) -> set:
+    """
+    Разобрать заголовок If-None-Match.
+    Аргументы:
+        header: Значение заголовка
+    Возвращает:
+        set: Значения ETag без префикса слабой проверки
+    """
+    if not header:
+        return set()
+    tags = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tags.add(tag)
+    return tags
+
+
+class VersionedCache:
+    """
+    Потокобезопасный кэш записей одной версии справочника.
+
+    Аргументы:
+        check_interval: Как часто сверять версию с базой (в секундах)
+        max_entries: Максимальное количество записей
+    """
+
+    def __init__(self, check_interval: float, max_entries: int = 256):
+        self.check_interval = check_interval
+        self.max_entries = max_entries
+        self._version = None
+        self._checked_at = 0.0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def version(self, load_version: Callable[[], int]) -> int:
+        """
+        Получить текущую версию справочника.
+        Аргументы:
+            load_version: Функция чтения версии из базы
+        Возвращает:
+            int: Номер версии
+        """
+        now = time.monotonic()
+        if self._version is not None and (
+            now - self._checked_at < self.check_interval
+        ):
+            return self._version
+        version = load_version()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._checked_at = now
+        return version
+
+    def get(self, key):
+        """Получить запись текущей версии или None."""
+        return self._entries.get(key)
+
+    def put(self, version: int, key, value):
+        """Сохранить запись, если версия не изменилась."""
+        with self._lock:
+            if version != self._version:
+                return
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = value
+
+    def invalidate(self):
+        """Сбросить записи; следующая проверка версии пойдет в базу."""
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._checked_at = 0.0
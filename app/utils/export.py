@@ -0,0 +1,72 @@
+"""
+Форматирование выгрузок: NDJSON и CSV.
+
+Функции принимают пачки кортежей колонок и отдают по одному блоку байт
+на пачку, чтобы потоковый ответ писал в сокет крупными кусками.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+# Типы содержимого форматов выгрузки
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_value(value) -> str:
+    if isinstance(value, datetime):
+        return f'"{value.isoformat()}"'
+    if isinstance(value, int):
+        return str(value)
+    return json.dumps(value, ensure_ascii=False)
+
+
+def ndjson_chunks(columns, partitions):
+    """
+    Сформировать NDJSON: один объект с полями columns на строку.
+    Аргументы:
+        columns: Имена колонок
+        partitions: Пачки кортежей значений
+    Возвращает:
+        Генератор блоков байт
+    """
+    keys = [json.dumps(column) + ":" for column in columns]
+    for rows in partitions:
+        lines = [
+            "{" + ",".join(
+                key + _json_value(value) for key, value in zip(keys, row)
+            ) + "}\n"
+            for row in rows
+        ]
+        yield "".join(lines).encode()
+
+
+def csv_chunks(columns, partitions):
+    """
+    Сформировать CSV с заголовком; время выводится в ISO 8601, как в API.
+    Аргументы:
+        columns: Имена колонок (строка заголовка)
+        partitions: Пачки кортежей значений
+    Возвращает:
+        Генератор блоков байт
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    for rows in partitions:
+        writer.writerows(
+            [
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in row
+            ]
+            for row in rows
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -1,8 +1,163 @@
+import json
 import logging
+import os
+import queue
+import random
 import sys
-from logging.handlers import RotatingFileHandler
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
+from app.utils.metrics import Counter, registry
+
+# Асинхронное логирование: запрос только кладет запись в очередь,
+# форматирование и запись в файл выполняет фоновый поток
+LOG_ASYNC = os.getenv("LOG_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# Формат вывода: text или json (одна JSON-строка на запись)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+# Максимальное количество записей в очереди асинхронного логирования
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Доли сохраняемых записей по логгерам, например "app.slow_query=0.1"
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+
+TEXT_FORMAT = (
+    '[%(asctime)s] %(levelname)s|%(name)s|%(funcName)s|%(lineno)d'
+    ' - %(message)s'
+)
+# В асинхронном режиме функция и строка вызова не определяются
+ASYNC_TEXT_FORMAT = '[%(asctime)s] %(levelname)s|%(name)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+log_records_dropped = registry.register(Counter(
+    "log_records_dropped_total",
+    "Записи журнала, отброшенные из-за переполнения очереди",
+    locked=True,
+))
+log_records_sampled_out = registry.register(Counter(
+    "log_records_sampled_out_total",
+    "Записи журнала, отброшенные выборкой LOG_SAMPLING",
+    ("logger",),
+    locked=True,
+))
+
+# Фоновый поток записи журнала (только в асинхронном режиме)
+_listener = None
+
+
+def parse_sampling(value: str) -> dict:
+    """
+    Разобрать настройку выборки вида "логгер=доля,логгер=доля".
+    Аргументы:
+        value: Значение LOG_SAMPLING
+    Возвращает:
+        dict: Доля сохраняемых записей (от 0 до 1) по имени логгера
+    Исключения:
+        ValueError: Если доля не число или вне диапазона [0, 1]
+    """
+    rates = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, rate = item.partition("=")
+        rate = float(rate)
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Доля выборки вне [0, 1]: {item}")
+        rates[name.strip()] = rate
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Сохраняет заданную долю записей логгера и его потомков.
+    Записи уровня ERROR и выше сохраняются всегда.
+
+    Аргументы:
+        rates: Доля сохраняемых записей по имени логгера
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+        self._resolved = {}
+
+    def _rate(self, name: str):
+        """Доля для логгера: ближайший настроенный предок или None."""
+        if name not in self._resolved:
+            rate = None
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return self._resolved[name]
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        # Решение запоминается в записи: фильтр может стоять на
+        # нескольких обработчиках, а запись должна попасть во все или ни в один
+        keep = getattr(record, "_sampled", None)
+        if keep is None:
+            rate = self._rate(record.name)
+            keep = rate is None or random.random() < rate
+            record._sampled = keep
+            if not keep:
+                log_records_sampled_out.inc(record.name)
+        return keep
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись журнала."""
+
+    def format(self, record):
+        entry = {
+            "time": time.strftime(
+                "%Y-%m-%dT%H:%M:%S", time.localtime(record.created)
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.lineno:
+            entry["function"] = record.funcName
+            entry["line"] = record.lineno
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler, который не блокирует вызывающий поток.
+    При переполнении очереди запись отбрасывается и учитывается в метрике.
+    """
+
+    def prepare(self, record):
+        # Подставляем аргументы сразу (они могут измениться позже), а
+        # форматирование и трейсбек оставляем фоновому потоку.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc()
+
+
+class DrainingQueueListener(QueueListener):
+    """QueueListener, который при остановке ждет места в полной очереди."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
 
 def setup_logging():
     """
@@ -10,18 +165,27 @@ def setup_logging():
     Настройки включают:
     - Уровень логирования: INFO
     - Формат: [ВРЕМЯ] УРОВЕНЬ|МОДУЛЬ|ФУНКЦИЯ|СТРОКА - СООБЩЕНИЕ
+      (LOG_FORMAT=json - JSON-строки)
     - Выходные потоки: консоль (stdout) и файл (необязательно)
     - Ротация логов: при достижении 5 МБ создается новый файл, хранится 3 бэкапа
+    - LOG_ASYNC=true: запись ставится в ограниченную очередь, вывод и
+      ротацию выполняет фоновый поток; при переполнении записи
+      отбрасываются, функция и строка вызова не определяются
+    - LOG_SAMPLING: доля сохраняемых записей для шумных логгеров
     Пример вывода:
     [2023-10-15 14:30:45] INFO|app.main|startup_event|15 - Starting up the application...
     """
+    global _listener
 
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
-    formatter = logging.Formatter(
-        fmt='[%(asctime)s] %(levelname)s|%(name)s|%(funcName)s|%(lineno)d - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            fmt=ASYNC_TEXT_FORMAT if LOG_ASYNC else TEXT_FORMAT,
+            datefmt=DATE_FORMAT
+        )
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
     file_handler = RotatingFileHandler(
@@ -33,9 +197,38 @@ def setup_logging():
     file_handler.setFormatter(formatter)
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    rates = parse_sampling(LOG_SAMPLING)
+    if LOG_ASYNC:
+        # Без поиска кадра вызова для funcName/lineno
+        logging._srcfile = None
+        queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        if rates:
+            queue_handler.addFilter(SamplingFilter(rates))
+        root_logger.addHandler(queue_handler)
+        _listener = DrainingQueueListener(
+            queue_handler.queue, console_handler, file_handler,
+            respect_handler_level=True,
+        )
+        _listener.start()
+    else:
+        sampling = SamplingFilter(rates) if rates else None
+        for handler in (console_handler, file_handler):
+            if sampling is not None:
+                handler.addFilter(sampling)
+            root_logger.addHandler(handler)
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logger = logging.getLogger(__name__)
     logger.info("Logging system initialized")
+
+
+def stop_logging():
+    """
+    Остановить фоновый поток логирования, дописав записи из очереди.
+    В синхронном режиме ничего не делает.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,180 @@
+"""
+Метрики приложения в текстовом формате Prometheus.
+
+Коллекторы рассчитаны на горячий путь: значение с набором меток хранится
+в словаре по кортежу меток, обновление - это поиск в словаре и сложение.
+HTTP-метрики обновляются только из потока цикла событий (ASGI-middleware),
+поэтому блокировки им не нужны; метрики, которые обновляются из потоков
+пула (обработчики событий движка), создаются с locked=True.
+"""
+
+import threading
+from bisect import bisect_left
+
+# Границы корзин гистограмм длительности (в секундах)
+DURATION_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+# Границы корзин гистограммы количества запросов к базе
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\"", "\\\"")
+        .replace("\n", "\\n")
+    )
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value) -> str:
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else str(int(value))
+    return str(value)
+
+
+class _Metric:
+    """Общая часть коллекторов: имя, описание, метки, блокировка."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels=(), locked=False):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock() if locked else None
+
+    def _header(self):
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    """Монотонно растущий счетчик."""
+
+    kind = "counter"
+
+    def __init__(self, name, description, labels=(), locked=False):
+        super().__init__(name, description, labels, locked)
+        if not self.labels:
+            self._values[()] = 0
+
+    def inc(self, *labels, amount=1):
+        if self._lock is None:
+            self._values[labels] = self._values.get(labels, 0) + amount
+        else:
+            with self._lock:
+                self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        for labels, value in list(self._values.items()):
+            lines.append(
+                f"{self.name}{_format_labels(self.labels, labels)} "
+                f"{_format_number(value)}"
+            )
+        return lines
+
+
+class Gauge(Counter):
+    """Значение, которое может как расти, так и уменьшаться."""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными корзинами."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name, description, labels=(), buckets=DURATION_BUCKETS,
+        locked=False,
+    ):
+        super().__init__(name, description, labels, locked)
+        self.buckets = tuple(buckets)
+
+    def _observe(self, labels, value):
+        series = self._values.get(labels)
+        if series is None:
+            # [счетчики по корзинам + inf, сумма, количество]
+            series = self._values[labels] = [
+                [0] * (len(self.buckets) + 1), 0.0, 0
+            ]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def observe(self, value, *labels):
+        if self._lock is None:
+            self._observe(labels, value)
+        else:
+            with self._lock:
+                self._observe(labels, value)
+
+    def render(self):
+        lines = self._header()
+        for labels, (counts, total, count) in list(self._values.items()):
+            cumulative = 0
+            bounds = [_format_number(bound) for bound in self.buckets]
+            for bound, bucket in zip(bounds + ["+Inf"], counts):
+                cumulative += bucket
+                label_text = _format_labels(
+                    self.labels, labels, f'le="{bound}"'
+                )
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{label_text} {total!r}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Набор метрик и функций, которые выдают строки метрик при экспорте.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """Добавить функцию без аргументов, возвращающую строки метрик."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Выгрузить все метрики в текстовом формате Prometheus."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+# Общий реестр процесса
+registry = Registry()
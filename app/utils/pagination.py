@@ -0,0 +1,65 @@
+"""
+Курсоры для постраничной выборки по ключу (keyset pagination).
+
+Курсор - непрозрачная для клиента строка: значения ключа сортировки
+последней записи страницы, упакованные в JSON и base64url.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+# Заголовок ответа с курсором следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    """
+    Упаковать значения ключа сортировки в курсор.
+    Аргументы:
+        values: Значения ключа (int, str или datetime)
+    Возвращает:
+        str: Курсор
+    """
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_value(value, expected: type):
+    """Значение курсора ожидаемого типа (ValueError, если тип другой)."""
+    if expected is datetime:
+        if not isinstance(value, dict) or not isinstance(value.get("dt"), str):
+            raise ValueError("Некорректный курсор")
+        return datetime.fromisoformat(value["dt"])
+    # bool - подкласс int, но в курсоре таких значений не бывает
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise ValueError("Некорректный курсор")
+    return value
+
+
+def decode_cursor(cursor: str, *types: type) -> list:
+    """
+    Распаковать курсор в значения ключа сортировки.
+    Аргументы:
+        cursor: Курсор, полученный от encode_cursor
+        types: Ожидаемые типы значений по порядку (int, str или datetime)
+    Возвращает:
+        list: Значения ключа
+    Исключения:
+        ValueError: Если курсор поврежден или не подходит по формату
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("Некорректный курсор")
+        return [
+            _decode_value(value, expected)
+            for value, expected in zip(payload, types)
+        ]
+    except (ValueError, TypeError, KeyError) as error:
+        raise ValueError("Некорректный курсор") from error
@@ -0,0 +1,143 @@
+"""
+Статистика пула соединений с базой данных.
+
+Счетчики обновляются обработчиками событий пула SQLAlchemy, а время
+ожидания соединения измеряется в подклассе пула вокруг _do_get, то есть
+ровно там, где запрос стоит в очереди за свободным соединением.
+Счетчики обновляются без блокировок: под нагрузкой возможна погрешность
+в единицы, зато учет ничего не добавляет к времени выдачи соединения.
+"""
+
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Верхние границы корзин гистограммы ожидания соединения (в секундах)
+WAIT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0,
+)
+
+
+class PoolStats:
+    """
+    Счетчики и гистограмма ожидания одного пула соединений.
+
+    Атрибуты:
+        checkouts: Количество выдач соединений
+        checkins: Количество возвратов соединений
+        connects: Количество новых подключений к базе
+        invalidations: Количество инвалидированных соединений
+        timeouts: Количество превышений pool_timeout
+        wait_counts: Количество ожиданий по корзинам WAIT_BUCKETS (+ inf)
+        wait_sum: Суммарное время ожидания в секундах
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_counts = [0] * (len(WAIT_BUCKETS) + 1)
+        self.wait_sum = 0.0
+        self.pool = None
+
+    def observe_wait(self, seconds: float):
+        """Учесть время ожидания соединения."""
+        self.wait_counts[bisect_left(WAIT_BUCKETS, seconds)] += 1
+        self.wait_sum += seconds
+
+    def snapshot(self) -> dict:
+        """
+        Получить текущее состояние пула.
+        Возвращает:
+            dict: Счетчики, гистограмма ожидания и заполненность пула
+        """
+        pool = self.pool
+        histogram = {}
+        total = 0
+        for bound, count in zip(WAIT_BUCKETS + ("+Inf",), self.wait_counts):
+            total += count
+            histogram[str(bound)] = total
+        result = {
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "wait_seconds_sum": round(self.wait_sum, 6),
+            "wait_seconds_bucket": histogram,
+        }
+        if isinstance(pool, QueuePool):
+            result.update(
+                pool_size=pool.size(),
+                max_overflow=pool._max_overflow,
+                in_use=pool.checkedout(),
+                idle=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        return result
+
+
+class _WaitTimingMixin:
+    """Измерение ожидания соединения в пуле-очереди."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        began = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.observe_wait(time.perf_counter() - began)
+
+
+def instrumented_pool_class(stats: PoolStats, use_async: bool = False):
+    """
+    Создать класс пула, сообщающий время ожидания в stats.
+    Класс создается на каждый движок: при пересоздании пула SQLAlchemy
+    использует тот же класс, поэтому статистика сохраняется.
+    Аргументы:
+        stats: Статистика пула
+        use_async: Нужен ли пул для асинхронного движка
+    Возвращает:
+        type: Подкласс QueuePool или AsyncAdaptedQueuePool
+    """
+    base = AsyncAdaptedQueuePool if use_async else QueuePool
+    return type(
+        f"Instrumented{base.__name__}",
+        (_WaitTimingMixin, base),
+        {"stats": stats},
+    )
+
+
+def attach_pool_stats(engine, stats: PoolStats):
+    """
+    Подписать статистику на события пула движка.
+    Аргументы:
+        engine: Синхронный движок (для асинхронного - его sync_engine)
+        stats: Статистика пула
+    """
+    stats.pool = engine.pool
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, record, proxy):
+        stats.checkouts += 1
+        stats.pool = engine.pool
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, record):
+        stats.checkins += 1
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, record):
+        stats.connects += 1
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, record, exception):
+        stats.invalidations += 1
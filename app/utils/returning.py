@@ -0,0 +1,97 @@
+"""
+Запись строк за один запрос: INSERT/DELETE ... RETURNING.
+
+Функции возвращают строку таблицы (Row с атрибутами по именам колонок),
+а не ORM-объект: после commit() ORM-объект устаревает и первое обращение
+к его атрибутам стоит еще одного SELECT. Если диалект не поддерживает
+RETURNING, поведение эмулируется дополнительным SELECT.
+"""
+
+from sqlalchemy import delete, insert, select
+
+
+def _insert_statements(table, values: dict, returning: bool):
+    if returning:
+        return insert(table).values(**values).returning(*table.c), None
+    return insert(table).values(**values), select(*table.c)
+
+
+def _delete_statements(table, condition, returning: bool):
+    if returning:
+        return delete(table).where(condition).returning(*table.c), None
+    return delete(table).where(condition), select(*table.c).where(condition)
+
+
+def insert_returning(db, table, values: dict):
+    """
+    Вставить строку и получить ее вместе со сгенерированным ID.
+    Аргументы:
+        db: Сессия базы данных
+        table: Таблица (Model.__table__)
+        values: Значения колонок
+    Возвращает:
+        Row: Вставленная строка
+    """
+    dialect = db.get_bind().dialect
+    statement, lookup = _insert_statements(
+        table, values, dialect.insert_returning
+    )
+    result = db.execute(statement)
+    if lookup is None:
+        return result.one()
+    (key,) = table.primary_key.columns
+    return db.execute(
+        lookup.where(key == result.inserted_primary_key[0])
+    ).one()
+
+
+def delete_returning(db, table, condition):
+    """
+    Удалить строку и получить ее прежние значения.
+    Аргументы:
+        db: Сессия базы данных
+        table: Таблица (Model.__table__)
+        condition: Условие, выбирающее не больше одной строки
+    Возвращает:
+        Row: Удаленная строка или None, если строка не найдена
+    """
+    dialect = db.get_bind().dialect
+    statement, lookup = _delete_statements(
+        table, condition, dialect.delete_returning
+    )
+    if lookup is None:
+        return db.execute(statement).first()
+    row = db.execute(lookup).first()
+    if row is not None:
+        db.execute(statement)
+    return row
+
+
+async def insert_returning_async(db, table, values: dict):
+    """Асинхронный вариант insert_returning."""
+    dialect = db.get_bind().dialect
+    statement, lookup = _insert_statements(
+        table, values, dialect.insert_returning
+    )
+    result = await db.execute(statement)
+    if lookup is None:
+        return result.one()
+    (key,) = table.primary_key.columns
+    result = await db.execute(
+        lookup.where(key == result.inserted_primary_key[0])
+    )
+    return result.one()
+
+
+async def delete_returning_async(db, table, condition):
+    """Асинхронный вариант delete_returning."""
+    dialect = db.get_bind().dialect
+    statement, lookup = _delete_statements(
+        table, condition, dialect.delete_returning
+    )
+    if lookup is None:
+        return (await db.execute(statement)).first()
+    row = (await db.execute(lookup)).first()
+    if row is not None:
+        await db.execute(statement)
+    return row
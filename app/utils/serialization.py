@@ -0,0 +1,42 @@
+"""
+Быстрая сериализация ответов в JSON.
+
+Списки строк из базы кодируются сразу в байты, минуя проверку схемой
+ответа и jsonable_encoder. Если установлен orjson, используется он,
+иначе - стандартный json с тем же результатом (время в ISO 8601).
+"""
+
+import json
+from datetime import date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def dumps(value) -> bytes:
+    """Закодировать значение в JSON (UTF-8, без пробелов)."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+def rows_to_json(fields, rows) -> bytes:
+    """
+    Закодировать строки выборки как JSON-массив объектов.
+    Аргументы:
+        fields: Имена полей в порядке колонок строки (и схемы ответа)
+        rows: Кортежи значений
+    Возвращает:
+        bytes: Тело ответа
+    """
+    return dumps([dict(zip(fields, row)) for row in rows])
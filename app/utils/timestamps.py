@@ -0,0 +1,22 @@
+"""
+Приведение времени к формату хранения.
+
+Время броней хранится в базе в наивном UTC. Время с часовым поясом из
+запросов приводится к нему на входе (схемы броней, фильтры списков),
+поэтому проверки конфликтов, индекс, расписания и запись в базу
+сравнивают одни и те же значения.
+"""
+
+from datetime import datetime, timezone
+
+
+def naive_utc(moment: datetime) -> datetime:
+    """Привести время к наивному UTC, как оно хранится в базе."""
+    if moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def utc_now() -> datetime:
+    """Текущее время в наивном UTC."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
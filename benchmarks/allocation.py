@@ -0,0 +1,269 @@
+"""
+Бенчмарк автоматического выбора столиков на синтетических вечерах.
+
+Генерируется вечер: заявки компаний разного размера с началом с 17:00 до
+22:30 по сетке 15 минут. Столики - как в seed_database (2, 4, 6 и 8 мест
+по очереди). Сравниваются стратегии распределения без базы данных:
+    client_choice - клиент сам выбирает случайный свободный подходящий
+                    столик (как сейчас в виджете);
+    best_fit      - rank_tables для каждой заявки в порядке поступления;
+    batch         - plan_batch для всех заявок вечера сразу.
+Для каждой стратегии считаются принятые и отклоненные заявки (отдельно
+компании от ALLOCATION_LARGE_PARTY человек), лишние места за столиками и
+время выбора на заявку. Затем те же заявки бронируются через базу:
+allocate_reservation по одной и allocate_reservations_batch пакетом.
+
+Запуск:
+    python -m benchmarks.allocation --database-url sqlite:///bench.db \\
+        --tables 300 --requests 3000 --output bench-results/allocation.json
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+from app.models.reservation import Reservation
+from app.schemas.reservation import ReservationAutoCreate
+from app.services.allocation_service import (
+    TableTimeline,
+    allocate_reservation,
+    allocate_reservations_batch,
+    plan_batch,
+    rank_tables,
+)
+from app.services.reservation_service import forget_table
+from benchmarks.common import seed_database, summarize, write_results
+
+# Вечер, на который генерируются заявки
+EVENING = datetime(2030, 6, 1, 17, 0)
+
+# Размеры компаний и их доли в заявках
+PARTY_SIZES = (1, 2, 3, 4, 5, 6, 7, 8)
+PARTY_WEIGHTS = (5, 40, 10, 20, 8, 9, 4, 4)
+
+# Длительности броней (в минутах)
+DURATIONS = (60, 90, 120, 150)
+
+# Размер компании, начиная с которого она считается большой
+ALLOCATION_LARGE_PARTY = 6
+
+
+def table_seats(table_id: int) -> int:
+    """Вместимость столика, как в seed_database."""
+    return 2 + table_id % 4 * 2
+
+
+def make_timelines(tables: int) -> list:
+    """Пустые расписания столиков от меньших к большим."""
+    return sorted(
+        (
+            TableTimeline(table_id, table_seats(table_id))
+            for table_id in range(1, tables + 1)
+        ),
+        key=lambda timeline: (timeline.seats, timeline.table_id),
+    )
+
+
+def make_requests(count: int, rng: random.Random) -> list:
+    """Заявки вечера: (количество гостей, начало, конец) в порядке подачи."""
+    requests = []
+    for _ in range(count):
+        start = EVENING + timedelta(minutes=15 * rng.randrange(23))
+        duration = rng.choice(DURATIONS)
+        requests.append((
+            rng.choices(PARTY_SIZES, PARTY_WEIGHTS)[0],
+            start,
+            start + timedelta(minutes=duration),
+        ))
+    return requests
+
+
+def client_choice(tables: int, requests: list, rng: random.Random):
+    """Клиент выбирает случайный свободный подходящий столик."""
+    timelines = make_timelines(tables)
+    assigned = []
+    latencies = []
+    for index, (party_size, start, end) in enumerate(requests):
+        began = time.perf_counter()
+        free = [
+            timeline for timeline in timelines
+            if timeline.seats >= party_size
+            and not timeline.intervals.overlaps(start, end)
+        ]
+        timeline = rng.choice(free) if free else None
+        if timeline is not None:
+            timeline.intervals.add((start, end, index))
+        latencies.append(time.perf_counter() - began)
+        assigned.append(timeline and timeline.table_id)
+    return assigned, latencies
+
+
+def best_fit(tables: int, requests: list, rng: random.Random):
+    """Выбор rank_tables для каждой заявки в порядке поступления."""
+    timelines = make_timelines(tables)
+    assigned = []
+    latencies = []
+    for index, (party_size, start, end) in enumerate(requests):
+        began = time.perf_counter()
+        ranked = rank_tables(timelines, party_size, start, end)
+        timeline = ranked[0] if ranked else None
+        if timeline is not None:
+            timeline.intervals.add((start, end, index))
+        latencies.append(time.perf_counter() - began)
+        assigned.append(timeline and timeline.table_id)
+    return assigned, latencies
+
+
+def batch(tables: int, requests: list, rng: random.Random):
+    """Распределение всех заявок вечера plan_batch."""
+    timelines = make_timelines(tables)
+    began = time.perf_counter()
+    assigned = plan_batch(timelines, requests)
+    elapsed = time.perf_counter() - began
+    return assigned, [elapsed / len(requests)] * len(requests)
+
+
+STRATEGIES = {
+    "client_choice": client_choice,
+    "best_fit": best_fit,
+    "batch": batch,
+}
+
+
+def outcome(requests: list, assigned: list) -> dict:
+    """Принятые и отклоненные заявки и лишние места за столиками."""
+    accepted = [
+        (party_size, table_id)
+        for (party_size, _, _), table_id in zip(requests, assigned)
+        if table_id is not None
+    ]
+    large = [
+        table_id for (party_size, _, _), table_id in zip(requests, assigned)
+        if party_size >= ALLOCATION_LARGE_PARTY
+    ]
+    empty_seats = sum(
+        table_seats(table_id) - party_size
+        for party_size, table_id in accepted
+    )
+    return dict(
+        accepted=len(accepted),
+        rejected=len(requests) - len(accepted),
+        large_rejected=sum(table_id is None for table_id in large),
+        large_requested=len(large),
+        empty_seats_per_booking=round(
+            empty_seats / max(len(accepted), 1), 3
+        ),
+    )
+
+
+def auto_items(requests: list) -> list:
+    """Заявки в виде схем ReservationAutoCreate."""
+    return [
+        ReservationAutoCreate(
+            customer_name=f"Гость {index}",
+            party_size=party_size,
+            reservation_time=start,
+            duration_minutes=int((end - start).total_seconds() // 60),
+        )
+        for index, (party_size, start, end) in enumerate(requests)
+    ]
+
+
+def measure_database(database_url: str, requests: list) -> dict:
+    """Забронировать заявки через базу по одной и пакетом."""
+    engine = create_engine(database_url)
+    session_factory = sessionmaker(bind=engine)
+    items = auto_items(requests)
+    results = {}
+    with session_factory() as db:
+        latencies = []
+        accepted = 0
+        began = time.perf_counter()
+        for item in items:
+            call_began = time.perf_counter()
+            accepted += allocate_reservation(db, item) is not None
+            latencies.append(time.perf_counter() - call_began)
+        results["allocate_reservation"] = dict(
+            summarize(latencies, time.perf_counter() - began),
+            accepted=accepted,
+        )
+        db.execute(delete(Reservation))
+        db.commit()
+        forget_table()
+        began = time.perf_counter()
+        outcomes = allocate_reservations_batch(db, items)
+        results["allocate_reservations_batch"] = dict(
+            seconds=round(time.perf_counter() - began, 3),
+            accepted=sum(row is not None for row, _ in outcomes),
+        )
+    engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument("--tables", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--skip-database", action="store_true",
+        help="Измерить только распределение в памяти",
+    )
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    requests = make_requests(args.requests, random.Random(args.seed))
+    strategies = {}
+    for name, strategy in STRATEGIES.items():
+        assigned, latencies = strategy(
+            args.tables, requests, random.Random(args.seed)
+        )
+        strategies[name] = dict(
+            outcome(requests, assigned), latency=summarize(latencies)
+        )
+    database = None
+    if not args.skip_database:
+        seed_database(args.database_url, args.tables, 0)
+        database = measure_database(args.database_url, requests)
+    write_results(args.output, "allocation", args.database_url, dict(
+        tables=args.tables,
+        requests=args.requests,
+        strategies=strategies,
+        database=database,
+    ))
+
+    print(
+        f"{'стратегия':>14} {'принято':>8} {'отказ':>6} "
+        f"{'больших отказ':>14} {'лишних мест':>12} {'p50/p99, мс':>16}"
+    )
+    for name, result in strategies.items():
+        large = f"{result['large_rejected']}/{result['large_requested']}"
+        print(
+            f"{name:>14} {result['accepted']:>8} {result['rejected']:>6} "
+            f"{large:>14} {result['empty_seats_per_booking']:>12} "
+            f"{result['latency']['p50_ms']:>7.3f}/"
+            f"{result['latency']['p99_ms']:<8.3f}"
+        )
+    if database is not None:
+        single = database["allocate_reservation"]
+        print(
+            f"через базу по одной: принято {single['accepted']}, "
+            f"p50 {single['p50_ms']} мс, p99 {single['p99_ms']} мс"
+        )
+        whole = database["allocate_reservations_batch"]
+        print(
+            f"через базу пакетом: принято {whole['accepted']} "
+            f"за {whole['seconds']} с"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Сравнение синхронного и асинхронного пути работы с базой данных.
+
+Для каждого режима (DATABASE_ASYNC=false/true) запускает uvicorn в
+отдельном процессе и нагружает его заданным числом конкурентных клиентов.
+Выводит устойчивую пропускную способность и задержки p50/p99.
+
+Запуск:
+    python -m benchmarks.async_vs_sync --database-url sqlite:///bench.db \\
+        --clients 500 --duration 20
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.reservation import Reservation
+from app.models.table import Table
+
+
+def seed(database_url: str, tables: int, reservations: int):
+    """Заполнить базу данными для чтения."""
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.execute(delete(Reservation))
+        db.execute(delete(Table))
+        db.execute(insert(Table), [
+            {"id": i, "name": f"Столик {i}", "seats": 4, "location": "Зал"}
+            for i in range(1, tables + 1)
+        ])
+        epoch = datetime(2024, 6, 1, 12, 0)
+        rows = []
+        for number in range(reservations):
+            start = epoch + timedelta(hours=number // tables)
+            rows.append({
+                "customer_name": f"Гость {number}",
+                "table_id": number % tables + 1,
+                "reservation_time": start,
+                "duration_minutes": 60,
+                "end_time": start + timedelta(minutes=60),
+            })
+        db.execute(insert(Reservation), rows)
+        db.commit()
+    engine.dispose()
+
+
+async def wait_ready(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/docs")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("Сервер не запустился")
+
+
+async def load(base_url: str, path: str, clients: int, duration: float):
+    """Нагрузить сервер и вернуть (запросов в секунду, p50, p99, ошибок)."""
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                began = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - began)
+
+        began = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.monotonic() - began
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    return len(latencies) / elapsed, p50, p99, errors
+
+
+def run_mode(args, mode: str):
+    env = dict(
+        os.environ,
+        DATABASE_URL=args.database_url,
+        DATABASE_ASYNC="true" if mode == "async" else "false",
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(args.port), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_ready(base_url))
+        return asyncio.run(
+            load(base_url, args.path, args.clients, args.duration)
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--path", default="/reservations/?limit=20")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tables", type=int, default=50)
+    parser.add_argument("--reservations", type=int, default=5000)
+    args = parser.parse_args()
+
+    seed(args.database_url, args.tables, args.reservations)
+    print(
+        f"{'режим':>6} {'запр/с':>8} {'p50, мс':>9} "
+        f"{'p99, мс':>9} {'ошибок':>7}"
+    )
+    for mode in ("sync", "async"):
+        rps, p50, p99, errors = run_mode(args, mode)
+        print(f"{mode:>6} {rps:>8.0f} {p50:>9.1f} {p99:>9.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
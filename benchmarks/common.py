@@ -0,0 +1,148 @@
+"""
+Общие функции бенчмарков: заполнение базы, статистика задержек и запись
+результатов в JSON для сравнения между коммитами.
+"""
+
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import catalog_version  # noqa: F401 - таблица версий
+from app.models import reservation_archive  # noqa: F401 - архив броней
+from app.models.reservation import Reservation
+from app.models.table import Table
+
+# Начало расписания заполняемых броней
+SEED_EPOCH = datetime(2024, 6, 1, 12, 0)
+
+# Шаг расписания заполняемых броней одного столика (в минутах)
+SEED_SLOT_MINUTES = 120
+
+# Длительность заполняемых броней (в минутах)
+SEED_DURATION_MINUTES = 90
+
+# Размер пачки вставки при заполнении
+SEED_CHUNK = 10000
+
+
+def seed_database(database_url: str, tables: int, reservations: int):
+    """
+    Пересоздать данные: столики и непересекающиеся брони по расписанию.
+    Бронь номер n приходится на столик n % tables + 1 и слот n // tables.
+    Аргументы:
+        database_url: URL синхронного подключения
+        tables: Количество столиков
+        reservations: Количество броней
+    """
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.execute(delete(Reservation))
+        db.execute(delete(Table))
+        db.execute(insert(Table), [
+            {
+                "id": i,
+                "name": f"Столик {i}",
+                "seats": 2 + i % 4 * 2,
+                "location": "Зал",
+            }
+            for i in range(1, tables + 1)
+        ])
+        for offset in range(0, reservations, SEED_CHUNK):
+            rows = []
+            for number in range(
+                offset, min(offset + SEED_CHUNK, reservations)
+            ):
+                start = SEED_EPOCH + timedelta(
+                    minutes=SEED_SLOT_MINUTES * (number // tables)
+                )
+                rows.append({
+                    "customer_name": f"Гость {number}",
+                    "table_id": number % tables + 1,
+                    "reservation_time": start,
+                    "duration_minutes": SEED_DURATION_MINUTES,
+                    "end_time": start + timedelta(
+                        minutes=SEED_DURATION_MINUTES
+                    ),
+                })
+            db.execute(insert(Reservation), rows)
+        db.commit()
+    engine.dispose()
+
+
+def summarize(latencies, elapsed: float = None) -> dict:
+    """
+    Посчитать перцентили задержек.
+    Аргументы:
+        latencies: Задержки в секундах
+        elapsed: Время прогона в секундах (для расчета пропускной способности)
+    Возвращает:
+        dict: Количество, p50/p95/p99/max в миллисекундах и операций в секунду
+    """
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"count": 0}
+
+    def percentile(share):
+        position = min(len(ordered) - 1, int(len(ordered) * share))
+        return round(ordered[position] * 1000, 3)
+
+    result = {
+        "count": len(ordered),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+    if elapsed:
+        result["ops_per_second"] = round(len(ordered) / elapsed, 1)
+    return result
+
+
+def git_revision() -> str:
+    """Текущий коммит репозитория или None вне git."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path: str, benchmark: str, database_url: str, results):
+    """
+    Записать результаты в JSON вместе с описанием окружения.
+    Аргументы:
+        path: Путь к файлу (None - не записывать)
+        benchmark: Имя бенчмарка
+        database_url: URL базы данных (пароль в файл не попадает)
+        results: Результаты бенчмарка
+    Возвращает:
+        dict: Записанный документ
+    """
+    payload = {
+        "benchmark": benchmark,
+        "revision": git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "database": make_url(database_url).render_as_string(
+            hide_password=True
+        ),
+        "results": results,
+    }
+    text = json.dumps(payload, ensure_ascii=False, indent=2)
+    if path:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(text + "\n", encoding="utf-8")
+    return payload
+
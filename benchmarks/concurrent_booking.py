@@ -0,0 +1,121 @@
+"""
+Стресс-тест конкурентного бронирования.
+
+Несколько потоков одновременно отправляют тысячи пересекающихся броней
+на небольшое число столиков. После прогона проверяется, что в базе нет
+ни одной пары пересекающихся броней одного столика, и выводится
+пропускная способность для режимов:
+    per-table - create_reservation с блокировкой столика;
+    global    - та же логика под одной глобальной блокировкой процесса;
+    unsafe    - проверка и вставка без блокировки (для сравнения).
+
+Запуск:
+    python -m benchmarks.concurrent_booking --database-url sqlite:///bench.db
+"""
+
+import argparse
+import threading
+from datetime import timedelta
+
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.services.reservation_index import reservation_index
+from app.services.reservation_service import (
+    create_reservation,
+    reservation_conflict_exists,
+)
+from tests.booking_helpers import (
+    OVERLAPS_SQL,
+    book_concurrently,
+    make_requests,
+)
+
+
+def book_unsafe(db, reservation):
+    """Проверка и вставка отдельными шагами, как было до блокировок."""
+    end_time = reservation.reservation_time + timedelta(
+        minutes=reservation.duration_minutes
+    )
+    if reservation_conflict_exists(
+        db, reservation.table_id, reservation.reservation_time, end_time
+    ):
+        return None
+    db_reservation = Reservation(**reservation.dict())
+    db.add(db_reservation)
+    db.commit()
+    return db_reservation
+
+
+def run(session_factory, mode: str, requests, threads: int):
+    """Прогнать запросы в пуле потоков и вернуть (принято, секунды)."""
+    global_lock = threading.Lock()
+
+    def book_global(db, reservation):
+        with global_lock:
+            return create_reservation(db, reservation)
+
+    book = {
+        "unsafe": book_unsafe,
+        "global": book_global,
+    }.get(mode, create_reservation)
+    return book_concurrently(session_factory, book, requests, threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--tables", type=int, default=20)
+    parser.add_argument("--slots", type=int, default=24)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument(
+        "--modes", nargs="+", default=["per-table", "global", "unsafe"]
+    )
+    args = parser.parse_args()
+
+    connect_args = {}
+    if args.database_url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False, "timeout": 60}
+    engine = create_engine(
+        args.database_url,
+        connect_args=connect_args,
+        pool_size=args.threads,
+        max_overflow=0,
+    )
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(
+        autocommit=False, autoflush=False, bind=engine
+    )
+    requests = make_requests(args.requests, args.tables, args.slots)
+
+    failed = False
+    print(f"{'режим':>10} {'принято':>8} {'брони/с':>9} {'пересечений':>12}")
+    for mode in args.modes:
+        with session_factory() as db:
+            db.execute(delete(Reservation))
+            db.execute(delete(Table))
+            db.execute(insert(Table), [
+                {"id": i, "name": f"Столик {i}", "seats": 4, "location": "Зал"}
+                for i in range(1, args.tables + 1)
+            ])
+            db.commit()
+        reservation_index.invalidate()
+        accepted, seconds = run(session_factory, mode, requests, args.threads)
+        with session_factory() as db:
+            overlaps = db.execute(OVERLAPS_SQL).scalar()
+        print(
+            f"{mode:>10} {accepted:>8} {args.requests / seconds:>9.0f} "
+            f"{overlaps:>12}"
+        )
+        if mode != "unsafe" and overlaps:
+            failed = True
+    if failed:
+        raise SystemExit("Обнаружены двойные бронирования")
+
+
+if __name__ == "__main__":
+    main()
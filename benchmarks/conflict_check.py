@@ -0,0 +1,103 @@
+"""
+Бенчмарк проверки конфликта бронирования по базе данных.
+
+Заполняет отдельную базу заданным числом броней и измеряет задержку
+reservation_conflict_exists (диапазонный предикат по составному индексу).
+
+Запуск:
+    python -m benchmarks.conflict_check --database-url sqlite:///bench.db \\
+        --sizes 10000 100000 1000000
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.services.reservation_service import reservation_conflict_exists
+
+EPOCH = datetime(2020, 1, 1, 12, 0)
+SLOT_MINUTES = 120
+
+
+def seed(session, tables: int, reservations: int):
+    """Заполнить базу столиками и непересекающимися бронями."""
+    session.execute(delete(Reservation))
+    session.execute(delete(Table))
+    session.execute(insert(Table), [
+        {"id": i, "name": f"Столик {i}", "seats": 4, "location": "Зал"}
+        for i in range(1, tables + 1)
+    ])
+    batch = []
+    for number in range(reservations):
+        start = EPOCH + timedelta(minutes=SLOT_MINUTES * (number // tables))
+        batch.append({
+            "customer_name": f"Гость {number}",
+            "table_id": number % tables + 1,
+            "reservation_time": start,
+            "duration_minutes": 90,
+            "end_time": start + timedelta(minutes=90),
+        })
+        if len(batch) == 50000:
+            session.execute(insert(Reservation), batch)
+            batch.clear()
+    if batch:
+        session.execute(insert(Reservation), batch)
+    session.commit()
+
+
+def measure(session, tables: int, reservations: int, iterations: int):
+    """Измерить задержку проверки конфликта в миллисекундах."""
+    span = SLOT_MINUTES * max(reservations // tables, 1)
+    samples = []
+    for _ in range(iterations):
+        start = EPOCH + timedelta(minutes=random.randrange(span))
+        began = time.perf_counter()
+        reservation_conflict_exists(
+            session,
+            random.randint(1, tables),
+            start,
+            start + timedelta(minutes=90),
+        )
+        samples.append((time.perf_counter() - began) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p99": samples[int(len(samples) * 0.99) - 1],
+        "mean": statistics.fmean(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    print(f"{'броней':>10} {'p50, мс':>10} {'p99, мс':>10} {'ср., мс':>10}")
+    for size in args.sizes:
+        seed(session, args.tables, size)
+        result = measure(session, args.tables, size, args.iterations)
+        print(
+            f"{size:>10} {result['p50']:>10.3f} "
+            f"{result['p99']:>10.3f} {result['mean']:>10.3f}"
+        )
+    session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Задержка проверки конфликта в зависимости от объема истории броней.
+
+База заполняется текущими бронями на ближайшие недели, затем ступенями
+добавляются прошедшие брони (история). На каждой ступени измеряются:
+    conflict_sql       - reservation_conflict_exists (с нижней границей
+                         по reservation_time, overlap_condition);
+    conflict_unbounded - тот же запрос без нижней границы, как раньше;
+    index_load         - загрузка броней столика в индекс интервалов
+                         (только живое окно) и проверка по нему.
+После последней ступени история переносится в архив (archive_reservations)
+и измерения повторяются.
+
+Запуск:
+    python -m benchmarks.history_growth --database-url sqlite:///bench.db \\
+        --history 0 100000 500000 --output bench-results/history.json
+"""
+
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.reservation import Reservation
+from app.services.archive_service import archive_reservations
+from app.services.reservation_index import reservation_index, utc_now
+from app.services.reservation_service import reservation_conflict_exists
+from benchmarks.common import (
+    SEED_CHUNK,
+    SEED_DURATION_MINUTES,
+    SEED_SLOT_MINUTES,
+    seed_database,
+    summarize,
+    write_results,
+)
+
+
+def conflict_unbounded(db, table_id, start, end):
+    """Проверка конфликта без нижней границы по reservation_time."""
+    return db.execute(
+        select(Reservation.id).where(
+            Reservation.table_id == table_id,
+            Reservation.reservation_time < end,
+            Reservation.end_time > start,
+        ).limit(1)
+    ).first() is not None
+
+
+def index_load(db, table_id, start, end):
+    """Загрузить брони столика в индекс и проверить интервал."""
+    reservation_index.invalidate(table_id)
+    return reservation_index.has_conflict(db, table_id, start, end)
+
+
+CHECKS = {
+    "conflict_sql": reservation_conflict_exists,
+    "conflict_unbounded": conflict_unbounded,
+    "index_load": index_load,
+}
+
+
+def add_reservations(db, tables: int, first_slot, count: int, offset: int):
+    """
+    Добавить count броней по расписанию, начиная со слота first_slot.
+    Бронь номер n приходится на столик n % tables + 1.
+    """
+    for chunk_start in range(0, count, SEED_CHUNK):
+        rows = []
+        for number in range(chunk_start, min(chunk_start + SEED_CHUNK, count)):
+            start = first_slot + timedelta(
+                minutes=SEED_SLOT_MINUTES * (number // tables)
+            )
+            rows.append({
+                "customer_name": f"Гость {offset + number}",
+                "table_id": number % tables + 1,
+                "reservation_time": start,
+                "duration_minutes": SEED_DURATION_MINUTES,
+                "end_time": start + timedelta(minutes=SEED_DURATION_MINUTES),
+            })
+        db.execute(insert(Reservation), rows)
+    db.commit()
+
+
+def measure_checks(db, intervals, repeat: int) -> dict:
+    """Измерить все варианты проверки на одном наборе интервалов."""
+    results = {}
+    for name, check in CHECKS.items():
+        latencies = []
+        began = time.perf_counter()
+        for number in range(repeat):
+            table_id, start, end = intervals[number % len(intervals)]
+            call_began = time.perf_counter()
+            check(db, table_id, start, end)
+            latencies.append(time.perf_counter() - call_began)
+        results[name] = summarize(latencies, time.perf_counter() - began)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument("--tables", type=int, default=50)
+    parser.add_argument("--live", type=int, default=10000)
+    parser.add_argument(
+        "--history", type=int, nargs="+", default=[0, 100000, 500000],
+        help="Объем истории на каждой ступени (по возрастанию)",
+    )
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    seed_database(args.database_url, args.tables, 0)
+    engine = create_engine(args.database_url)
+    session_factory = sessionmaker(bind=engine)
+    rng = random.Random(args.seed)
+    today = utc_now().replace(hour=12, minute=0, second=0, microsecond=0)
+    live_start = today + timedelta(days=1)
+    live_slots = max(args.live // args.tables, 1)
+    intervals = []
+    for _ in range(1000):
+        start = live_start + timedelta(
+            minutes=SEED_SLOT_MINUTES * rng.randrange(live_slots)
+            + rng.choice([-60, 0, 30, 100])
+        )
+        intervals.append((
+            rng.randint(1, args.tables),
+            start,
+            start + timedelta(minutes=rng.choice([30, 60, 90])),
+        ))
+
+    steps = []
+    with session_factory() as db:
+        add_reservations(db, args.tables, live_start, args.live, 0)
+        history = 0
+        for target in sorted(args.history):
+            # История уходит в прошлое от позавчерашнего дня
+            added = target - history
+            slots = -(-added // args.tables)
+            first_slot = today - timedelta(
+                days=2, minutes=SEED_SLOT_MINUTES * (
+                    slots + history // args.tables
+                )
+            )
+            add_reservations(
+                db, args.tables, first_slot, added, args.live + history
+            )
+            history = target
+            steps.append(dict(
+                history=history,
+                checks=measure_checks(db, intervals, args.repeat),
+            ))
+            print(f"история {history}: готово")
+        began = time.perf_counter()
+        archived = archive_reservations(db, before=today - timedelta(days=1))
+        archive_seconds = time.perf_counter() - began
+        steps.append(dict(
+            history=0,
+            archived=archived,
+            archive_seconds=round(archive_seconds, 3),
+            checks=measure_checks(db, intervals, args.repeat),
+        ))
+    engine.dispose()
+    write_results(args.output, "history_growth", args.database_url, dict(
+        tables=args.tables,
+        live=args.live,
+        repeat=args.repeat,
+        steps=steps,
+    ))
+
+    print(f"{'история':>18} " + " ".join(
+        f"{name + ' p50/p99, мс':>32}" for name in CHECKS
+    ))
+    for step in steps:
+        label = str(step["history"])
+        if "archived" in step:
+            label = f"архив {step['archived']}"
+        print(f"{label:>18} " + " ".join(
+            f"{step['checks'][name]['p50_ms']:>15.3f}/"
+            f"{step['checks'][name]['p99_ms']:<16.3f}"
+            for name in CHECKS
+        ))
+
+
+if __name__ == "__main__":
+    main()
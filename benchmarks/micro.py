@@ -0,0 +1,243 @@
+"""
+Микробенчмарки горячих функций сервиса бронирований.
+
+Измеряются:
+    check_conflict_index - check_reservation_conflict (индекс в памяти);
+    check_conflict_sql   - reservation_conflict_exists (запрос к базе);
+    list_first_page      - get_reservations, первая страница;
+    list_by_table        - get_reservations с фильтром по столику;
+    list_time_window     - get_reservations с окном времени;
+    list_deep_cursor     - get_reservations, страница в середине выборки;
+    serialize_page       - сериализация страницы броней схемой ответа;
+    serialize_page_rows  - та же страница кортежами через rows_to_json;
+    list_page_orm        - выборка и сериализация страницы ORM-объектов
+                           схемой ответа (--page-size строк, как раньше);
+    list_page_rows       - то же через get_reservations_page.
+Для сериализации и страниц выводятся строки в секунду.
+Результаты пишутся в JSON (--output) для сравнения между коммитами.
+
+Запуск:
+    python -m benchmarks.micro --database-url sqlite:///bench.db \\
+        --reservations 100000 --output bench-results/micro.json
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.schemas.reservation import Reservation as ReservationSchema
+from app.schemas.reservation import ReservationCreate
+from app.services.reservation_index import reservation_index
+from app.services.reservation_service import (
+    RESERVATION_FIELDS,
+    check_reservation_conflict,
+    get_reservations,
+    get_reservations_page,
+    next_reservations_cursor,
+    reservation_conflict_exists,
+)
+from app.utils.serialization import rows_to_json
+from benchmarks.common import (
+    SEED_EPOCH,
+    SEED_SLOT_MINUTES,
+    seed_database,
+    summarize,
+    write_results,
+)
+
+
+def measure(function, arguments, repeat: int, warmup: int = 50):
+    """
+    Измерить задержку вызова функции на наборе аргументов.
+    Аргументы:
+        function: Измеряемая функция
+        arguments: Список кортежей аргументов (перебираются по кругу)
+        repeat: Количество измеряемых вызовов
+        warmup: Количество вызовов до начала измерения
+    Возвращает:
+        dict: Перцентили задержки и вызовов в секунду
+    """
+    for number in range(warmup):
+        function(*arguments[number % len(arguments)])
+    latencies = []
+    began = time.perf_counter()
+    for number in range(repeat):
+        call_began = time.perf_counter()
+        function(*arguments[number % len(arguments)])
+        latencies.append(time.perf_counter() - call_began)
+    return summarize(latencies, time.perf_counter() - began)
+
+
+def serialize_page(reservations):
+    """Сериализовать страницу броней так же, как ответ API."""
+    if hasattr(ReservationSchema, "model_validate"):
+        return json.dumps([
+            ReservationSchema.model_validate(item).model_dump(mode="json")
+            for item in reservations
+        ])
+    return json.dumps([
+        json.loads(ReservationSchema.from_orm(item).json())
+        for item in reservations
+    ])
+
+
+def with_rows_per_second(summary: dict, page_size: int) -> dict:
+    """Дополнить результат размером страницы и строками в секунду."""
+    return dict(
+        summary,
+        page_size=page_size,
+        rows_per_second=round(summary["ops_per_second"] * page_size),
+    )
+
+
+def run(
+    db, tables: int, reservations: int, repeat: int, seed: int,
+    page_size: int = 1000,
+):
+    """Выполнить все микробенчмарки и вернуть результаты по имени."""
+    rng = random.Random(seed)
+    slots = max(reservations // tables, 1)
+
+    def random_request():
+        start = SEED_EPOCH + timedelta(
+            minutes=SEED_SLOT_MINUTES * rng.randrange(slots)
+            + rng.choice([-60, 0, 30, 100])
+        )
+        return ReservationCreate(
+            customer_name="Гость",
+            table_id=rng.randint(1, tables),
+            reservation_time=start,
+            duration_minutes=rng.choice([30, 60, 90]),
+        )
+
+    requests = [random_request() for _ in range(1000)]
+    intervals = [
+        (
+            request.table_id,
+            request.reservation_time,
+            request.reservation_time + timedelta(
+                minutes=request.duration_minutes
+            ),
+        )
+        for request in requests
+    ]
+    windows = []
+    for _ in range(100):
+        day = SEED_EPOCH + timedelta(days=rng.randrange(max(slots // 12, 1)))
+        windows.append((day, day + timedelta(days=1)))
+
+    middle = get_reservations(db, skip=reservations // 2, limit=1)
+    deep_cursor = next_reservations_cursor(middle, 1)
+    page = get_reservations(db, limit=100)
+    page_rows = [
+        tuple(getattr(item, field) for field in RESERVATION_FIELDS)
+        for item in page
+    ]
+
+    reservation_index.invalidate()
+    return {
+        "check_conflict_index": measure(
+            lambda request: check_reservation_conflict(db, request),
+            [(request,) for request in requests], repeat,
+        ),
+        "check_conflict_sql": measure(
+            lambda table_id, start, end: reservation_conflict_exists(
+                db, table_id, start, end
+            ),
+            intervals, repeat,
+        ),
+        "list_first_page": measure(
+            lambda: get_reservations(db, limit=20), [()], repeat,
+        ),
+        "list_by_table": measure(
+            lambda table_id: get_reservations(db, limit=20, table_id=table_id),
+            [(table_id,) for table_id in range(1, tables + 1)], repeat,
+        ),
+        "list_time_window": measure(
+            lambda time_from, time_to: get_reservations(
+                db, limit=50, time_from=time_from, time_to=time_to
+            ),
+            windows, repeat,
+        ),
+        "list_deep_cursor": measure(
+            lambda: get_reservations(db, limit=20, cursor=deep_cursor),
+            [()], repeat,
+        ),
+        "serialize_page": with_rows_per_second(
+            measure(serialize_page, [(page,)], repeat), len(page),
+        ),
+        "serialize_page_rows": with_rows_per_second(
+            measure(
+                lambda rows: rows_to_json(RESERVATION_FIELDS, rows),
+                [(page_rows,)], repeat,
+            ),
+            len(page_rows),
+        ),
+        "list_page_orm": with_rows_per_second(
+            measure(
+                lambda: serialize_page(get_reservations(db, limit=page_size)),
+                [()], repeat,
+            ),
+            page_size,
+        ),
+        "list_page_rows": with_rows_per_second(
+            measure(
+                lambda: get_reservations_page(db, limit=page_size),
+                [()], repeat,
+            ),
+            page_size,
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument("--tables", type=int, default=50)
+    parser.add_argument("--reservations", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--no-seed", action="store_true")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    if not args.no_seed:
+        seed_database(args.database_url, args.tables, args.reservations)
+    engine = create_engine(args.database_url)
+    with sessionmaker(bind=engine)() as db:
+        results = run(
+            db, args.tables, args.reservations, args.repeat, args.seed,
+            args.page_size,
+        )
+    engine.dispose()
+    write_results(args.output, "micro", args.database_url, dict(
+        tables=args.tables,
+        reservations=args.reservations,
+        repeat=args.repeat,
+        benchmarks=results,
+    ))
+
+    print(
+        f"{'бенчмарк':>21} {'p50, мс':>8} {'p95, мс':>8} "
+        f"{'p99, мс':>8} {'выз/с':>9} {'строк/с':>10}"
+    )
+    for name, summary in results.items():
+        rows = summary.get("rows_per_second")
+        print(
+            f"{name:>21} {summary['p50_ms']:>8.3f} {summary['p95_ms']:>8.3f} "
+            f"{summary['p99_ms']:>8.3f} {summary['ops_per_second']:>9.0f} "
+            f"{rows if rows is not None else '':>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
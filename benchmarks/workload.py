@@ -0,0 +1,328 @@
+"""
+Нагрузочный прогон API в процессе по сценарию из JSONL-файла.
+
+Приложение app.main:app вызывается напрямую через ASGI-транспорт httpx,
+без сети и отдельного сервера, поэтому измеряется время самого
+приложения и базы. База берется из DATABASE_URL (SQLite или локальный
+PostgreSQL) и перед прогоном заполняется заново.
+
+Каждая строка сценария - одна операция:
+    {"op": "list", "params": {"limit": 20, "table_id": 3}}
+    {"op": "book", "id": "b1", "table_id": 3,
+     "reservation_time": "2030-01-01T12:00:00", "duration_minutes": 90,
+     "customer_name": "Гость"}
+    {"op": "conflict", "ref": "b1"}   - повтор брони b1, ожидается 400
+    {"op": "cancel", "ref": "b1"}     - отмена брони b1
+Операции conflict и cancel ждут завершения брони, на которую ссылаются,
+и пропускаются, если она не была создана.
+
+Сгенерировать сценарий:
+    python -m benchmarks.workload generate --operations 5000 \\
+        --mix list=60 book=25 conflict=10 cancel=5 \\
+        --output benchmarks/workloads/mixed.jsonl
+
+Прогнать сценарий:
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.workload run \\
+        --workload benchmarks/workloads/mixed.jsonl --concurrency 16 \\
+        --output bench-results/workload.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.database import SQLALCHEMY_DATABASE_URL, async_engine
+from benchmarks.common import (
+    SEED_EPOCH,
+    SEED_SLOT_MINUTES,
+    seed_database,
+    summarize,
+    write_results,
+)
+
+# Начало расписания броней сценария (после заполненных броней)
+BOOK_EPOCH = datetime(2030, 1, 1, 12, 0)
+
+# Ожидаемый статус ответа для каждой операции
+EXPECTED_STATUS = {
+    "list": 200,
+    "book": 201,
+    "conflict": 400,
+    "cancel": 200,
+}
+
+
+def generate(operations: int, mix: dict, tables: int, seed: int):
+    """
+    Сгенерировать сценарий с заданной долей операций.
+    Брони сценария не пересекаются между собой и с заполненными бронями;
+    конфликт и отмена ссылаются только на еще не отмененные брони.
+    Аргументы:
+        operations: Количество операций
+        mix: Доли операций, например {"list": 60, "book": 25, ...}
+        tables: Количество столиков в заполненной базе
+        seed: Зерно генератора случайных чисел
+    Возвращает:
+        list: Операции сценария
+    """
+    rng = random.Random(seed)
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    next_slot = {}
+    active = []
+    workload = []
+    for number in range(operations):
+        kind = rng.choices(kinds, weights)[0]
+        if kind in ("conflict", "cancel") and not active:
+            kind = "book"
+        if kind == "list":
+            workload.append(
+                {"op": "list", "params": _list_params(rng, tables)}
+            )
+        elif kind == "book":
+            table_id = rng.randint(1, tables)
+            slot = next_slot.get(table_id, 0)
+            next_slot[table_id] = slot + 1
+            start = BOOK_EPOCH + timedelta(minutes=SEED_SLOT_MINUTES * slot)
+            booking_id = f"b{number}"
+            workload.append({
+                "op": "book",
+                "id": booking_id,
+                "table_id": table_id,
+                "reservation_time": start.isoformat(),
+                "duration_minutes": rng.choice([60, 90, 120]),
+                "customer_name": f"Гость сценария {number}",
+            })
+            active.append(booking_id)
+        elif kind == "conflict":
+            workload.append({"op": "conflict", "ref": rng.choice(active)})
+        else:
+            position = rng.randrange(len(active))
+            active[position], active[-1] = active[-1], active[position]
+            workload.append({"op": "cancel", "ref": active.pop()})
+    return workload
+
+
+def _list_params(rng, tables: int) -> dict:
+    """Параметры списка броней: первая страница, фильтры, окно времени."""
+    variant = rng.randrange(4)
+    if variant == 0:
+        return {"limit": 20}
+    if variant == 1:
+        return {"limit": 20, "table_id": rng.randint(1, tables)}
+    if variant == 2:
+        day = SEED_EPOCH + timedelta(days=rng.randrange(30))
+        return {
+            "limit": 50,
+            "from": day.isoformat(),
+            "to": (day + timedelta(days=1)).isoformat(),
+        }
+    return {"limit": 20, "customer_name": f"Гость {rng.randrange(100)}"}
+
+
+def load_workload(path: str):
+    """Прочитать сценарий из JSONL-файла (пустые строки пропускаются)."""
+    with open(path, encoding="utf-8") as source:
+        return [json.loads(line) for line in source if line.strip()]
+
+
+class Replay:
+    """
+    Воспроизведение сценария несколькими конкурентными клиентами.
+
+    Аргументы:
+        client: Клиент httpx с ASGI-транспортом приложения
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.latencies = {kind: [] for kind in EXPECTED_STATUS}
+        self.unexpected = {kind: 0 for kind in EXPECTED_STATUS}
+        self.skipped = 0
+        self.bookings = {}
+
+    def _booking(self, booking_id):
+        """Событие завершения брони сценария и ответ на нее."""
+        if booking_id not in self.bookings:
+            self.bookings[booking_id] = [asyncio.Event(), None]
+        return self.bookings[booking_id]
+
+    async def _request(self, operation, reservation):
+        kind = operation["op"]
+        if kind == "list":
+            return await self.client.get(
+                "/reservations/", params=operation.get("params", {})
+            )
+        if kind == "book":
+            body = {
+                key: operation[key]
+                for key in (
+                    "customer_name", "table_id",
+                    "reservation_time", "duration_minutes",
+                )
+            }
+            return await self.client.post("/reservations/", json=body)
+        if kind == "conflict":
+            body = {
+                key: reservation[key]
+                for key in (
+                    "customer_name", "table_id",
+                    "reservation_time", "duration_minutes",
+                )
+            }
+            return await self.client.post("/reservations/", json=body)
+        return await self.client.delete(f"/reservations/{reservation['id']}")
+
+    async def execute(self, operation):
+        kind = operation["op"]
+        try:
+            reservation = None
+            if kind in ("conflict", "cancel"):
+                done, _ = self._booking(operation["ref"])
+                await done.wait()
+                reservation = self.bookings[operation["ref"]][1]
+                if reservation is None:
+                    self.skipped += 1
+                    return
+            began = time.perf_counter()
+            response = await self._request(operation, reservation)
+            elapsed = time.perf_counter() - began
+            self.latencies[kind].append(elapsed)
+            if response.status_code != EXPECTED_STATUS[kind]:
+                self.unexpected[kind] += 1
+            elif kind == "book":
+                self._booking(operation["id"])[1] = response.json()
+        finally:
+            if kind == "book":
+                self._booking(operation["id"])[0].set()
+
+    async def run(self, workload, concurrency: int) -> float:
+        """Выполнить сценарий и вернуть время прогона в секундах."""
+        operations = iter(workload)
+
+        async def worker():
+            for operation in operations:
+                await self.execute(operation)
+
+        began = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - began
+
+
+async def replay(workload, concurrency: int):
+    """Прогнать сценарий через приложение и собрать результаты."""
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://benchmark", timeout=60
+    ) as client:
+        runner = Replay(client)
+        elapsed = await runner.run(workload, concurrency)
+    if async_engine is not None:
+        await async_engine.dispose()
+    operations = sum(len(values) for values in runner.latencies.values())
+    return {
+        "operations": operations,
+        "skipped": runner.skipped,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "ops_per_second": round(operations / elapsed, 1),
+        "endpoints": {
+            kind: dict(
+                summarize(latencies, elapsed),
+                unexpected_status=runner.unexpected[kind],
+            )
+            for kind, latencies in runner.latencies.items()
+        },
+    }
+
+
+def parse_mix(values) -> dict:
+    """Разобрать доли операций вида list=60 book=25."""
+    mix = {}
+    for value in values:
+        kind, _, weight = value.partition("=")
+        if kind not in EXPECTED_STATUS:
+            raise SystemExit(f"Неизвестная операция: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser("generate")
+    generate_parser.add_argument("--operations", type=int, default=5000)
+    generate_parser.add_argument(
+        "--mix", nargs="+",
+        default=["list=60", "book=25", "conflict=10", "cancel=5"],
+    )
+    generate_parser.add_argument("--tables", type=int, default=50)
+    generate_parser.add_argument("--seed", type=int, default=1)
+    generate_parser.add_argument("--output", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--workload", required=True)
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--tables", type=int, default=50)
+    run_parser.add_argument("--reservations", type=int, default=20000)
+    run_parser.add_argument("--output")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        workload = generate(
+            args.operations, parse_mix(args.mix), args.tables, args.seed
+        )
+        with open(args.output, "w", encoding="utf-8") as target:
+            for operation in workload:
+                target.write(json.dumps(operation, ensure_ascii=False))
+                target.write("\n")
+        return
+
+    workload = load_workload(args.workload)
+    seed_database(SQLALCHEMY_DATABASE_URL, args.tables, args.reservations)
+    # Журнал каждого запроса искажает задержки
+    for name in ("app", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    results = asyncio.run(replay(workload, args.concurrency))
+    results.update(
+        workload=args.workload,
+        tables=args.tables,
+        reservations=args.reservations,
+    )
+    write_results(
+        args.output, "workload", SQLALCHEMY_DATABASE_URL, results
+    )
+
+    print(
+        f"{'операция':>9} {'кол-во':>7} {'p50, мс':>8} {'p95, мс':>8} "
+        f"{'p99, мс':>8} {'неожид.':>8}"
+    )
+    for kind, summary in results["endpoints"].items():
+        if not summary["count"]:
+            continue
+        print(
+            f"{kind:>9} {summary['count']:>7} {summary['p50_ms']:>8.2f} "
+            f"{summary['p95_ms']:>8.2f} {summary['p99_ms']:>8.2f} "
+            f"{summary['unexpected_status']:>8}"
+        )
+    print(
+        f"всего {results['operations']} операций, "
+        f"{results['ops_per_second']:.0f} оп/с, "
+        f"пропущено {results['skipped']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
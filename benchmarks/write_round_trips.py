@@ -0,0 +1,193 @@
+"""
+Количество запросов и задержка записи: RETURNING против commit/refresh.
+
+Сравниваются создание и удаление брони и столика двумя способами:
+    orm       - add + commit + refresh и SELECT + delete + commit,
+                как сервисы работали раньше;
+    returning - текущие сервисы (INSERT/DELETE ... RETURNING).
+Запросы к базе считаются обработчиком before_cursor_execute движка.
+
+Запуск:
+    python -m benchmarks.write_round_trips --database-url sqlite:///bench.db \\
+        --operations 2000 --output bench-results/write_round_trips.json
+"""
+
+import argparse
+import time
+from datetime import timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.schemas.reservation import ReservationCreate
+from app.schemas.table import TableCreate
+from app.services.reservation_service import (
+    create_reservation,
+    delete_reservation,
+    lock_table_for_booking,
+    reservation_conflict_exists,
+)
+from app.services.table_service import (
+    bump_catalog_version,
+    create_table,
+    delete_table,
+)
+from benchmarks.common import (
+    SEED_EPOCH,
+    seed_database,
+    summarize,
+    write_results,
+)
+
+
+def create_reservation_orm(db, reservation):
+    """Создание брони через ORM: add, commit, refresh."""
+    end_time = reservation.reservation_time + timedelta(
+        minutes=reservation.duration_minutes
+    )
+    lock_table_for_booking(db, reservation.table_id)
+    if reservation_conflict_exists(
+        db, reservation.table_id, reservation.reservation_time, end_time
+    ):
+        db.rollback()
+        return None
+    db_reservation = Reservation(**reservation.dict())
+    db.add(db_reservation)
+    db.commit()
+    db.refresh(db_reservation)
+    return db_reservation
+
+
+def delete_reservation_orm(db, reservation_id):
+    """Удаление брони через ORM: SELECT, delete, commit."""
+    reservation = (
+        db.query(Reservation).filter(Reservation.id == reservation_id).first()
+    )
+    if reservation:
+        db.delete(reservation)
+        db.commit()
+    return reservation
+
+
+def create_table_orm(db, table):
+    db_table = Table(**table.dict())
+    db.add(db_table)
+    bump_catalog_version(db)
+    db.commit()
+    db.refresh(db_table)
+    return db_table
+
+
+def delete_table_orm(db, table_id):
+    table = db.query(Table).filter(Table.id == table_id).first()
+    if table:
+        db.delete(table)
+        bump_catalog_version(db)
+        db.commit()
+    return table
+
+
+VARIANTS = {
+    "orm": (
+        create_reservation_orm, delete_reservation_orm,
+        create_table_orm, delete_table_orm,
+    ),
+    "returning": (
+        create_reservation, delete_reservation, create_table, delete_table,
+    ),
+}
+
+
+def run_variant(session_factory, counter, variant: str, operations: int):
+    """Выполнить операции одним способом; вернуть результаты по операциям."""
+    book, cancel, add_table, remove_table = VARIANTS[variant]
+    latencies = {name: [] for name in (
+        "create_reservation", "delete_reservation",
+        "create_table", "delete_table",
+    )}
+    queries = dict.fromkeys(latencies, 0)
+
+    def timed(name, function, *arguments):
+        counter["queries"] = 0
+        with session_factory() as db:
+            began = time.perf_counter()
+            result = function(db, *arguments)
+            # Ответ API читает поля результата: для ORM-объекта после
+            # commit это и есть refresh
+            result_id = result.id
+            latencies[name].append(time.perf_counter() - began)
+        queries[name] += counter["queries"]
+        return result_id
+
+    base = SEED_EPOCH + timedelta(days=3650 + operations)
+    for number in range(operations):
+        reservation_id = timed("create_reservation", book, ReservationCreate(
+            customer_name=f"Гость {variant} {number}",
+            table_id=1,
+            reservation_time=base + timedelta(hours=2 * number),
+            duration_minutes=60,
+        ))
+        timed("delete_reservation", cancel, reservation_id)
+        table_id = timed("create_table", add_table, TableCreate(
+            name=f"Столик {variant} {number}", seats=4, location="Зал"
+        ))
+        timed("delete_table", remove_table, table_id)
+    return {
+        name: dict(
+            summarize(values),
+            queries_per_operation=round(queries[name] / operations, 2),
+        )
+        for name, values in latencies.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    seed_database(args.database_url, 10, 0)
+    engine = create_engine(args.database_url)
+    counter = {"queries": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_):
+        counter["queries"] += 1
+
+    session_factory = sessionmaker(
+        autocommit=False, autoflush=False, bind=engine
+    )
+    results = {
+        variant: run_variant(
+            session_factory, counter, variant, args.operations
+        )
+        for variant in VARIANTS
+    }
+    engine.dispose()
+    write_results(args.output, "write_round_trips", args.database_url, dict(
+        operations=args.operations, variants=results,
+    ))
+
+    print(
+        f"{'операция':>19} {'способ':>10} {'запросов':>9} "
+        f"{'p50, мс':>8} {'p99, мс':>8}"
+    )
+    for name in results["orm"]:
+        for variant in VARIANTS:
+            summary = results[variant][name]
+            print(
+                f"{name:>19} {variant:>10} "
+                f"{summary['queries_per_operation']:>9.2f} "
+                f"{summary['p50_ms']:>8.3f} {summary['p99_ms']:>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Общие помощники конкурентного бронирования для тестов и стресс-теста
+benchmarks.concurrent_booking.
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.schemas.reservation import ReservationCreate
+
+EPOCH = datetime(2024, 6, 1, 18, 0)
+
+# Количество пар пересекающихся броней одного столика
+OVERLAPS_SQL = text(
+    "SELECT COUNT(*) FROM reservations a JOIN reservations b"
+    " ON a.table_id = b.table_id AND a.id < b.id"
+    " AND a.reservation_time < b.end_time"
+    " AND b.reservation_time < a.end_time"
+)
+
+
+def make_requests(count: int, tables: int, slots: int, start=EPOCH):
+    """Сгенерировать пересекающиеся запросы на бронирование."""
+    return [
+        ReservationCreate(
+            customer_name=f"Гость {number}",
+            table_id=random.randint(1, tables),
+            reservation_time=start + timedelta(
+                minutes=15 * random.randrange(slots)
+            ),
+            duration_minutes=random.choice([60, 90, 120]),
+        )
+        for number in range(count)
+    ]
+
+
+def book_concurrently(session_factory, book, requests, threads: int):
+    """
+    Выполнить book(db, запрос) для всех запросов в пуле потоков.
+    Аргументы:
+        session_factory: Фабрика сессий (своя сессия на каждый запрос)
+        book: Функция бронирования, возвращающая бронь или None
+        requests: Список ReservationCreate
+        threads: Количество потоков
+    Возвращает:
+        tuple: (количество принятых броней, секунды)
+    """
+    def attempt(reservation):
+        with session_factory() as db:
+            return book(db, reservation) is not None
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        accepted = sum(executor.map(attempt, requests))
+    return accepted, time.perf_counter() - began
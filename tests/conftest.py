@@ -0,0 +1,70 @@
+"""
+Общие фикстуры тестов.
+
+Тесты работают с SQLite во временном каталоге. DATABASE_URL задается до
+импорта приложения (модули тестов собираются после conftest), поэтому
+драйвер PostgreSQL для тестов не нужен.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(
+    tempfile.mkdtemp(prefix="reservation-tests-"), "app.db"
+))
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Фабрика сессий отдельной базы SQLite для теста."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.database import Base
+    from app.models import (
+        catalog_version, idempotency_key, reservation, reservation_archive,
+        table,
+    )
+    from app.services.reservation_service import forget_table
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}",
+        connect_args={"check_same_thread": False, "timeout": 60},
+        pool_size=32,
+        max_overflow=0,
+    )
+    Base.metadata.create_all(engine)
+    # Индекс броней и расписания - общие для процесса кэши
+    forget_table()
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    forget_table()
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    """Сессия тестовой базы."""
+    with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+def add_tables(db):
+    """Создать столики с заданной вместимостью; ID - с 1 по порядку."""
+    from sqlalchemy import insert
+
+    from app.models.table import Table
+
+    def add(*seats):
+        db.execute(insert(Table), [
+            dict(
+                id=number, name=f"Столик {number}", seats=count,
+                location="Зал",
+            )
+            for number, count in enumerate(seats, 1)
+        ])
+        db.commit()
+
+    return add
@@ -0,0 +1,194 @@
+"""Контроль допуска: очередь по приоритетам и корзины токенов."""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.admission import (
+    BOOKING,
+    READ,
+    WRITE,
+    AdmissionController,
+    AdmissionMiddleware,
+    TokenBuckets,
+    request_class,
+)
+
+
+def test_request_class_by_method_and_path():
+    assert request_class("GET", "/reservations/") == READ
+    assert request_class("POST", "/reservations/") == BOOKING
+    assert request_class("POST", "/reservations/batch") == BOOKING
+    assert request_class("DELETE", "/reservations/1") == WRITE
+    assert request_class("POST", "/tables/") == WRITE
+
+
+async def queue(controller, *kinds):
+    """Поставить запросы в очередь занятого контроллера."""
+    tasks = [
+        asyncio.ensure_future(controller.acquire(kind)) for kind in kinds
+    ]
+    await asyncio.sleep(0)
+    return tasks
+
+
+def test_waiters_are_admitted_by_priority():
+    async def scenario():
+        controller = AdmissionController(
+            limit=1, queue_size=10, queue_timeout=1, booking_reserve=0
+        )
+        assert await controller.acquire(READ) is None
+        admitted = []
+
+        async def wait(kind):
+            reason = await controller.acquire(kind)
+            admitted.append((kind, reason))
+            controller.release()
+
+        tasks = [
+            asyncio.ensure_future(wait(kind))
+            for kind in (READ, WRITE, BOOKING)
+        ]
+        await asyncio.sleep(0)
+        controller.release()
+        await asyncio.gather(*tasks)
+        return admitted, controller.in_flight
+
+    admitted, in_flight = asyncio.run(scenario())
+
+    assert admitted == [(BOOKING, None), (WRITE, None), (READ, None)]
+    assert in_flight == 0
+
+
+def test_full_queue_displaces_lower_priority():
+    async def scenario():
+        controller = AdmissionController(
+            limit=1, queue_size=2, queue_timeout=0.05, booking_reserve=0
+        )
+        await controller.acquire(READ)
+        first, second = await queue(controller, READ, WRITE)
+        # Чтение не может вытеснить запросы не ниже своего приоритета
+        rejected = await controller.acquire(READ)
+        (booking,) = await queue(controller, BOOKING)
+        displaced = await first
+        controller.release()
+        return rejected, displaced, await booking, await second
+
+    assert asyncio.run(scenario()) == (
+        "queue_full", "displaced", None, "deadline"
+    )
+
+
+def test_reserve_is_kept_for_bookings():
+    async def scenario():
+        controller = AdmissionController(
+            limit=2, queue_size=5, queue_timeout=0.05, booking_reserve=1
+        )
+        first = await controller.acquire(READ)
+        second = await controller.acquire(WRITE)
+        booking = await controller.acquire(BOOKING)
+        return first, second, booking, controller.in_flight
+
+    assert asyncio.run(scenario()) == (None, "deadline", None, 2)
+
+
+def test_waiter_times_out():
+    async def scenario():
+        controller = AdmissionController(
+            limit=1, queue_size=5, queue_timeout=0.01, booking_reserve=0
+        )
+        await controller.acquire(BOOKING)
+        reason = await controller.acquire(BOOKING)
+        controller.release()
+        return reason, controller.in_flight, controller._waiting
+
+    assert asyncio.run(scenario()) == ("deadline", 0, 0)
+
+
+def test_bucket_refills_over_time():
+    buckets = TokenBuckets(rate=2, burst=2)
+
+    assert buckets.take("a", now=0) == 0
+    assert buckets.take("a", now=0) == 0
+    assert buckets.take("a", now=0) == 0.5
+    # Другой клиент не делит корзину с первым
+    assert buckets.take("b", now=0) == 0
+    assert buckets.take("a", now=0.5) == 0
+    assert buckets.take("a", now=0.5) == 0.5
+
+
+def test_bucket_does_not_exceed_burst():
+    buckets = TokenBuckets(rate=10, burst=2)
+    buckets.take("a", now=0)
+
+    waits = [buckets.take("a", now=100) for _ in range(3)]
+
+    assert waits == [0, 0, 0.1]
+
+
+def test_bucket_forgets_oldest_clients():
+    buckets = TokenBuckets(rate=1, burst=1, max_clients=2)
+    buckets.take("a", now=0)
+    buckets.take("b", now=0)
+    buckets.take("c", now=0)
+
+    # Вытесненный клиент начинает с полной корзины
+    assert buckets.take("a", now=0) == 0
+    assert buckets.take("c", now=0) == 1
+
+
+def guarded_app(**options):
+    """Приложение со списком столиков за AdmissionMiddleware."""
+    application = FastAPI()
+
+    @application.get("/tables/")
+    async def tables():
+        return []
+
+    @application.get("/metrics")
+    async def metrics():
+        return {}
+
+    application.add_middleware(AdmissionMiddleware, **options)
+    return application
+
+
+def test_overflow_returns_503():
+    controller = AdmissionController(
+        limit=1, queue_size=0, queue_timeout=1, booking_reserve=0
+    )
+    controller.in_flight = 1
+    client = TestClient(guarded_app(controller=controller))
+
+    response = client.get("/tables/")
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert client.get("/metrics").status_code == 200
+
+
+def test_queue_timeout_returns_503():
+    controller = AdmissionController(
+        limit=1, queue_size=1, queue_timeout=0.01, booking_reserve=0
+    )
+    controller.in_flight = 1
+    client = TestClient(guarded_app(controller=controller))
+
+    assert client.get("/tables/").status_code == 503
+    assert controller._waiting == 0
+
+
+def test_rate_limit_returns_429():
+    controller = AdmissionController(limit=4, booking_reserve=0)
+    buckets = TokenBuckets(rate=0.5, burst=2)
+    client = TestClient(
+        guarded_app(controller=controller, buckets=buckets)
+    )
+
+    statuses = [client.get("/tables/").status_code for _ in range(3)]
+    limited = client.get("/tables/")
+
+    assert statuses == [200, 200, 429]
+    assert int(limited.headers["retry-after"]) >= 1
+    assert controller.in_flight == 0
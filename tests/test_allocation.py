@@ -0,0 +1,107 @@
+"""Выбор столика по best-fit и распределение пакета заявок."""
+
+import random
+from datetime import datetime, timedelta
+
+from app.services.allocation_service import (
+    TableTimeline,
+    best_table,
+    plan_batch,
+    rank_tables,
+)
+
+EPOCH = datetime(2030, 1, 5, 12)
+
+
+def at(minutes: int) -> datetime:
+    return EPOCH + timedelta(minutes=minutes)
+
+
+def timelines(*tables):
+    """TableTimeline по кортежам (ID, места, брони в минутах)."""
+    return [
+        TableTimeline(table_id, seats, [
+            (at(start), at(end), -number - 1)
+            for number, (start, end) in enumerate(bookings)
+        ])
+        for table_id, seats, bookings in tables
+    ]
+
+
+def test_smallest_fitting_table_wins():
+    candidates = timelines((1, 2, []), (2, 4, []), (3, 6, []))
+
+    assert best_table(candidates, 3, at(0), at(60)).table_id == 2
+    assert best_table(candidates, 7, at(0), at(60)) is None
+
+
+def test_tighter_gap_wins_among_equal_tables():
+    candidates = timelines(
+        (1, 4, [(0, 60)]),
+        (2, 4, [(0, 110)]),
+        (3, 4, []),
+    )
+
+    ranked = rank_tables(candidates, 4, at(120), at(180))
+
+    assert [timeline.table_id for timeline in ranked] == [2, 1, 3]
+    assert best_table(candidates, 4, at(120), at(180)).table_id == 2
+
+
+def test_busy_table_is_skipped():
+    candidates = timelines((1, 4, [(0, 120)]), (2, 6, []))
+
+    assert best_table(candidates, 4, at(60), at(90)).table_id == 2
+
+
+def test_plan_batch_fills_large_requests_first():
+    candidates = timelines((1, 4, []), (2, 6, []))
+    requests = [(2, at(0), at(60)), (2, at(0), at(60)), (5, at(0), at(60))]
+
+    assigned = plan_batch(candidates, requests)
+
+    # В порядке заявок вторая заняла бы столик 2 и оставила третью без места
+    assert assigned == [1, None, 2]
+
+
+def test_plan_batch_reports_unplaceable_requests():
+    candidates = timelines((1, 4, [(0, 60)]))
+    requests = [(2, at(30), at(90)), (8, at(120), at(180))]
+
+    assert plan_batch(candidates, requests) == [None, None]
+
+
+def test_plan_batch_never_overlaps_on_a_table():
+    generator = random.Random(11)
+    for _ in range(100):
+        candidates = timelines(
+            (1, 2, [(0, 90)]), (2, 4, [(240, 300)]), (3, 4, []), (4, 8, []),
+        )
+        requests = []
+        for _ in range(15):
+            start = generator.randrange(0, 480, 15)
+            requests.append((
+                generator.randint(1, 9),
+                at(start),
+                at(start + generator.choice((60, 90, 120))),
+            ))
+
+        assigned = plan_batch(candidates, requests)
+
+        seats = {timeline.table_id: timeline.seats for timeline in candidates}
+        for timeline in candidates:
+            items = timeline.intervals.items
+            assert all(
+                previous[1] <= following[0]
+                for previous, following in zip(items, items[1:])
+            )
+        for (party_size, start, end), table_id in zip(requests, assigned):
+            if table_id is not None:
+                assert seats[table_id] >= party_size
+                continue
+            # Неразмещенной заявке мешает каждый подходящий столик
+            assert all(
+                timeline.intervals.overlaps(start, end)
+                for timeline in candidates
+                if timeline.seats >= party_size
+            )
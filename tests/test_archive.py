@@ -0,0 +1,52 @@
+"""Перенос прошедших броней в архив."""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.models.reservation import Reservation
+from app.models.reservation_archive import ReservationArchive
+from app.schemas.reservation import ReservationCreate
+from app.services.archive_service import archive_reservations
+from app.services.reservation_service import create_reservation
+
+PAST = datetime(2020, 3, 1, 19, 0)
+
+
+def book(db, start):
+    return create_reservation(db, ReservationCreate(
+        customer_name="Иван Иванов",
+        table_id=1,
+        reservation_time=start,
+        duration_minutes=90,
+    ))
+
+
+def test_archiving_twice_keeps_ids_unique(db, add_tables):
+    add_tables(4)
+    first = book(db, PAST)
+    horizon = PAST + timedelta(days=30)
+    assert archive_reservations(db, before=horizon) == 1
+
+    second = book(db, PAST + timedelta(days=1))
+
+    assert second.id != first.id
+    assert archive_reservations(db, before=horizon) == 1
+    archived = db.execute(
+        select(ReservationArchive.id).order_by(ReservationArchive.id)
+    ).scalars().all()
+    assert archived == [first.id, second.id]
+    assert db.execute(
+        select(func.count()).select_from(Reservation)
+    ).scalar() == 0
+
+
+def test_archive_keeps_future_bookings(db, add_tables):
+    add_tables(4)
+    book(db, PAST)
+    future = book(db, datetime(2030, 3, 1, 19, 0))
+
+    assert archive_reservations(
+        db, before=PAST + timedelta(days=30), batch_size=1
+    ) == 1
+    assert db.execute(select(Reservation.id)).scalars().all() == [future.id]
@@ -0,0 +1,83 @@
+"""Матрица занятости и поиск свободных столиков и слотов."""
+
+import random
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.models.reservation import Reservation
+from app.services.availability_service import (
+    _spread,
+    build_occupancy,
+    find_available_tables,
+    find_free_slots,
+)
+
+DAY = date(2030, 1, 5)
+MIDNIGHT = datetime(2030, 1, 5)
+
+
+def at(minutes: int) -> datetime:
+    return MIDNIGHT + timedelta(minutes=minutes)
+
+
+def book(db, table_id, start, end):
+    db.execute(insert(Reservation).values(
+        customer_name="Иван",
+        table_id=table_id,
+        reservation_time=start,
+        duration_minutes=int((end - start).total_seconds() // 60),
+        end_time=end,
+    ))
+    db.commit()
+
+
+def test_spread_matches_brute_force():
+    generator = random.Random(3)
+    for _ in range(300):
+        mask = generator.getrandbits(64)
+        width = generator.randint(1, 70)
+
+        expected = 0
+        for bit in range(64):
+            if any(mask >> index & 1 for index in range(bit, bit + width)):
+                expected |= 1 << bit
+
+        assert _spread(mask, width) == expected
+
+
+def test_occupancy_marks_partial_minutes_and_clips(db, add_tables):
+    add_tables(2, 2)
+    book(db, 1, at(10) + timedelta(seconds=30), at(20) + timedelta(seconds=1))
+    book(db, 2, at(-30), at(5))
+
+    occupancy = build_occupancy(db, [1, 2], MIDNIGHT, 60)
+
+    assert occupancy[1] == ((1 << 11) - 1) << 10
+    assert occupancy[2] == (1 << 5) - 1
+
+
+def test_available_tables_skip_booked_and_small(db, add_tables):
+    add_tables(2, 4, 4, 6)
+    book(db, 2, at(18 * 60 + 30), at(19 * 60 + 30))
+    # Бронь, начинающаяся в момент окончания окна, ему не мешает
+    book(db, 3, at(21 * 60), at(22 * 60))
+
+    tables = find_available_tables(db, 3, at(19 * 60), 120)
+
+    assert [table.id for table in tables] == [3, 4]
+
+
+def test_free_slots_respect_duration_and_next_day(db, add_tables):
+    add_tables(4)
+    book(db, 1, at(60), at(120))
+    # Бронь следующего дня ограничивает слоты перед полуночью
+    book(db, 1, at(1440 + 15), at(1440 + 90))
+
+    ((table, slots),) = find_free_slots(db, DAY, 2, 60, slot_minutes=30)
+
+    minutes = [int((slot - MIDNIGHT).total_seconds() // 60) for slot in slots]
+    assert table.id == 1
+    assert minutes[:2] == [0, 120]
+    assert 30 not in minutes and 60 not in minutes
+    assert minutes[-1] == 1380
@@ -0,0 +1,120 @@
+"""Пакетное создание броней: отбор непересекающихся заявок столика."""
+
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.models.reservation import Reservation
+from app.schemas.reservation import ReservationCreate
+from app.services.reservation_index import IntervalSet
+from app.services.reservation_service import (
+    CONFLICT_EXISTING,
+    CONFLICT_IN_BATCH,
+    create_reservations_batch,
+    sweep_table_requests,
+)
+
+EPOCH = datetime(2030, 1, 1)
+
+
+def at(minutes: int) -> datetime:
+    return EPOCH + timedelta(minutes=minutes)
+
+
+def test_accepts_adjacent_requests():
+    candidates = [(at(60), at(120), "b"), (at(0), at(60), "a")]
+
+    decisions = sweep_table_requests(candidates, IntervalSet([]))
+
+    assert decisions == {"a": None, "b": None}
+
+
+def test_rejects_overlap_with_existing_booking():
+    booked = IntervalSet([(at(30), at(90), 1)])
+    candidates = [
+        (at(0), at(30), "before"),
+        (at(60), at(120), "overlap"),
+        (at(90), at(150), "after"),
+    ]
+
+    decisions = sweep_table_requests(candidates, booked)
+
+    assert decisions == {
+        "before": None, "overlap": CONFLICT_EXISTING, "after": None,
+    }
+
+
+def test_earlier_request_wins_inside_batch():
+    candidates = [
+        (at(30), at(90), "later"),
+        (at(0), at(60), "earlier"),
+        (at(60), at(120), "adjacent"),
+    ]
+
+    decisions = sweep_table_requests(candidates, IntervalSet([]))
+
+    assert decisions == {
+        "earlier": None, "later": CONFLICT_IN_BATCH, "adjacent": None,
+    }
+
+
+def test_rejected_request_does_not_block_following():
+    booked = IntervalSet([(at(0), at(600), 1)])
+    candidates = [(at(0), at(700), "long"), (at(650), at(700), "short")]
+
+    decisions = sweep_table_requests(candidates, booked)
+
+    assert decisions == {"long": CONFLICT_EXISTING, "short": None}
+
+
+def test_accepted_requests_never_overlap():
+    generator = random.Random(7)
+    for _ in range(200):
+        booked = IntervalSet([
+            (at(start), at(start + generator.randint(15, 180)), number)
+            for number, start in enumerate(
+                generator.sample(range(0, 1440, 15), 4)
+            )
+        ])
+        candidates = [
+            (at(start), at(start + generator.randint(15, 180)), number)
+            for number, start in enumerate(
+                generator.choices(range(0, 1440, 15), k=12)
+            )
+        ]
+
+        decisions = sweep_table_requests(candidates, booked)
+
+        accepted = sorted(
+            (start, end) for start, end, key in candidates
+            if decisions[key] is None
+        )
+        assert all(
+            not booked.overlaps(start, end) for start, end in accepted
+        )
+        assert all(
+            previous[1] <= following[0]
+            for previous, following in zip(accepted, accepted[1:])
+        )
+        assert set(decisions) == {key for _, _, key in candidates}
+
+
+def test_batch_compares_times_in_utc(db, add_tables):
+    add_tables(4)
+    items = [
+        ReservationCreate(
+            customer_name="Иван", table_id=1, duration_minutes=60,
+            reservation_time="2030-01-05T19:00:00+03:00",
+        ),
+        ReservationCreate(
+            customer_name="Петр", table_id=1, duration_minutes=60,
+            reservation_time="2030-01-05T16:30:00",
+        ),
+    ]
+
+    results = create_reservations_batch(db, items)
+
+    assert [detail for _, detail in results] == [None, CONFLICT_IN_BATCH]
+    stored = db.execute(select(Reservation.reservation_time)).scalars()
+    assert stored.all() == [datetime(2030, 1, 5, 16, 0)]
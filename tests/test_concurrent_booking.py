@@ -0,0 +1,126 @@
+"""Конкурентное бронирование: пересекающиеся брони одного столика."""
+
+import random
+from datetime import timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from app.models.reservation import Reservation
+from app.routers.reservations import create_new_reservation
+from app.schemas.reservation import ReservationCreate
+from app.services import reservation_service
+from app.services.reservation_service import (
+    check_reservation_conflict,
+    create_reservation,
+)
+from app.utils.timestamps import utc_now
+from tests.booking_helpers import (
+    EPOCH,
+    OVERLAPS_SQL,
+    book_concurrently,
+    make_requests,
+)
+
+
+def test_concurrent_overlapping_bookings_never_overlap(
+    session_factory, add_tables
+):
+    add_tables(4, 4, 4, 4)
+    random.seed(7)
+    requests = make_requests(400, tables=4, slots=12)
+
+    accepted, _ = book_concurrently(
+        session_factory, create_reservation, requests, threads=16
+    )
+
+    with session_factory() as db:
+        assert db.execute(OVERLAPS_SQL).scalar() == 0
+        stored = db.execute(
+            select(func.count()).select_from(Reservation)
+        ).scalar()
+    assert 0 < accepted == stored
+
+
+def test_concurrent_requests_for_one_slot_accept_exactly_one(
+    session_factory, add_tables
+):
+    add_tables(4)
+    requests = [
+        ReservationCreate(
+            customer_name=f"Гость {number}",
+            table_id=1,
+            reservation_time=EPOCH + timedelta(minutes=number % 3),
+            duration_minutes=60,
+        )
+        for number in range(32)
+    ]
+
+    accepted, _ = book_concurrently(
+        session_factory, create_reservation, requests, threads=32
+    )
+
+    assert accepted == 1
+
+
+def test_booking_ignores_stale_index_of_another_worker(db, add_tables):
+    add_tables(4)
+    # Индекс хранит только будущие брони
+    start = utc_now().replace(microsecond=0) + timedelta(days=30)
+    reservation = ReservationCreate(
+        customer_name="Иван Иванов",
+        table_id=1,
+        reservation_time=start,
+        duration_minutes=90,
+    )
+    assert create_reservation(db, reservation) is not None
+    assert check_reservation_conflict(db, reservation)
+    # Бронь отменена другим воркером: индекс этого процесса о ней помнит
+    db.execute(delete(Reservation))
+    db.commit()
+
+    created = create_new_reservation(reservation, db)
+
+    assert created.reservation_time == start
+
+
+def future_reservation(table_id=1, days=30):
+    """Бронь в будущем: индекс хранит только будущие брони."""
+    return ReservationCreate(
+        customer_name="Иван Иванов",
+        table_id=table_id,
+        reservation_time=(
+            utc_now().replace(microsecond=0) + timedelta(days=days)
+        ),
+        duration_minutes=90,
+    )
+
+
+def test_index_rejection_does_not_lock_table(db, add_tables, monkeypatch):
+    add_tables(4)
+    reservation = future_reservation()
+    assert create_reservation(db, reservation) is not None
+    locked = []
+    monkeypatch.setattr(
+        reservation_service, "lock_table_for_booking",
+        lambda db, table_id: locked.append(table_id),
+    )
+
+    assert create_reservation(db, reservation) is None
+    assert locked == []
+
+
+def test_free_index_answer_is_checked_under_lock(db, add_tables):
+    add_tables(4)
+    reservation = future_reservation()
+    assert not check_reservation_conflict(db, reservation)
+    # Бронь записал другой воркер: индекс этого процесса о ней не знает
+    db.execute(insert(Reservation).values(
+        customer_name="Петр",
+        table_id=1,
+        reservation_time=reservation.reservation_time,
+        duration_minutes=60,
+    ))
+    db.commit()
+    assert not check_reservation_conflict(db, reservation)
+
+    assert create_reservation(db, reservation) is None
@@ -0,0 +1,76 @@
+"""Эндпоинты /diagnostics доступны только с токеном отладки."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware import profiling
+from app.routers import diagnostics
+
+TOKEN = "secret-token"
+
+PATHS = [
+    ("GET", "/diagnostics/pool"),
+    ("GET", "/diagnostics/profiles"),
+    ("GET", "/diagnostics/explains"),
+    ("DELETE", "/diagnostics/profiles"),
+    ("DELETE", "/diagnostics/explains"),
+]
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(diagnostics.router)
+    return TestClient(app)
+
+
+def configure_token(monkeypatch, token):
+    monkeypatch.setattr(profiling, "PROFILE_DEBUG_TOKEN", token)
+    monkeypatch.setattr(diagnostics, "PROFILE_DEBUG_TOKEN", token)
+
+
+@pytest.mark.parametrize("method,path", PATHS)
+def test_hidden_without_configured_token(client, monkeypatch, method, path):
+    configure_token(monkeypatch, None)
+
+    response = client.request(
+        method, path, headers={"X-Debug-Profile": "anything"}
+    )
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("method,path", PATHS)
+def test_rejects_missing_or_wrong_token(client, monkeypatch, method, path):
+    configure_token(monkeypatch, TOKEN)
+
+    assert client.request(method, path).status_code == 403
+    assert client.request(
+        method, path, headers={"X-Debug-Profile": "wrong"}
+    ).status_code == 403
+
+
+@pytest.mark.parametrize("method,path", PATHS)
+def test_accepts_matching_token(client, monkeypatch, method, path):
+    configure_token(monkeypatch, TOKEN)
+
+    response = client.request(
+        method, path, headers={"X-Debug-Profile": TOKEN}
+    )
+
+    assert response.status_code in (200, 204)
+
+
+def test_download_requires_token(client, monkeypatch):
+    configure_token(monkeypatch, TOKEN)
+    params = {"method": "POST", "route": "/reservations/"}
+
+    assert client.get(
+        "/diagnostics/profiles/download", params=params
+    ).status_code == 403
+    assert client.get(
+        "/diagnostics/profiles/download",
+        params=params,
+        headers={"X-Debug-Profile": TOKEN},
+    ).status_code == 404
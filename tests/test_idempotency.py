@@ -0,0 +1,232 @@
+"""Ключи идемпотентности: область клиента, отпечаток, длинные тела и
+аренда захвата ключа в базе."""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.middleware import idempotency
+from app.middleware.idempotency import (
+    IdempotencyMiddleware,
+    ResponseCache,
+    request_fingerprint,
+    request_key,
+)
+from app.models.idempotency_key import IdempotencyKey
+from app.services.idempotency_service import (
+    claim_key,
+    complete_key,
+    get_key,
+    lease_expired,
+    renew_key,
+)
+from app.utils.timestamps import utc_now
+
+
+def http_scope(
+    method="POST", path="/reservations/", query=b"", headers=(),
+    client=("10.0.0.1", 5000),
+):
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": list(headers),
+        "client": client,
+    }
+
+
+def test_key_is_scoped_by_client_address():
+    first = http_scope(client=("10.0.0.1", 5000))
+    second = http_scope(client=("10.0.0.2", 5000))
+
+    assert request_key(first, b"k") != request_key(second, b"k")
+    assert request_key(first, b"k") == request_key(
+        http_scope(client=("10.0.0.1", 6000)), b"k"
+    )
+
+
+def test_key_is_scoped_by_credentials():
+    alice = http_scope(headers=[(b"authorization", b"Bearer alice")])
+    bob = http_scope(headers=[(b"authorization", b"Bearer bob")])
+    alice_elsewhere = http_scope(
+        headers=[(b"authorization", b"Bearer alice")],
+        client=("10.0.0.9", 1),
+    )
+
+    assert request_key(alice, b"k") != request_key(bob, b"k")
+    assert request_key(alice, b"k") == request_key(alice_elsewhere, b"k")
+
+
+def test_key_depends_on_method_path_and_value():
+    base = request_key(http_scope(), b"k")
+
+    assert base != request_key(http_scope(), b"other")
+    assert base != request_key(http_scope(method="DELETE"), b"k")
+    assert base != request_key(http_scope(path="/reservations/1"), b"k")
+
+
+def test_fingerprint_covers_query_and_body():
+    base = request_fingerprint(http_scope(), b"{}")
+
+    assert base == request_fingerprint(http_scope(), b"{}")
+    assert base != request_fingerprint(http_scope(), b'{"a": 1}')
+    assert base != request_fingerprint(http_scope(query=b"x=1"), b"{}")
+    assert base != request_fingerprint(http_scope(method="PUT"), b"{}")
+
+
+def echo_app(**options):
+    """Приложение, отвечающее номером вызова, за IdempotencyMiddleware."""
+    calls = []
+    application = FastAPI()
+
+    @application.post("/reservations/echo")
+    async def echo(request: Request):
+        body = await request.body()
+        calls.append(len(body))
+        return {"call": len(calls), "size": len(body)}
+
+    application.add_middleware(
+        IdempotencyMiddleware, cache=ResponseCache(), **options
+    )
+    return application
+
+
+@pytest.fixture
+def app():
+    return echo_app()
+
+
+def test_other_client_does_not_get_stored_response(app):
+    alice = TestClient(app, headers={"Authorization": "Bearer alice"})
+    bob = TestClient(app, headers={"Authorization": "Bearer bob"})
+    headers = {"Idempotency-Key": "same"}
+
+    first = alice.post("/reservations/echo", content=b"x", headers=headers)
+    replay = alice.post("/reservations/echo", content=b"x", headers=headers)
+    other = bob.post("/reservations/echo", content=b"x", headers=headers)
+
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert replay.json() == first.json()
+    assert "idempotent-replayed" not in other.headers
+    assert other.json()["call"] == 2
+
+
+def test_large_request_passes_through(app, monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_MAX_REQUEST_BYTES", 16)
+    client = TestClient(app)
+    headers = {"Idempotency-Key": "big"}
+    body = b"x" * 64
+
+    first = client.post("/reservations/echo", content=body, headers=headers)
+    second = client.post("/reservations/echo", content=body, headers=headers)
+
+    assert first.json() == {"call": 1, "size": 64}
+    assert second.json() == {"call": 2, "size": 64}
+    assert "idempotent-replayed" not in second.headers
+
+
+def test_chunked_body_over_limit_reaches_app_intact(monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_MAX_REQUEST_BYTES", 16)
+    received = []
+    messages = iter(
+        {"type": "http.request", "body": b"y" * 8, "more_body": number < 7}
+        for number in range(8)
+    )
+
+    async def application(scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        received.append(body)
+        await send({"type": "http.response.start", "status": 200})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        pass
+
+    middleware = IdempotencyMiddleware(application, cache=ResponseCache())
+    scope = http_scope(headers=[(b"idempotency-key", b"chunked")])
+    asyncio.run(middleware(scope, receive, send))
+
+    assert received == [b"y" * 64]
+
+
+def age_claim(db, key, seconds):
+    """Сдвинуть момент захвата ключа в прошлое (владелец не продлевал)."""
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key)
+        .values(claimed_at=utc_now() - timedelta(seconds=seconds))
+    )
+    db.commit()
+
+
+def test_live_claim_is_not_taken_over(db):
+    assert claim_key(db, "k", "first", ttl=3600, lease=30) is None
+
+    owner = claim_key(db, "k", "second", ttl=3600, lease=30)
+
+    assert owner.fingerprint == "first"
+    assert owner.status_code is None
+    assert not lease_expired(owner, 30)
+
+
+def test_abandoned_claim_is_taken_over(db):
+    assert claim_key(db, "k", "first", ttl=3600, lease=30) is None
+    age_claim(db, "k", 60)
+
+    assert claim_key(db, "k", "second", ttl=3600, lease=30) is None
+    assert get_key(db, "k", ttl=3600).fingerprint == "second"
+
+
+def test_renewed_claim_survives_past_lease(db):
+    assert claim_key(db, "k", "first", ttl=3600, lease=30) is None
+    age_claim(db, "k", 60)
+
+    renew_key(db, "k")
+
+    assert claim_key(db, "k", "second", ttl=3600, lease=30) is not None
+
+
+def test_completed_response_is_never_taken_over(db):
+    assert claim_key(db, "k", "first", ttl=3600, lease=30) is None
+    complete_key(db, "k", 201, [], b"{}")
+    age_claim(db, "k", 60)
+
+    owner = claim_key(db, "k", "first", ttl=3600, lease=30)
+
+    assert owner.status_code == 201
+
+
+def test_retry_after_crashed_owner_is_executed(session_factory, monkeypatch):
+    monkeypatch.setattr(idempotency, "SessionLocal", session_factory)
+    client = TestClient(echo_app(use_database=True, wait_timeout=0.2))
+    scope = http_scope(path="/reservations/echo", client=("testclient", 1))
+    key = request_key(scope, b"crashed")
+    fingerprint = request_fingerprint(scope, b"x")
+    # Воркер захватил ключ и упал, не сохранив ответ
+    with session_factory() as db:
+        assert claim_key(db, key, fingerprint, 3600, 30) is None
+    headers = {"Idempotency-Key": "crashed"}
+
+    pending = client.post("/reservations/echo", content=b"x", headers=headers)
+    with session_factory() as db:
+        age_claim(db, key, 60)
+    retried = client.post("/reservations/echo", content=b"x", headers=headers)
+    replayed = client.post("/reservations/echo", content=b"x", headers=headers)
+
+    assert pending.status_code == 409
+    assert retried.json() == {"call": 1, "size": 1}
+    assert replayed.headers["idempotent-replayed"] == "true"
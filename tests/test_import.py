@@ -0,0 +1,144 @@
+"""Импорт столиков и броней из CSV и NDJSON."""
+
+import io
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.services.import_service import (
+    DUPLICATE_TABLE_NAME,
+    NOT_UTF8,
+    TABLE_NOT_FOUND,
+    import_binary,
+    import_reservations,
+    import_tables,
+)
+from app.services.reservation_service import (
+    CONFLICT_EXISTING,
+    CONFLICT_IN_BATCH,
+)
+
+TABLES_CSV = (
+    "id,name,seats,location\n"
+    "7,У окна,4,Зал\n"
+    ",Бар,2,Бар\n"
+    ",У окна,6,Зал\n"
+    "x,Терраса,4,Терраса\n"
+)
+
+
+def upload(text):
+    return io.BytesIO(text.encode("utf-8"))
+
+
+def count(db, model):
+    return db.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_tables_csv_keeps_ids_and_rejects_rows(db):
+    report = import_binary(
+        db, import_tables, upload(TABLES_CSV), "tables.csv", chunk_size=2
+    )
+
+    assert report.as_dict() == {
+        "received": 4,
+        "imported": 2,
+        "rejected": 2,
+        "errors": [
+            {"line": 4, "detail": DUPLICATE_TABLE_NAME},
+            {"line": 5, "detail": "id: Ожидается целое число"},
+        ],
+    }
+    assert db.get(Table, 7).name == "У окна"
+    assert count(db, Table) == 2
+
+
+def test_reservations_ndjson_rejects_conflicts_across_chunks(db, add_tables):
+    add_tables(4)
+    rows = [
+        {"customer_name": "Иван", "table_id": 1,
+         "reservation_time": "2030-01-05T19:00:00", "duration_minutes": 90},
+        {"customer_name": "Петр", "table_id": 1,
+         "reservation_time": "2030-01-05T21:00:00", "duration_minutes": 60},
+        # Пересекается с первой строкой, сохраненной прошлой пачкой
+        {"customer_name": "Анна", "table_id": 1,
+         "reservation_time": "2030-01-05T20:00:00", "duration_minutes": 30},
+        {"customer_name": "Олег", "table_id": 9,
+         "reservation_time": "2030-01-05T19:00:00", "duration_minutes": 60},
+        {"customer_name": "Ольга", "table_id": 1,
+         "reservation_time": "2030-01-05T21:30:00", "duration_minutes": 60},
+    ]
+    lines = [json.dumps(row, ensure_ascii=False) for row in rows]
+    text = "\n".join(lines[:3] + ["{", "[1]", ""] + lines[3:]) + "\n"
+
+    report = import_binary(
+        db, import_reservations, upload(text), "bookings.ndjson",
+        chunk_size=2,
+    )
+
+    assert report.as_dict() == {
+        "received": 7,
+        "imported": 2,
+        "rejected": 5,
+        "errors": [
+            {"line": 3, "detail": CONFLICT_EXISTING},
+            {"line": 4, "detail": "Некорректный JSON"},
+            {"line": 5, "detail": "Ожидается JSON-объект"},
+            {"line": 7, "detail": TABLE_NOT_FOUND},
+            {"line": 8, "detail": CONFLICT_EXISTING},
+        ],
+    }
+    assert count(db, Reservation) == 2
+
+
+def test_reservations_csv_with_bom_rejects_overlap_in_file(db, add_tables):
+    add_tables(4, 4)
+    text = (
+        "\ufeffcustomer_name,table_id,reservation_time,duration_minutes\n"
+        "Иван,1,2030-01-05T19:00:00,90\n"
+        "Петр,1,2030-01-05T20:00:00,60\n"
+        "Анна,2,2030-01-05T20:00:00,60\n"
+        "Олег,2,2030-01-05T22:00:00,0\n"
+        "Ольга,2,2030-01-05T22:00:00,60,лишнее\n"
+    )
+
+    report = import_binary(
+        db, import_reservations, upload(text), "bookings.csv"
+    )
+
+    errors = dict(report.errors)
+    assert (report.received, report.imported, report.rejected) == (5, 2, 3)
+    assert errors[3] == CONFLICT_IN_BATCH
+    assert errors[5].startswith("duration_minutes")
+    assert errors[6] == "Лишние значения в строке"
+    stored = db.execute(
+        select(Reservation.customer_name).order_by(Reservation.id)
+    ).scalars().all()
+    assert stored == ["Иван", "Анна"]
+
+
+def test_invalid_utf8_in_later_chunk_saves_nothing(db, add_tables):
+    add_tables(4)
+    binary = upload(
+        "customer_name,table_id,reservation_time,duration_minutes\n"
+        "Иван,1,2030-01-05T19:00:00,90\n"
+        "Петр,1,2030-01-06T19:00:00,90\n"
+    )
+    binary.seek(0, io.SEEK_END)
+    binary.write("Анна,1,2030-01-07T19:00:00,90\n".encode("cp1251"))
+    binary.seek(0)
+
+    with pytest.raises(ValueError, match=NOT_UTF8):
+        import_binary(
+            db, import_reservations, binary, "bookings.csv", chunk_size=1
+        )
+
+    assert count(db, Reservation) == 0
+
+
+def test_unknown_extension_is_rejected(db):
+    with pytest.raises(ValueError):
+        import_binary(db, import_tables, upload(TABLES_CSV), "tables.xlsx")
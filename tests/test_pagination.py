@@ -0,0 +1,50 @@
+"""Курсоры постраничной выборки."""
+
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def raw_cursor(payload) -> str:
+    raw = json.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def test_round_trip():
+    moment = datetime(2030, 5, 1, 19, 30)
+
+    cursor = encode_cursor(moment, 42)
+
+    assert decode_cursor(cursor, datetime, int) == [moment, 42]
+    assert decode_cursor(encode_cursor(7), int) == [7]
+
+
+@pytest.mark.parametrize("cursor", [
+    "не base64",
+    raw_cursor({"dt": "2030-05-01T19:30:00"}),
+    raw_cursor([{"dt": "2030-05-01T19:30:00"}]),
+    raw_cursor([{"dt": "2030-05-01T19:30:00"}, 1, 2]),
+    raw_cursor(["2030-05-01T19:30:00", 1]),
+    raw_cursor([{"dt": 5}, 1]),
+    raw_cursor([{"dt": "вчера"}, 1]),
+    raw_cursor([{}, 1]),
+    raw_cursor([{"dt": "2030-05-01T19:30:00"}, "1"]),
+    raw_cursor([{"dt": "2030-05-01T19:30:00"}, 1.5]),
+    raw_cursor([{"dt": "2030-05-01T19:30:00"}, True]),
+    raw_cursor([{"dt": "2030-05-01T19:30:00"}, None]),
+    raw_cursor([1, {"dt": "2030-05-01T19:30:00"}]),
+])
+def test_malformed_reservation_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, datetime, int)
+
+
+@pytest.mark.parametrize("payload", [["1"], [{"dt": "x"}], [[1]], [None]])
+def test_malformed_table_cursor(payload):
+    with pytest.raises(ValueError):
+        decode_cursor(raw_cursor(payload), int)
+
@@ -0,0 +1,45 @@
+"""Брони длиннее MAX_DURATION_MINUTES не попадают в базу."""
+
+import io
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.models.reservation import Reservation
+from app.schemas.reservation import MAX_DURATION_MINUTES
+from app.services.import_service import import_reservations
+
+HEADER = "customer_name,table_id,reservation_time,duration_minutes\n"
+
+
+def test_import_rejects_long_reservation(db, add_tables):
+    add_tables(4)
+    data = (
+        HEADER
+        + f"Иван,1,2030-05-01T10:00:00,{MAX_DURATION_MINUTES + 1}\n"
+        + f"Петр,1,2030-05-03T10:00:00,{MAX_DURATION_MINUTES}\n"
+    )
+
+    report = import_reservations(db, io.StringIO(data), "csv")
+
+    assert report.imported == 1
+    assert [error["line"] for error in report.as_dict()["errors"]] == [2]
+    assert db.execute(select(Reservation.customer_name)).scalars().all() == [
+        "Петр"
+    ]
+
+
+@pytest.mark.parametrize("duration", [0, MAX_DURATION_MINUTES + 1])
+def test_database_rejects_out_of_range_duration(db, add_tables, duration):
+    add_tables(4)
+
+    with pytest.raises(IntegrityError):
+        db.execute(insert(Reservation).values(
+            customer_name="Иван",
+            table_id=1,
+            reservation_time=datetime(2030, 5, 1, 10),
+            duration_minutes=duration,
+        ))
+    db.rollback()
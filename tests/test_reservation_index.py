@@ -0,0 +1,92 @@
+"""Индекс интервалов броней: IntervalSet и загрузка столиков."""
+
+import random
+from datetime import datetime, timedelta
+
+from app.services.reservation_index import (
+    IntervalSet,
+    ReservationIntervalIndex,
+)
+
+ORIGIN = datetime(2030, 1, 1)
+
+
+def interval(rng, reservation_id):
+    start = ORIGIN + timedelta(minutes=15 * rng.randrange(200))
+    end = start + timedelta(minutes=rng.choice((30, 60, 90, 600)))
+    return start, end, reservation_id
+
+
+def overlaps_brute(items, start, end):
+    return any(
+        item_start < end and start < item_end
+        for item_start, item_end, _ in items
+    )
+
+
+def expected_max_ends(items):
+    result = []
+    for _, end, _ in sorted(items):
+        result.append(max(result[-1], end) if result else end)
+    return result
+
+
+def test_interval_set_matches_brute_force_under_adds_and_removes():
+    rng = random.Random(3)
+    intervals = IntervalSet([interval(rng, number) for number in range(20)])
+    items = list(intervals.items)
+    for number in range(20, 400):
+        if items and rng.random() < 0.4:
+            start, _, reservation_id = items.pop(rng.randrange(len(items)))
+            intervals.remove(reservation_id, start)
+        else:
+            item = interval(rng, number)
+            items.append(item)
+            intervals.add(item)
+        assert intervals.items == sorted(items)
+        assert intervals.max_ends == expected_max_ends(items)
+        probe = interval(rng, -1)
+        assert intervals.overlaps(*probe[:2]) == overlaps_brute(
+            items, *probe[:2]
+        )
+
+
+def test_interval_set_touching_intervals_do_not_overlap():
+    intervals = IntervalSet([(ORIGIN, ORIGIN + timedelta(hours=1), 1)])
+
+    assert not intervals.overlaps(
+        ORIGIN + timedelta(hours=1), ORIGIN + timedelta(hours=2)
+    )
+    assert not intervals.overlaps(ORIGIN - timedelta(hours=1), ORIGIN)
+    assert intervals.overlaps(
+        ORIGIN + timedelta(minutes=59), ORIGIN + timedelta(hours=2)
+    )
+
+
+def test_snapshot_loaded_before_a_change_is_not_installed():
+    index = ReservationIntervalIndex()
+    version = index._version(1)
+    # Бронь добавлена другим запросом, пока шла загрузка
+    index.add(1, 7, ORIGIN, ORIGIN + timedelta(hours=1))
+
+    index._install(1, [], ORIGIN, version)
+
+    assert index._cached(1) is None
+
+
+def test_snapshot_without_concurrent_changes_is_installed():
+    index = ReservationIntervalIndex()
+    index.add(2, 7, ORIGIN, ORIGIN + timedelta(hours=1))
+    version = index._version(1)
+
+    intervals = index._install(
+        1, [(8, ORIGIN, ORIGIN + timedelta(hours=1))], ORIGIN, version
+    )
+
+    assert index._cached(1) is intervals
+    index.invalidate()
+    assert index._cached(1) is None
+    stale = index._version(1)
+    index.invalidate()
+    index._install(1, [], ORIGIN, stale)
+    assert index._cached(1) is None
@@ -0,0 +1,85 @@
+"""Кэш расписаний столиков по дням."""
+
+from datetime import date, datetime
+
+from sqlalchemy import insert
+
+from app.models.reservation import Reservation
+from app.schemas.reservation import ReservationCreate
+from app.services.reservation_service import (
+    create_reservation,
+    delete_reservation,
+)
+from app.services.schedule_service import schedule_cache
+
+DAY = date(2030, 1, 5)
+
+
+def book(db, start):
+    return create_reservation(db, ReservationCreate(
+        customer_name="Иван Иванов",
+        table_id=1,
+        reservation_time=start,
+        duration_minutes=60,
+    ))
+
+
+def booked_ids(db):
+    schedule = schedule_cache.get(db, 1, DAY)
+    return [item["reservation_id"] for item in schedule["reservations"]]
+
+
+def test_repeated_lookup_is_served_from_cache(db, add_tables):
+    add_tables(4)
+    first = book(db, datetime(2030, 1, 5, 12, 0))
+    assert booked_ids(db) == [first.id]
+
+    # Строка, записанная в обход сервиса, не видна до сброса кэша
+    db.execute(insert(Reservation).values(
+        customer_name="Петр",
+        table_id=1,
+        reservation_time=datetime(2030, 1, 5, 18, 0),
+        duration_minutes=60,
+        end_time=datetime(2030, 1, 5, 19, 0),
+    ))
+    db.commit()
+
+    assert booked_ids(db) == [first.id]
+    schedule_cache.invalidate(1)
+    assert len(booked_ids(db)) == 2
+
+
+def test_create_and_delete_update_loaded_schedule(db, add_tables):
+    add_tables(4)
+    assert booked_ids(db) == []
+
+    reservation = book(db, datetime(2030, 1, 5, 12, 0))
+    schedule = schedule_cache.get(db, 1, DAY)
+    assert [item["reservation_id"] for item in schedule["reservations"]] == [
+        reservation.id
+    ]
+    assert "1" in schedule["slots"]
+
+    delete_reservation(db, reservation.id)
+    schedule = schedule_cache.get(db, 1, DAY)
+    assert schedule["reservations"] == []
+    assert "1" not in schedule["slots"]
+
+
+def test_booking_during_load_is_not_lost(db, add_tables, monkeypatch):
+    add_tables(4)
+    load = schedule_cache._load
+    created = []
+
+    def racing_load(session, table_id, day):
+        # Бронь создается после чтения базы, но до сохранения расписания
+        schedule = load(session, table_id, day)
+        if not created:
+            created.append(book(db, datetime(2030, 1, 5, 12, 0)))
+        return schedule
+
+    monkeypatch.setattr(schedule_cache, "_load", racing_load)
+    assert booked_ids(db) == []
+    monkeypatch.setattr(schedule_cache, "_load", load)
+
+    assert booked_ids(db) == [created[0].id]
@@ -0,0 +1,42 @@
+"""Журнал медленных SQL-запросов не раскрывает параметры по умолчанию."""
+
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from app.middleware import metrics
+
+STATEMENT = "INSERT INTO reservations (customer_name) VALUES (?)"
+
+
+def log_slow_query():
+    context = SimpleNamespace()
+    metrics._before_cursor_execute(
+        None, None, STATEMENT, ("Иван Иванов",), context, False
+    )
+    metrics._after_cursor_execute(
+        None, None, STATEMENT, ("Иван Иванов",), context, False
+    )
+
+
+@pytest.fixture
+def slow(monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "SLOW_QUERY_THRESHOLD_MS", 0)
+    caplog.set_level(logging.WARNING, logger="app.slow_query")
+    return caplog
+
+
+def test_parameters_are_not_logged_by_default(slow):
+    log_slow_query()
+
+    assert STATEMENT in slow.text
+    assert "Иван" not in slow.text
+
+
+def test_parameters_are_logged_when_enabled(slow, monkeypatch):
+    monkeypatch.setattr(metrics, "SLOW_QUERY_LOG_PARAMETERS", True)
+
+    log_slow_query()
+
+    assert "Иван Иванов" in slow.text
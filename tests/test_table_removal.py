@@ -0,0 +1,198 @@
+"""Массовая отмена броней и удаление столика вместе с бронями."""
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.models.reservation import Reservation
+from app.models.reservation_archive import ReservationArchive
+from app.models.table import Table
+from app.schemas.reservation import ReservationCreate
+from app.services import table_service
+from app.services.reservation_index import reservation_index
+from app.services.reservation_service import (
+    check_reservation_conflict,
+    create_reservation,
+    delete_reservations,
+)
+from app.services.table_service import (
+    REMOVAL_CANCEL,
+    REMOVAL_REASSIGN,
+    REMOVAL_REJECT,
+    delete_table_with_reservations,
+)
+from app.utils.timestamps import utc_now
+
+NOW = utc_now().replace(microsecond=0)
+TOMORROW = NOW + timedelta(days=1)
+
+
+def booking(table_id, start, minutes=60):
+    return ReservationCreate(
+        customer_name="Иван Иванов",
+        table_id=table_id,
+        reservation_time=start,
+        duration_minutes=minutes,
+    )
+
+
+def book(db, table_id, start, minutes=60):
+    row = create_reservation(db, booking(table_id, start, minutes))
+    assert row is not None
+    return row
+
+
+def count(db, model, *conditions):
+    return db.execute(
+        select(func.count()).select_from(model).where(*conditions)
+    ).scalar()
+
+
+def test_delete_reservations_deletes_in_chunks_and_counts(db, add_tables):
+    add_tables(4, 4)
+    for hour in range(25):
+        book(db, 1, TOMORROW + timedelta(hours=hour))
+    book(db, 2, TOMORROW)
+
+    deleted = delete_reservations(db, table_id=1, chunk_size=4)
+
+    assert deleted == 25
+    assert count(db, Reservation) == 1
+
+
+def test_delete_reservations_by_time_forgets_only_affected_tables(
+    db, add_tables
+):
+    add_tables(4, 4)
+    book(db, 1, TOMORROW)
+    book(db, 2, TOMORROW + timedelta(days=2))
+    for table_id in (1, 2):
+        check_reservation_conflict(db, booking(table_id, TOMORROW))
+
+    deleted = delete_reservations(
+        db, time_from=TOMORROW, time_to=TOMORROW + timedelta(hours=1)
+    )
+
+    assert deleted == 1
+    assert reservation_index._cached(1) is None
+    assert reservation_index._cached(2) is not None
+
+
+def test_reject_keeps_table_with_future_bookings(db, add_tables):
+    add_tables(4)
+    book(db, 1, TOMORROW)
+    book(db, 1, NOW - timedelta(days=2))
+
+    result = delete_table_with_reservations(db, 1, REMOVAL_REJECT)
+
+    assert result["deleted"] is False
+    assert result["remaining"] == 1
+    assert count(db, Reservation) == 2
+    assert count(db, Table) == 1
+
+
+def test_cancel_deletes_future_and_archives_past(db, add_tables):
+    add_tables(4, 4)
+    book(db, 1, TOMORROW)
+    book(db, 1, TOMORROW + timedelta(hours=2))
+    book(db, 1, NOW - timedelta(days=2))
+    book(db, 2, TOMORROW)
+
+    result = delete_table_with_reservations(db, 1, REMOVAL_CANCEL)
+
+    assert result == dict(
+        deleted=True, cancelled=2, reassigned=0, archived=1, remaining=0
+    )
+    assert count(db, Reservation, Reservation.table_id == 1) == 0
+    assert count(db, ReservationArchive) == 1
+    assert count(db, Table) == 1
+
+
+def test_reassign_moves_future_bookings_to_other_tables(db, add_tables):
+    add_tables(4, 4, 6, 2)
+    book(db, 1, TOMORROW)
+    book(db, 1, TOMORROW + timedelta(hours=2))
+    book(db, 2, TOMORROW)
+
+    result = delete_table_with_reservations(db, 1, REMOVAL_REASSIGN)
+
+    assert result["deleted"] is True
+    assert result["reassigned"] == 2
+    rows = db.execute(
+        select(Reservation.reservation_time, Reservation.table_id)
+    ).all()
+    # Столик на 2 места не подходит; 4-местный предпочтительнее 6-местного
+    assert sorted(map(tuple, rows)) == [
+        (TOMORROW, 2),
+        (TOMORROW, 3),
+        (TOMORROW + timedelta(hours=2), 2),
+    ]
+
+
+def test_failed_reassign_changes_nothing(db, add_tables):
+    add_tables(4, 4)
+    book(db, 1, TOMORROW)
+    book(db, 1, TOMORROW + timedelta(hours=2))
+    book(db, 2, TOMORROW)
+
+    result = delete_table_with_reservations(db, 1, REMOVAL_REASSIGN)
+
+    assert result["deleted"] is False
+    assert result["remaining"] == 2
+    assert count(db, Reservation, Reservation.table_id == 1) == 2
+    assert count(db, Table) == 2
+
+
+def book_during_archive(monkeypatch):
+    """Бронь появляется после предварительной проверки, до блокировки."""
+    archive = table_service.archive_reservations
+
+    def archive_and_book(db, **arguments):
+        archived = archive(db, **arguments)
+        db.execute(insert(Reservation).values(
+            customer_name="Петр Петров",
+            table_id=1,
+            reservation_time=TOMORROW,
+            duration_minutes=60,
+            end_time=TOMORROW + timedelta(minutes=60),
+        ))
+        db.commit()
+        return archived
+
+    monkeypatch.setattr(
+        table_service, "archive_reservations", archive_and_book
+    )
+
+
+@pytest.mark.parametrize("mode", [REMOVAL_REJECT, REMOVAL_REASSIGN])
+def test_booking_made_during_removal_keeps_table(
+    db, add_tables, monkeypatch, mode
+):
+    add_tables(4)
+    book_during_archive(monkeypatch)
+
+    result = delete_table_with_reservations(db, 1, mode)
+
+    assert result["deleted"] is False
+    assert result["remaining"] == 1
+    assert count(db, Reservation, Reservation.table_id == 1) == 1
+    assert count(db, Table) == 1
+
+
+def test_cancel_includes_booking_made_during_removal(
+    db, add_tables, monkeypatch
+):
+    add_tables(4)
+    book(db, 1, TOMORROW + timedelta(hours=2))
+    book_during_archive(monkeypatch)
+
+    result = delete_table_with_reservations(db, 1, REMOVAL_CANCEL)
+
+    assert result["deleted"] is True
+    assert result["cancelled"] == 2
+    assert count(db, Reservation) == 0
+
+
+def test_missing_table_is_not_found(db):
+    assert delete_table_with_reservations(db, 42) is None